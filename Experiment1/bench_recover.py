@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Benchmark the recover_interaction_log pipeline on synthetic data.
+
+Times each stage -- ``parse_events_json``, ``parse_event_log``,
+``load_from_csv``, ``build_row_index``, ``extract_points`` and the two
+renderers -- at several log sizes, and reports throughput (events/s) and
+peak traced memory.
+Inputs come from synth_interaction_log.py, so the suite runs offline.
+
+Results can be stored as a baseline and later runs compared against it;
+any stage slower or hungrier than the baseline by more than ``--tolerance``
+is reported as a regression and the exit status is 1.  Baselines are
+machine specific: record one per machine.
+
+Usage:
+    python bench_recover.py --save-baseline
+    python bench_recover.py                      # compare with baseline
+    python bench_recover.py --sizes 1000,1000000 --stages parse,load,extract
+"""
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+import recover_interaction_log as ril
+from synth_interaction_log import generate_events, write_csv
+
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+# Machine specific, so kept in the working directory rather than the source
+# tree (and gitignored in case the two coincide).
+DEFAULT_BASELINE = Path("bench_baseline.json")
+STAGES = ("parse", "compact", "load", "index", "extract", "plot", "raster")
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+def measure(fn: Callable[[], Any], repeat: int) -> Tuple[float, int]:
+    """Best wall time of ``repeat`` calls, and peak traced bytes of one more.
+
+    Memory is measured in a separate call because tracemalloc slows
+    allocation-heavy code down considerably.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best, peak
+
+
+def run_size(
+    n_events: int,
+    workdir: Path,
+    stages: List[str],
+    repeat: int,
+    payload: str,
+    seed: int,
+) -> List[Dict[str, Any]]:
+    """Benchmark ``stages`` on one synthetic log of ``n_events`` events."""
+    events = generate_events(n_events, payload=payload, seed=seed)
+    raw_text = json.dumps(events, separators=(",", ":"))
+    csv_path = workdir / f"bench_{n_events}.csv"
+    write_csv(csv_path, [events])
+    del events
+
+    parsed = ril.parse_events_json(raw_text, selective=True)
+    points = ril.extract_points(parsed)
+    out = workdir / f"bench_{n_events}.png"
+
+    jobs: Dict[str, Callable[[], Any]] = {
+        "parse": lambda: ril.parse_events_json(raw_text, selective=True),
+        "compact": lambda: ril.parse_event_log(raw_text),
+        "load": lambda: ril.load_from_csv(csv_path, selective=True, row_index=False),
+        "index": lambda: ril.build_row_index(csv_path, write=False),
+        "extract": lambda: ril.extract_points(parsed),
+        "plot": lambda: ril.plot_points(points, out),
+        "raster": lambda: ril.render_points_raster(points, out),
+    }
+    results = []
+    for stage in stages:
+        seconds, peak = measure(jobs[stage], repeat)
+        results.append({
+            "stage": stage,
+            "events": n_events,
+            "seconds": seconds,
+            "events_per_s": n_events / seconds if seconds > 0 else float("inf"),
+            "peak_mb": peak / 2**20,
+        })
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Baselines
+# ---------------------------------------------------------------------------
+
+def environment() -> Dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "json_backend": ril.JSON_BACKEND,
+    }
+
+
+def _key(result: Dict[str, Any]) -> str:
+    return f"{result['stage']}@{result['events']}"
+
+
+def load_baseline(path: Path) -> Optional[Dict[str, Any]]:
+    if not path.is_file():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: Path, results: List[Dict[str, Any]]) -> None:
+    """Store ``results``, keeping entries for stages/sizes not rerun."""
+    baseline = load_baseline(path) or {"results": {}}
+    baseline["environment"] = environment()
+    baseline["created"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    for r in results:
+        baseline["results"][_key(r)] = {
+            "seconds": r["seconds"], "peak_mb": r["peak_mb"],
+        }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+
+
+def compare(
+    results: List[Dict[str, Any]],
+    baseline: Dict[str, Any],
+    tolerance: float,
+) -> List[str]:
+    """Annotate ``results`` with baseline ratios; return regression notes."""
+    regressions = []
+    stored = baseline.get("results", {})
+    for r in results:
+        base = stored.get(_key(r))
+        if base is None:
+            continue
+        r["time_ratio"] = r["seconds"] / base["seconds"] if base["seconds"] else None
+        r["mem_ratio"] = r["peak_mb"] / base["peak_mb"] if base["peak_mb"] else None
+        for label, ratio in (("time", r["time_ratio"]), ("memory", r["mem_ratio"])):
+            if ratio is not None and ratio > 1 + tolerance:
+                regressions.append(f"{_key(r)}: {label} {ratio:.2f}x baseline")
+    return regressions
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _format_row(r: Dict[str, Any]) -> str:
+    line = (
+        f"  {r['stage']:<8} {r['events']:>9}  {r['seconds'] * 1000:>10.1f} ms"
+        f"  {r['events_per_s']:>12,.0f} ev/s  {r['peak_mb']:>8.1f} MB"
+    )
+    if r.get("time_ratio") is not None:
+        line += f"  time {r['time_ratio']:.2f}x"
+    if r.get("mem_ratio") is not None:
+        line += f"  mem {r['mem_ratio']:.2f}x"
+    return line
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark recover_interaction_log stages on synthetic logs.",
+    )
+    parser.add_argument(
+        "--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="Comma-separated events-per-log sizes (default: 1000,10000,100000).",
+    )
+    parser.add_argument(
+        "--stages", default=",".join(STAGES),
+        help=f"Comma-separated stages to run (default: {','.join(STAGES)}).",
+    )
+    parser.add_argument(
+        "--repeat", default=3, type=int, metavar="N",
+        help="Timed runs per stage; the best is kept (default: 3).",
+    )
+    parser.add_argument(
+        "--payload", default="full", choices=("full", "minimal", "none"),
+        help="Element payload of the synthetic events (default: full).",
+    )
+    parser.add_argument("--seed", default=0, type=int, help="Random seed (default: 0).")
+    parser.add_argument(
+        "--baseline", default=str(DEFAULT_BASELINE), metavar="JSON",
+        help="Baseline file to compare against / save to "
+             "(default: bench_baseline.json in the current directory).",
+    )
+    parser.add_argument(
+        "--save-baseline", action="store_true",
+        help="Store this run's results as the new baseline.",
+    )
+    parser.add_argument(
+        "--tolerance", default=0.25, type=float,
+        help="Allowed slowdown / memory growth before a stage counts as a "
+             "regression (default: 0.25, i.e. 25%%).",
+    )
+    parser.add_argument(
+        "--json-backend", default="auto", choices=("auto",) + ril.JSON_BACKENDS,
+        help="JSON decoder to benchmark (default: fastest installed).",
+    )
+    parser.add_argument(
+        "--report", default=None, metavar="JSON",
+        help="Also write the results of this run to a JSON file.",
+    )
+    args = parser.parse_args()
+
+    try:
+        sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+        stages = [s.strip() for s in args.stages.split(",") if s.strip()]
+        unknown = [s for s in stages if s not in STAGES]
+        if unknown:
+            raise ValueError(
+                f"Unknown stage(s) {', '.join(unknown)}, expected any of: {', '.join(STAGES)}"
+            )
+        ril.set_json_backend(args.json_backend)
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+    env = environment()
+    print("Environment: " + ", ".join(f"{k} {v}" for k, v in env.items()))
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="bench_recover_") as tmp:
+        for n in sizes:
+            results.extend(run_size(n, Path(tmp), stages, args.repeat, args.payload, args.seed))
+
+    baseline_path = Path(args.baseline)
+    regressions: List[str] = []
+    baseline = load_baseline(baseline_path)
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if baseline.get("environment") != env:
+            print(f"Note: baseline was recorded in a different environment "
+                  f"({baseline.get('environment')}).")
+
+    print(f"  {'stage':<8} {'events':>9}  {'time':>13}  {'throughput':>17}  {'peak':>11}")
+    for r in results:
+        print(_format_row(r))
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump({"environment": env, "results": results}, f, indent=2)
+    if args.save_baseline:
+        save_baseline(baseline_path, results)
+        print(f"Baseline saved to {baseline_path}")
+    elif baseline is None:
+        print(f"No baseline at {baseline_path}; rerun with --save-baseline to record one.")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+        for note in regressions:
+            print(f"  {note}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,390 @@
+#!/usr/bin/env python3
+"""
+Lay out many participants' interaction traces as contact sheets.
+
+Instead of one ``*_recover_phaseN.png`` per participant, every session is
+drawn as a small panel on a shared grid, grouped by ``condition_id`` and
+phase, so conditions can be compared side by side.  Each condition becomes
+one artifact: a multi-page PDF (or numbered PNG pages with
+``--format png``), one page per ``--cols`` x ``--rows`` panels of a phase.
+
+All panels share one coordinate frame -- each session's source resolution
+is mapped onto the same panel size -- and each page has one legend.  The
+screenshot is decoded once and scaled to panel size once; a panel is that
+thumbnail plus its trace, drawn with the raster renderer's styles, so
+hundreds of panels cost little more than parsing their logs.  Parsing runs
+across a process pool.
+
+Usage:
+    python contact_sheet.py data -o contact_sheets --screenshot image10.png
+    python contact_sheet.py event_store/ --format png --cols 8 --rows 6
+"""
+
+import argparse
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from recover_interaction_log import (
+    DEFAULT_COLOR,
+    RASTER_STYLES,
+    TYPE_COLORS,
+    InteractionPoints,
+    composite_trace,
+    expand_inputs,
+    extract_points,
+    hex_to_rgb,
+    iter_from_csv,
+    load_screenshot,
+    raster_font,
+)
+
+DEFAULT_RESOLUTION: Tuple[int, int] = (1920, 1080)
+FORMATS = ("pdf", "png")
+
+_CAPTION = 16        # px below each panel for its label
+_HEADER = 36         # px above the grid for the page title
+_FOOTER = 28         # px below the grid for the legend
+_GAP = 6             # px between panels
+
+Panel = Dict[str, Any]
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def _panels_from_csv(path: Path) -> List[Panel]:
+    panels = []
+    for row in iter_from_csv(path, selective=True):
+        points = extract_points(row.pop("events"))
+        if not points:
+            continue
+        res = None
+        if row["screen_width"] and row["screen_height"]:
+            res = (row["screen_width"], row["screen_height"])
+        panels.append({
+            "points": points,
+            "participant_id": row["participant_id"] or path.stem,
+            "condition_id": row["condition_id"] or "unknown",
+            "phase": row["phase"],
+            "resolution": res,
+            "source": path.name,
+        })
+    return panels
+
+
+def _load_files(paths: List[Path]) -> Tuple[List[Panel], List[Tuple[Path, str]]]:
+    """Process-pool worker: extract the panels of a chunk of files, never raising."""
+    panels: List[Panel] = []
+    errors: List[Tuple[Path, str]] = []
+    for path in paths:
+        try:
+            panels.extend(_panels_from_csv(path))
+        except Exception as exc:
+            errors.append((path, f"{type(exc).__name__}: {exc}"))
+    return panels, errors
+
+
+def load_panels(
+    inputs: Sequence[Path],
+    jobs: Optional[int] = None,
+) -> Tuple[List[Panel], List[Tuple[Path, str]]]:
+    """Extract one panel per session from the CSVs in ``inputs``.
+
+    Files are split into one chunk per worker.  Returns the panels and
+    per-file errors.
+    """
+    todo = [Path(p) for p in inputs]
+    jobs = min(jobs or os.cpu_count() or 1, max(len(todo), 1))
+    if jobs == 1:
+        partials = [_load_files(todo)]
+    else:
+        chunks = [todo[i::jobs] for i in range(jobs)]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            partials = list(pool.map(_load_files, chunks))
+    panels: List[Panel] = []
+    errors: List[Tuple[Path, str]] = []
+    for chunk_panels, chunk_errors in partials:
+        panels.extend(chunk_panels)
+        errors.extend(chunk_errors)
+    return panels, errors
+
+
+def load_store_panels(store: Any, **filters: Any) -> List[Panel]:
+    """Panels for the segments of an ``interaction_store.EventStore``."""
+    panels = []
+    for seg in store.segments(**filters):
+        points = store.points(seg)
+        if not len(points):
+            continue
+        res = None
+        if seg["screen_width"] and seg["screen_height"]:
+            res = (seg["screen_width"], seg["screen_height"])
+        panels.append({
+            "points": points,
+            "participant_id": seg["participant_id"] or seg["source"],
+            "condition_id": seg["condition_id"] or "unknown",
+            "phase": seg["phase"],
+            "resolution": res,
+            "source": seg["source"],
+        })
+    return panels
+
+
+def group_panels(panels: Sequence[Panel]) -> Dict[str, Dict[Any, List[Panel]]]:
+    """Panels by condition_id, then phase, each list sorted by participant."""
+    groups: Dict[str, Dict[Any, List[Panel]]] = {}
+    for panel in panels:
+        groups.setdefault(panel["condition_id"], {}).setdefault(panel["phase"], []).append(panel)
+    for phases in groups.values():
+        for items in phases.values():
+            items.sort(key=lambda p: (str(p["participant_id"]), p["source"]))
+    return groups
+
+
+# ---------------------------------------------------------------------------
+# Rendering
+# ---------------------------------------------------------------------------
+
+class SheetRenderer:
+    """Draws panels and pages; holds the one decoded, scaled background.
+
+    ``panel_width`` fixes the panel size; its height follows the
+    screenshot's aspect ratio (or that of the default source resolution
+    when there is no screenshot).
+    """
+
+    def __init__(
+        self,
+        screenshot_path: Optional[Path] = None,
+        panel_width: int = 320,
+        cols: int = 6,
+        rows: int = 5,
+    ) -> None:
+        from PIL import Image
+
+        self.cols, self.rows = cols, rows
+        if screenshot_path is not None:
+            full = Image.fromarray(load_screenshot(screenshot_path))
+            aspect = full.height / full.width
+            self.style = RASTER_STYLES["overlay"]
+        else:
+            full = None
+            aspect = DEFAULT_RESOLUTION[1] / DEFAULT_RESOLUTION[0]
+            self.style = RASTER_STYLES["standalone"]
+        self.panel_size = (panel_width, max(round(panel_width * aspect), 1))
+        if full is not None:
+            self.background = full.convert("RGB").resize(
+                self.panel_size, Image.Resampling.LANCZOS
+            ).convert("RGBA")
+            self.marker_scale = max(panel_width / full.width, 0.25)
+        else:
+            self.background = Image.new("RGBA", self.panel_size, (255, 255, 255, 255))
+            self.marker_scale = max(panel_width / DEFAULT_RESOLUTION[0], 0.25)
+        self.font = raster_font(11)
+        self.title_font = raster_font(16)
+
+    def panel(self, points: InteractionPoints,
+              resolution: Optional[Tuple[int, int]]) -> Any:
+        """One session's trace over the shared background thumbnail."""
+        src_w, src_h = resolution or DEFAULT_RESOLUTION
+        w, h = self.panel_size
+        palette = np.array(
+            [hex_to_rgb(TYPE_COLORS.get(t, DEFAULT_COLOR)) for t in points.type_names],
+            dtype=np.uint8,
+        )
+        return composite_trace(
+            self.background, points.x * (w / src_w), points.y * (h / src_h),
+            palette[points.codes], points.mask("chart_click"), self.style,
+            self.marker_scale,
+        )
+
+    def page(self, panels: Sequence[Panel], title: str) -> Any:
+        """A grid of up to ``cols`` x ``rows`` panels with a title and legend."""
+        from PIL import Image, ImageDraw
+
+        w, h = self.panel_size
+        cell_w, cell_h = w + _GAP, h + _CAPTION + _GAP
+        cols = min(self.cols, len(panels))
+        rows = -(-len(panels) // self.cols)
+        page_w = max(cols * cell_w + _GAP, 480)
+        page_h = _HEADER + rows * cell_h + _FOOTER
+        page = Image.new("RGB", (page_w, page_h), (255, 255, 255))
+        draw = ImageDraw.Draw(page)
+        draw.text((page_w / 2, _HEADER / 2), title, fill=(0, 0, 0),
+                  font=self.title_font, anchor="mm")
+
+        present: Dict[str, None] = {}
+        for i, panel in enumerate(panels):
+            points = panel["points"]
+            x = _GAP + (i % self.cols) * cell_w
+            y = _HEADER + (i // self.cols) * cell_h
+            page.paste(self.panel(points, panel["resolution"]).convert("RGB"), (x, y))
+            draw.rectangle([x - 1, y - 1, x + w, y + h], outline=(200, 200, 200))
+            label = f"{panel['participant_id']}  ({len(points)} pts)"
+            while len(label) > 4 and draw.textlength(label, font=self.font) > w:
+                label = label[:-4] + "..."
+            draw.text((x, y + h + 2), label, fill=(60, 60, 60), font=self.font)
+            present.update(dict.fromkeys(points.types_present()))
+
+        legend = [(t, hex_to_rgb(TYPE_COLORS.get(t, DEFAULT_COLOR))) for t in present]
+        swatch, gap = 10, 20
+        widths = [swatch + 5 + draw.textlength(t, font=self.font) for t, _ in legend]
+        lx = (page_w - (sum(widths) + gap * max(len(widths) - 1, 0))) / 2
+        ly = page_h - _FOOTER / 2
+        for (label, color), width in zip(legend, widths):
+            draw.rectangle([lx, ly - swatch / 2, lx + swatch, ly + swatch / 2], fill=color)
+            draw.text((lx + swatch + 5, ly), label, fill=(0, 0, 0), font=self.font, anchor="lm")
+            lx += width + gap
+        return page
+
+
+def _safe_name(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", str(value)).strip("_") or "unknown"
+
+
+def render_contact_sheets(
+    panels: Sequence[Panel],
+    output_dir: Path,
+    screenshot_path: Optional[Path] = None,
+    fmt: str = "pdf",
+    cols: int = 6,
+    rows: int = 5,
+    panel_width: int = 320,
+) -> List[Path]:
+    """Write one contact sheet per condition; returns the written paths.
+
+    Pages hold ``cols`` x ``rows`` panels of one phase.  With ``fmt="pdf"``
+    each condition is one multi-page PDF; with ``"png"`` every page is its
+    own ``contact_<condition>_phase<N>_p<K>.png``.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format {fmt!r}, expected one of: {', '.join(FORMATS)}")
+    if cols < 1 or rows < 1 or panel_width < 16:
+        raise ValueError("cols and rows must be at least 1 and panel_width at least 16.")
+
+    renderer = SheetRenderer(screenshot_path, panel_width, cols, rows)
+    per_page = cols * rows
+    output_dir.mkdir(parents=True, exist_ok=True)
+    written: List[Path] = []
+    for condition, phases in sorted(group_panels(panels).items()):
+        pages = []
+        for phase in sorted(phases, key=lambda p: (p is None, p)):
+            items = phases[phase]
+            n_pages = -(-len(items) // per_page)
+            for k in range(n_pages):
+                chunk = items[k * per_page:(k + 1) * per_page]
+                title = f"{condition}  phase {phase}  --  {len(items)} session(s)"
+                if n_pages > 1:
+                    title += f"  (page {k + 1}/{n_pages})"
+                page = renderer.page(chunk, title)
+                if fmt == "png":
+                    out = output_dir / (
+                        f"contact_{_safe_name(condition)}_phase{phase}_p{k + 1}.png"
+                    )
+                    page.save(out, compress_level=1)
+                    written.append(out)
+                else:
+                    pages.append(page)
+        if pages:
+            out = output_dir / f"contact_{_safe_name(condition)}.pdf"
+            pages[0].save(out, save_all=True, append_images=pages[1:], resolution=100.0)
+            written.append(out)
+    return written
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Render per-condition contact sheets of many participants' "
+        "interaction traces.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+",
+        help="CSV files, directories (all user_*.csv inside), quoted globs, "
+             "or an event store directory built by interaction_store.py.",
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default="contact_sheets",
+        help="Directory for the sheets (default: contact_sheets/).",
+    )
+    parser.add_argument(
+        "--screenshot", default=None,
+        help="Screenshot PNG shown behind every panel.",
+    )
+    parser.add_argument(
+        "--format", default="pdf", choices=FORMATS,
+        help="'pdf': one multi-page PDF per condition (default); "
+             "'png': one PNG per page.",
+    )
+    parser.add_argument("--cols", default=6, type=int, help="Panels per row (default: 6).")
+    parser.add_argument("--rows", default=5, type=int, help="Rows per page (default: 5).")
+    parser.add_argument(
+        "--panel-width", default=320, type=int, metavar="PX",
+        help="Panel width in pixels (default: 320).",
+    )
+    parser.add_argument(
+        "--phase", default=None, type=int, choices=[1, 2],
+        help="Only include this phase.",
+    )
+    parser.add_argument(
+        "--condition", default=None,
+        help="Only include this condition_id.",
+    )
+    parser.add_argument(
+        "-j", "--jobs", default=None, type=int, metavar="N",
+        help="Number of worker processes for parsing (default: CPU count).",
+    )
+    args = parser.parse_args()
+
+    try:
+        started = time.perf_counter()
+        panels: List[Panel] = []
+        files: List[Path] = []
+        for pattern in args.inputs:
+            path = Path(pattern)
+            if path.is_dir():
+                from interaction_store import EventStore, is_store
+
+                if is_store(path):
+                    panels.extend(load_store_panels(EventStore(path)))
+                    continue
+            files.extend([path] if path.is_file() else expand_inputs(pattern))
+        loaded, errors = load_panels(files, jobs=args.jobs)
+        panels.extend(loaded)
+        for path, error in errors:
+            print(f"  FAILED {path.name}: {error}")
+        if args.phase is not None:
+            panels = [p for p in panels if p["phase"] == args.phase]
+        if args.condition is not None:
+            panels = [p for p in panels if p["condition_id"] == args.condition]
+        if not panels:
+            raise ValueError("No sessions with interaction points found.")
+        print(f"{len(panels)} session(s) from {len(files)} file(s) "
+              f"in {time.perf_counter() - started:.1f}s")
+
+        started = time.perf_counter()
+        screenshot = Path(args.screenshot) if args.screenshot else None
+        written = render_contact_sheets(
+            panels, Path(args.output_dir), screenshot, args.format,
+            args.cols, args.rows, args.panel_width,
+        )
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+    for path in written:
+        print(f"  {path}")
+    print(f"Wrote {len(written)} sheet(s) in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -116,13 +116,46 @@ export class DataProcessor {
         };
     }
 
+    /**
+     * Collect precomputed per-date summaries for a stock
+     * Files from generate_stimuli.py carry 'aggregated' rows whose scenario names
+     * the summary (mean, min, max, lower, upper, q05, ...) over the whole ensemble.
+     * Returns rows sorted by date with one key per summary, or null when the data
+     * lacks the mean/min/max rows (e.g. the legacy file, whose only aggregated
+     * rows are a rounded mean) so the caller computes them instead.
+     */
+    getPrecomputedSummaries(data, stock) {
+        const byDate = {};
+        const summaries = new Set();
+        data.forEach(d => {
+            if (d.stock !== stock || d.series !== 'aggregated' || !d.scenario) return;
+            if (!byDate[d.date]) {
+                byDate[d.date] = { date: new Date(d.date) };
+            }
+            byDate[d.date][d.scenario] = d.price;
+            summaries.add(d.scenario);
+        });
+
+        if (!['mean', 'min', 'max'].every(summary => summaries.has(summary))) {
+            return null;
+        }
+        return Object.keys(byDate).sort().map(date => byDate[date]);
+    }
+
     /**
      * Calculate real-time aggregation from sampled scenarios
+     * Uses the precomputed mean rows when the data has them
      */
     calculateRealTimeAggregation(data) {
         const realTimeAggregated = {};
         
         ['A', 'B'].forEach(stock => {
+            const precomputed = this.getPrecomputedSummaries(data, stock);
+            if (precomputed) {
+                realTimeAggregated[stock] = precomputed.map(d => ({ date: d.date, price: d.mean }));
+                return;
+            }
+
             // Filter prediction data for this stock and sampled scenarios
             const predictionData = data.filter(d => 
                 d.stock === stock && 
@@ -158,11 +191,19 @@ export class DataProcessor {
 
     /**
      * Calculate confidence bounds from sampled scenarios
+     * Uses the precomputed min/max/mean rows (and any other summaries, e.g.
+     * lower/upper) when the data has them
      */
     calculateConfidenceBounds(data) {
         const confidenceBounds = {};
         
         ['A', 'B'].forEach(stock => {
+            const precomputed = this.getPrecomputedSummaries(data, stock);
+            if (precomputed) {
+                confidenceBounds[stock] = precomputed;
+                return;
+            }
+
             // Filter prediction data for this stock and sampled scenarios
             const predictionData = data.filter(d => 
                 d.stock === stock && 
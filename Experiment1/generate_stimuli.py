@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""
+Generate ensemble forecast stimuli of any size with NumPy.
+
+Each stock gets a noisy historical series followed by an ensemble of
+forecast members drawn from configurable trend, noise and agreement
+parameters.  The per-date summaries the conditions show -- the aggregated
+(mean) line, the prediction-interval bounds and quantiles, and the min/max
+envelope -- are computed over the whole ensemble in the same pass, so the
+output can summarise thousands of members while only a few of them are
+written out for the participant's page to load.
+
+Usage:
+    python generate_stimuli.py synthetic_stock_data_gen.json --members 5000 --keep 10
+    python generate_stimuli.py out.json --stock A:preset=polarization,level=49 \\
+        --stock B:trend=-0.05,agreement=0.4 --seed 7
+    python generate_stimuli.py conditions.json --format conditions --history 5 --horizon 5 \\
+        --stock Agreement:preset=agreement --stock Risk_of_Loss:preset=risk_of_loss
+
+``--format stock`` (default) writes ``{"data": [...]}`` entries shaped like
+synthetic_stock_data_norm.json: ``historical`` rows, ``prediction`` rows per
+kept ``scenario_N`` and ``aggregated`` rows whose ``scenario`` names the
+summary (``mean``, ``min``, ``max``, ``lower``, ``upper``, ``q05``, ...).
+``--format conditions`` writes named entries shaped like
+synthetic_prediction_conditions.json, with the summaries added alongside
+``historical`` and ``predictions``.  A ``meta`` object records the
+parameters and seed either way.
+
+Stock parameters (``--stock NAME:key=value,...``):
+    level         first historical value
+    trend         historical drift per day
+    noise         standard deviation of the daily steps (history and members)
+    forecast      consensus drift per day of the members (default: trend)
+    spread        standard deviation of member drifts at zero agreement
+    agreement     0..1; scales the member drift spread by (1 - agreement)
+    polarization  0..1; fraction of members whose drift is mirrored
+    preset        start from one of PRESETS before applying the other keys
+"""
+
+import argparse
+import json
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class StockParams:
+    """Generation parameters of one stock (see the module docstring)."""
+
+    level: float = 50.0
+    trend: float = 0.0
+    noise: float = 1.0
+    forecast: Optional[float] = None
+    spread: float = 0.5
+    agreement: float = 0.8
+    polarization: float = 0.0
+
+
+# Parameter sets echoing the hand-written scenarios of
+# synthetic_prediction_conditions.json.
+PRESETS: Dict[str, Dict[str, float]] = {
+    "agreement": {"trend": 1.0, "noise": 0.2, "agreement": 0.95},
+    "polarization": {"trend": 1.0, "noise": 0.2, "agreement": 0.95, "polarization": 0.4},
+    "risk_of_loss": {"trend": 1.0, "noise": 0.2, "agreement": 0.95, "polarization": 0.2},
+    "chance_of_gain": {"trend": -0.5, "noise": 0.2, "agreement": 0.95, "polarization": 0.2},
+    "ambiguous_spread": {"trend": 1.0, "noise": 1.5, "spread": 1.0, "agreement": 0.0},
+}
+
+DEFAULT_STOCKS: Dict[str, StockParams] = {
+    "A": StockParams(level=49.0, trend=-0.08, noise=1.0, spread=0.3),
+    "B": StockParams(level=34.0, trend=0.06, noise=1.0, spread=0.3),
+}
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def parse_stock(spec: str) -> Tuple[str, StockParams]:
+    """Parse ``NAME[:key=value,...]`` into ``(name, params)``."""
+    name, _, rest = spec.partition(":")
+    name = name.strip()
+    if not name:
+        raise ValueError(f"Invalid stock '{spec}': missing name")
+    pairs = [p.partition("=") for p in rest.split(",") if p.strip()]
+    values: Dict[str, Any] = {}
+    for key, sep, value in pairs:
+        key = key.strip()
+        if not sep:
+            raise ValueError(f"Invalid stock '{spec}': expected key=value, got '{key}'")
+        if key == "preset":
+            if value.strip() not in PRESETS:
+                raise ValueError(
+                    f"Unknown preset '{value}', expected one of: {', '.join(PRESETS)}"
+                )
+            values = {**PRESETS[value.strip()], **values}
+            continue
+        if key not in {f.name for f in fields(StockParams)}:
+            raise ValueError(
+                f"Unknown stock parameter '{key}', expected one of: "
+                f"{', '.join(f.name for f in fields(StockParams))}, preset"
+            )
+        try:
+            values[key] = float(value)
+        except ValueError:
+            raise ValueError(f"Invalid stock '{spec}': {key} must be a number")
+    params = replace(StockParams(), **values)
+    for key in ("agreement", "polarization"):
+        if not 0.0 <= getattr(params, key) <= 1.0:
+            raise ValueError(f"Invalid stock '{spec}': {key} must be within 0..1")
+    if params.noise < 0 or params.spread < 0:
+        raise ValueError(f"Invalid stock '{spec}': noise and spread must not be negative")
+    return name, params
+
+
+# ---------------------------------------------------------------------------
+# Generation
+# ---------------------------------------------------------------------------
+
+def generate_stock(
+    params: StockParams,
+    n_history: int,
+    horizon: int,
+    members: int,
+    rng: np.random.Generator,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return the history ``(n_history,)`` and member paths ``(members, horizon)``.
+
+    History is a random walk with drift ``trend``.  Members start from the
+    last historical value, each with its own drift around the consensus
+    (spread shrinking with ``agreement``; a ``polarization`` share of them
+    mirrored) plus their own random walk.
+    """
+    steps = rng.normal(params.trend, params.noise, n_history)
+    steps[0] = 0.0
+    history = params.level + np.cumsum(steps)
+
+    consensus = params.trend if params.forecast is None else params.forecast
+    drift = consensus + (1.0 - params.agreement) * params.spread * rng.standard_normal(members)
+    mirrored = rng.permutation(members) < round(params.polarization * members)
+    drift[mirrored] = -drift[mirrored]
+
+    days = np.arange(1, horizon + 1, dtype=float)
+    paths = rng.normal(0.0, params.noise, (members, horizon))
+    np.cumsum(paths, axis=1, out=paths)
+    paths += history[-1] + drift[:, None] * days
+    return history, paths
+
+
+def quantile_name(q: float) -> str:
+    """Summary name of quantile ``q``: 0.05 -> ``q05``, 0.5 -> ``q50``, 0.975 -> ``q97.5``."""
+    pct = round(q * 100, 6)
+    return f"q{pct:02.0f}" if pct.is_integer() else f"q{pct:g}"
+
+
+def summarize(
+    paths: np.ndarray,
+    interval: float = 0.9,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+) -> Dict[str, np.ndarray]:
+    """Per-date summaries of member ``paths`` (members along axis 0).
+
+    Returns ``mean``, ``min``, ``max``, the central ``interval`` as
+    ``lower`` / ``upper`` and every quantile under :func:`quantile_name`.
+    All quantiles, including the min/max envelope and the interval bounds,
+    come from one ``np.quantile`` call over the ensemble.
+    """
+    # Rounded so that e.g. the 0.9 interval shares its bounds with q05 / q95.
+    tail = round((1.0 - interval) / 2.0, 9)
+    levels = sorted({0.0, 1.0, tail, 1.0 - tail, *quantiles})
+    values = np.quantile(paths, levels, axis=0)
+    at = {q: values[i] for i, q in enumerate(levels)}
+    out = {
+        "mean": paths.mean(axis=0),
+        "min": at[0.0],
+        "max": at[1.0],
+        "lower": at[tail],
+        "upper": at[1.0 - tail],
+    }
+    out.update((quantile_name(q), at[q]) for q in quantiles)
+    return out
+
+
+def _rounded(values: np.ndarray, decimals: Optional[int]) -> List[Any]:
+    if decimals is None:
+        return values.tolist()
+    values = np.round(values, decimals)
+    return values.astype(int).tolist() if decimals <= 0 else values.tolist()
+
+
+# ---------------------------------------------------------------------------
+# Stimulus files
+# ---------------------------------------------------------------------------
+
+def generate(
+    stocks: Dict[str, StockParams],
+    n_history: int = 152,
+    horizon: int = 29,
+    members: int = 10,
+    keep: Optional[int] = None,
+    start: str = "2025-01-01",
+    interval: float = 0.9,
+    quantiles: Sequence[float] = DEFAULT_QUANTILES,
+    decimals: Optional[int] = 0,
+    seed: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """Generate every stock; return ``{name: {...}}`` with lists ready for JSON.
+
+    Each value holds ``dates`` (history then forecast), ``historical``,
+    ``predictions`` (the first ``keep`` members, default all) and
+    ``summaries`` (see :func:`summarize`).  Member values are rounded to
+    ``decimals`` before they are summarised, so the written members always
+    lie within the written envelope; ``None`` keeps full precision.
+    """
+    rng = np.random.default_rng(seed)
+    keep = members if keep is None else min(keep, members)
+    dates = (np.datetime64(start) + np.arange(n_history + horizon)).astype(str).tolist()
+    out: Dict[str, Dict[str, Any]] = {}
+    for name, params in stocks.items():
+        history, paths = generate_stock(params, n_history, horizon, members, rng)
+        if decimals is not None:
+            history, paths = np.round(history, decimals), np.round(paths, decimals)
+        summaries = summarize(paths, interval, quantiles)
+        out[name] = {
+            "dates": dates,
+            "historical": _rounded(history, decimals),
+            "predictions": _rounded(paths[:keep], decimals),
+            "summaries": {k: _rounded(v, decimals) for k, v in summaries.items()},
+        }
+    return out
+
+
+def stock_entries(generated: Dict[str, Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Flatten :func:`generate` output into ``{"data": [...]}`` entries.
+
+    Ordered like synthetic_stock_data_norm.json: history by date then
+    stock, predictions by date, stock and scenario, then the aggregated
+    summaries by date and stock.
+    """
+    names = list(generated)
+    if not names:
+        return []
+    dates = generated[names[0]]["dates"]
+    n_history = len(generated[names[0]]["historical"])
+    entries: List[Dict[str, Any]] = []
+    for i, date in enumerate(dates[:n_history]):
+        for name in names:
+            entries.append({
+                "date": date, "stock": name, "price": generated[name]["historical"][i],
+                "series": "historical", "scenario": None,
+            })
+    for i, date in enumerate(dates[n_history:]):
+        for name in names:
+            for m, member in enumerate(generated[name]["predictions"]):
+                entries.append({
+                    "date": date, "stock": name, "price": member[i],
+                    "series": "prediction", "scenario": f"scenario_{m + 1}",
+                })
+    for i, date in enumerate(dates[n_history:]):
+        for name in names:
+            for summary, values in generated[name]["summaries"].items():
+                entries.append({
+                    "date": date, "stock": name, "price": values[i],
+                    "series": "aggregated", "scenario": summary,
+                })
+    return entries
+
+
+def condition_entries(generated: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Shape :func:`generate` output like synthetic_prediction_conditions.json."""
+    return {
+        name: {
+            "historical": g["historical"],
+            "predictions": g["predictions"],
+            "aggregated": g["summaries"]["mean"],
+            **{k: v for k, v in g["summaries"].items() if k != "mean"},
+        }
+        for name, g in generated.items()
+    }
+
+
+def write_stimuli(
+    output_path: Path,
+    generated: Dict[str, Dict[str, Any]],
+    meta: Dict[str, Any],
+    fmt: str = "stock",
+    indent: Optional[int] = None,
+) -> int:
+    """Write :func:`generate` output in ``fmt``; return the number of entries."""
+    if fmt == "stock":
+        entries = stock_entries(generated)
+        document: Dict[str, Any] = {"data": entries, "meta": meta}
+        count = len(entries)
+    elif fmt == "conditions":
+        document = {**condition_entries(generated), "meta": meta}
+        count = len(generated)
+    else:
+        raise ValueError(f"Unknown format '{fmt}', expected 'stock' or 'conditions'")
+    with open(output_path, "w", encoding="utf-8") as f:
+        if indent is None:
+            json.dump(document, f, separators=(",", ":"))
+        else:
+            json.dump(document, f, indent=indent)
+    return count
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _parse_quantiles(value: str) -> Tuple[float, ...]:
+    try:
+        qs = tuple(float(q) for q in value.split(",") if q.strip())
+    except ValueError:
+        raise ValueError(f"Invalid quantiles '{value}': expected comma-separated numbers")
+    if any(not 0.0 <= q <= 1.0 for q in qs):
+        raise ValueError(f"Invalid quantiles '{value}': each must be within 0..1")
+    return qs
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate ensemble forecast stimuli with precomputed summaries.",
+    )
+    parser.add_argument("output", help="Output JSON path.")
+    parser.add_argument(
+        "--stock", action="append", default=[], metavar="NAME[:K=V,...]",
+        help="Stock to generate, repeatable (default: A and B).  Keys: "
+             + ", ".join(f.name for f in fields(StockParams))
+             + ", preset (" + ", ".join(PRESETS) + ").",
+    )
+    parser.add_argument("--members", default=10, type=int,
+                        help="Ensemble members per stock (default: 10).")
+    parser.add_argument(
+        "--keep", default=None, type=int, metavar="N",
+        help="Write only the first N members; summaries still cover all "
+             "of them (default: write every member).",
+    )
+    parser.add_argument("--history", default=152, type=int, metavar="DAYS",
+                        help="Historical days (default: 152).")
+    parser.add_argument("--horizon", default=29, type=int, metavar="DAYS",
+                        help="Forecast days (default: 29).")
+    parser.add_argument("--start", default="2025-01-01",
+                        help="First historical date (default: 2025-01-01).")
+    parser.add_argument("--interval", default=0.9, type=float,
+                        help="Central prediction interval for lower/upper (default: 0.9).")
+    parser.add_argument(
+        "--quantiles", default=",".join(f"{q:g}" for q in DEFAULT_QUANTILES),
+        help="Comma-separated quantiles to precompute (default: %(default)s).",
+    )
+    parser.add_argument(
+        "--decimals", default=0, type=int,
+        help="Round values to this many decimals (default: 0, which writes "
+             "integers); negative rounds to tens, hundreds, ...",
+    )
+    parser.add_argument("--seed", default=None, type=int, help="Random seed.")
+    parser.add_argument("--format", default="stock", choices=("stock", "conditions"),
+                        help="Output layout (default: stock).")
+    parser.add_argument(
+        "--indent", default=None, type=int, metavar="N",
+        help="Indent the output JSON (default: compact).",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        stocks = dict(parse_stock(s) for s in args.stock) if args.stock else dict(DEFAULT_STOCKS)
+        if args.members < 1 or args.history < 1 or args.horizon < 1:
+            raise ValueError("--members, --history and --horizon must be positive")
+        if args.keep is not None and args.keep < 0:
+            raise ValueError("--keep must not be negative")
+        if not 0.0 < args.interval < 1.0:
+            raise ValueError("--interval must be between 0 and 1")
+        quantiles = _parse_quantiles(args.quantiles)
+        seed = args.seed if args.seed is not None else int(np.random.SeedSequence().entropy % 2**32)
+        generated = generate(
+            stocks, args.history, args.horizon, args.members, args.keep, args.start,
+            args.interval, quantiles, args.decimals, seed,
+        )
+        meta = {
+            "seed": seed,
+            "members": args.members,
+            "kept": min(args.members, args.keep) if args.keep is not None else args.members,
+            "interval": args.interval,
+            "quantiles": list(quantiles),
+            "stocks": {name: asdict(p) for name, p in stocks.items()},
+        }
+        n = write_stimuli(Path(args.output), generated, meta, args.format, args.indent)
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+    print(
+        f"Done. Generated {len(stocks)} stock(s) x {args.members} member(s), "
+        f"wrote {n} entr{'y' if n == 1 else 'ies'} to {args.output} (seed {seed})"
+    )
+
+
+if __name__ == "__main__":
+    main()
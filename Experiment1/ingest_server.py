@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+"""Local data collection server: save_data.php without PHP, plus live ingest.
+
+Serves the built experiment (``dist/``) and answers the two PHP endpoints
+the experiment calls, with the same request/response contract:
+
+    POST /save_data.php      {"filedata": "<csv>", "filename": "user_<id>_<ts>.csv"}
+                             -> {"success": true, "filename", "size", "message"}
+    GET|POST /complete_study.php
+                             -> {"success": true, "redirect_url"}
+
+Uploads are validated with save_data.php's filename pattern and written to
+``<root>/data`` durably: into a temporary file that is fsynced and then
+linked under its final name, so a crash never leaves a partial CSV and an
+existing file is never overwritten.  Taken names get the same ``_1``,
+``_2``, ... suffixes, looked up in memory rather than probed one by one.
+``save_log.txt``, ``error_log.txt`` and ``completion_log.txt`` are kept as
+before.
+
+Every saved CSV is also queued for the event store (interaction_store.py):
+uploads arriving within ``--batch-delay`` seconds are ingested together in
+a worker thread, parsing ``interaction_log`` into event columns and the
+trial rows into ``trials.json``, with one index update per batch.  On
+start-up, CSVs already in ``data/`` that the store lacks are ingested too.
+
+Uploads, the event store and ``.php`` sources are never served.
+
+Usage:
+    python ingest_server.py --root dist --port 8011
+    python ingest_server.py --root dist --store dist/event_store --batch-delay 5
+"""
+
+import argparse
+import asyncio
+import json
+import mimetypes
+import os
+import re
+import signal
+import tempfile
+import threading
+import time
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import unquote, urlsplit
+
+from interaction_store import ingest
+
+# Same check as save_data.php.
+FILENAME_RE = re.compile(r"user_\d+_[\d\-T]+\.csv")
+MAX_BODY = 256 * 2**20
+DEFAULT_BATCH_DELAY = 2.0
+DEFAULT_BATCH_SIZE = 64
+# The completion URL is read out of complete_study.php so it lives in one place.
+_REDIRECT_RE = re.compile(r"""['"]redirect_url['"]\s*=>\s*['"]([^'"]+)['"]""")
+
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+}
+
+Response = Tuple[int, Dict[str, str], bytes]
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _json_response(status: int, payload: Dict[str, Any]) -> Response:
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return status, {"Content-Type": "application/json", **CORS_HEADERS}, body
+
+
+def _append_line(path: Path, line: str) -> None:
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write(line)
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _default_file_mode() -> int:
+    """Mode of a newly created file under the process umask (e.g. 0644)."""
+    # umask can only be read by setting it; do so before any threads start.
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return 0o666 & ~mask
+
+
+# ---------------------------------------------------------------------------
+# Uploads
+# ---------------------------------------------------------------------------
+
+class UploadWriter:
+    """Durable, never-overwriting writes of participant CSVs into ``data_dir``."""
+
+    def __init__(self, data_dir: Path) -> None:
+        self.data_dir = Path(data_dir)
+        self.taken: Set[str] = set()
+        self.next_suffix: Dict[str, int] = {}
+        # mkstemp creates 0600 files; uploads get the umask default that
+        # save_data.php's files have.
+        self.file_mode = _default_file_mode()
+        # reserve() runs on the event loop and, on a clash, in write().
+        self._lock = threading.Lock()
+
+    def open(self) -> None:
+        self.data_dir.mkdir(parents=True, exist_ok=True)
+        self.taken = {p.name for p in self.data_dir.iterdir()}
+
+    def reserve(self, filename: str) -> str:
+        """``filename``, or the first free ``<stem>_<n><ext>`` after it."""
+        with self._lock:
+            if filename not in self.taken:
+                self.taken.add(filename)
+                return filename
+            stem, ext = os.path.splitext(filename)
+            n = self.next_suffix.get(filename, 1)
+            while f"{stem}_{n}{ext}" in self.taken:
+                n += 1
+            self.next_suffix[filename] = n + 1
+            name = f"{stem}_{n}{ext}"
+            self.taken.add(name)
+            return name
+
+    def write(self, filename: str, data: bytes) -> str:
+        """Write ``data`` under ``filename`` (or a suffixed name); returns the name used.
+
+        Blocking: run it in a worker thread.
+        """
+        fd, tmp = tempfile.mkstemp(prefix=".upload-", dir=self.data_dir)
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                os.fchmod(fh.fileno(), self.file_mode)
+                fh.write(data)
+                fh.flush()
+                os.fsync(fh.fileno())
+            while True:
+                try:
+                    # link() fails instead of replacing a file written by
+                    # someone else since start-up.
+                    os.link(tmp, self.data_dir / filename)
+                    break
+                except FileExistsError:
+                    filename = self.reserve(filename)
+        finally:
+            os.unlink(tmp)
+        _fsync_dir(self.data_dir)
+        return filename
+
+
+# ---------------------------------------------------------------------------
+# Store ingestion
+# ---------------------------------------------------------------------------
+
+class IngestQueue:
+    """Feeds saved CSVs to interaction_store.ingest in batches."""
+
+    def __init__(
+        self,
+        store: Path,
+        error_log: Path,
+        delay: float = DEFAULT_BATCH_DELAY,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self.store = Path(store)
+        self.error_log = error_log
+        self.delay = delay
+        self.batch_size = batch_size
+        self.queue: "asyncio.Queue[Optional[Path]]" = asyncio.Queue()
+        self.ingested = 0
+
+    def put(self, path: Path) -> None:
+        self.queue.put_nowait(path)
+
+    def close(self) -> None:
+        """Make run() return once everything queued so far is ingested."""
+        self.queue.put_nowait(None)
+
+    async def _next_batch(self) -> Tuple[List[Path], bool]:
+        """Up to ``batch_size`` paths arriving within ``delay`` of the first,
+        and whether close() was reached."""
+        loop = asyncio.get_running_loop()
+        batch: List[Path] = []
+        item = await self.queue.get()
+        deadline = loop.time() + self.delay
+        while item is not None:
+            batch.append(item)
+            timeout = deadline - loop.time()
+            if len(batch) >= self.batch_size or timeout <= 0:
+                return batch, False
+            try:
+                item = await asyncio.wait_for(self.queue.get(), timeout)
+            except asyncio.TimeoutError:
+                return batch, False
+        return batch, True
+
+    async def _ingest(self, batch: List[Path]) -> None:
+        started = time.perf_counter()
+        try:
+            done, errors = await asyncio.to_thread(ingest, batch, self.store, 1)
+        except Exception as exc:
+            done, errors = [], [(p, f"{type(exc).__name__}: {exc}") for p in batch]
+        self.ingested += len(done)
+        for path, error in errors:
+            _append_line(self.error_log, f"{_now()} - Ingest error: {path.name}: {error}\n")
+            print(f"  ingest FAILED {path.name}: {error}")
+        if done:
+            print(
+                f"  ingested {len(done)} file(s) into {self.store} "
+                f"in {time.perf_counter() - started:.1f}s"
+            )
+
+    async def run(self) -> None:
+        """Ingest batch after batch until close()."""
+        while True:
+            batch, closing = await self._next_batch()
+            if batch:
+                await self._ingest(batch)
+            if closing:
+                return
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+class IngestServer:
+    """Static files plus the save_data.php / complete_study.php endpoints."""
+
+    def __init__(
+        self,
+        root: Path,
+        store: Optional[Path],
+        completion_url: Optional[str] = None,
+        batch_delay: float = DEFAULT_BATCH_DELAY,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+    ) -> None:
+        self.root = Path(root).resolve()
+        self.data_dir = self.root / "data"
+        self.uploads = UploadWriter(self.data_dir)
+        self.completion_url = completion_url or self._read_completion_url()
+        self.store = None if store is None else Path(store).resolve()
+        self.batch_delay = batch_delay
+        self.batch_size = batch_size
+        self.ingest_queue: Optional[IngestQueue] = None
+        self.connections: Set[asyncio.StreamWriter] = set()
+
+    def _read_completion_url(self) -> Optional[str]:
+        for candidate in (self.root / "complete_study.php",
+                          Path(__file__).with_name("complete_study.php")):
+            try:
+                match = _REDIRECT_RE.search(candidate.read_text(encoding="utf-8"))
+            except OSError:
+                continue
+            if match:
+                return match.group(1)
+        return None
+
+    # -- endpoints -----------------------------------------------------------
+
+    async def save_data(self, method: str, body: bytes) -> Response:
+        if method != "POST":
+            return _json_response(HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Method not allowed"})
+        try:
+            try:
+                post = json.loads(body)
+            except ValueError:
+                post = None
+            if (
+                not isinstance(post, dict)
+                or not isinstance(post.get("filedata"), str)
+                or not isinstance(post.get("filename"), str)
+            ):
+                raise ValueError("Missing required data: filedata and filename")
+            filename = post["filename"]
+            if not FILENAME_RE.fullmatch(filename):
+                raise ValueError("Invalid filename format")
+
+            data = post["filedata"].encode("utf-8")
+            filename = await asyncio.to_thread(
+                self.uploads.write, self.uploads.reserve(filename), data
+            )
+            _append_line(
+                self.data_dir / "save_log.txt",
+                f"{_now()} - Saved file: {filename} ({len(data)} bytes)\n",
+            )
+            if self.ingest_queue is not None:
+                self.ingest_queue.put(self.data_dir / filename)
+            print(f"  saved {filename} ({len(data)} bytes)")
+            return _json_response(HTTPStatus.OK, {
+                "success": True,
+                "filename": filename,
+                "size": len(data),
+                "message": "Data saved successfully",
+            })
+        except Exception as exc:
+            try:
+                _append_line(self.data_dir / "error_log.txt", f"{_now()} - Error: {exc}\n")
+            except OSError:
+                pass
+            return _json_response(
+                HTTPStatus.INTERNAL_SERVER_ERROR, {"success": False, "error": str(exc)}
+            )
+
+    async def complete_study(self, method: str) -> Response:
+        if method not in ("GET", "POST"):
+            return _json_response(HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Method not allowed"})
+        try:
+            _append_line(
+                self.data_dir / "completion_log.txt",
+                f"{_now()} - Study completion request ({method})\n",
+            )
+        except OSError:
+            pass
+        return _json_response(HTTPStatus.OK, {"success": True, "redirect_url": self.completion_url})
+
+    def static(self, method: str, path: str) -> Response:
+        if method not in ("GET", "HEAD"):
+            return HTTPStatus.METHOD_NOT_ALLOWED, {}, b"Method not allowed"
+        target = (self.root / unquote(path).lstrip("/")).resolve()
+        if (
+            not target.is_relative_to(self.root)
+            or target.is_relative_to(self.data_dir)
+            or (self.store is not None and target.is_relative_to(self.store))
+            or target.suffix == ".php"
+        ):
+            return HTTPStatus.NOT_FOUND, {}, b"Not found"
+        if target.is_dir():
+            if not path.endswith("/"):
+                return HTTPStatus.MOVED_PERMANENTLY, {"Location": path + "/"}, b""
+            target = target / "index.html"
+        try:
+            body = target.read_bytes()
+        except OSError:
+            return HTTPStatus.NOT_FOUND, {}, b"Not found"
+        content_type = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+        return HTTPStatus.OK, {"Content-Type": content_type}, body
+
+    async def dispatch(self, method: str, target: str, body: bytes) -> Response:
+        path = urlsplit(target).path or "/"
+        endpoint = path.rsplit("/", 1)[-1]
+        if endpoint in ("save_data.php", "complete_study.php") and method == "OPTIONS":
+            return HTTPStatus.OK, dict(CORS_HEADERS), b""
+        if endpoint == "save_data.php":
+            return await self.save_data(method, body)
+        if endpoint == "complete_study.php":
+            return await self.complete_study(method)
+        return await asyncio.to_thread(self.static, method, path)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections.add(writer)
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers: Dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length") or 0)
+                if "chunked" in headers.get("transfer-encoding", "").lower():
+                    status, extra, payload = HTTPStatus.LENGTH_REQUIRED, {}, b"Length required"
+                    keep_alive = False
+                elif length > MAX_BODY:
+                    status, extra, payload = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {}, b"Too large"
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    status, extra, payload = await self.dispatch(method.upper(), target, body)
+                    keep_alive = (
+                        version == "HTTP/1.1"
+                        and headers.get("connection", "").lower() != "close"
+                    )
+
+                head = [f"HTTP/1.1 {int(status)} {HTTPStatus(status).phrase}"]
+                head += [f"{k}: {v}" for k, v in extra.items()]
+                head.append(f"Content-Length: {len(payload)}")
+                head.append("Connection: keep-alive" if keep_alive else "Connection: close")
+                writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1"))
+                if method.upper() != "HEAD":
+                    writer.write(payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            self.connections.discard(writer)
+            writer.close()
+
+    # -- lifecycle -----------------------------------------------------------
+
+    async def serve(self, host: str, port: int) -> None:
+        self.uploads.open()
+        ingesting: Optional[asyncio.Task] = None
+        if self.store is not None:
+            self.ingest_queue = IngestQueue(
+                self.store, self.data_dir / "error_log.txt", self.batch_delay, self.batch_size
+            )
+            # Catch up on uploads saved while no server was ingesting them.
+            for path in sorted(self.data_dir.glob("user_*.csv")):
+                self.ingest_queue.put(path)
+            ingesting = asyncio.create_task(self.ingest_queue.run())
+
+        server = await asyncio.start_server(self.handle, host, port)
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop.set)
+            except (NotImplementedError, RuntimeError):
+                pass
+        print(
+            f"Serving {self.root} on http://{host}:{port}/ "
+            f"(uploads -> {self.data_dir}"
+            + (f", store -> {self.store})" if self.store is not None else ")")
+        )
+        await stop.wait()
+        server.close()
+        for writer in list(self.connections):
+            writer.close()
+        await server.wait_closed()
+        if ingesting is not None:
+            print("Finishing queued ingests...")
+            self.ingest_queue.close()
+            await ingesting
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Serve the experiment and save uploads like save_data.php, "
+        "ingesting them into an event store as they arrive.",
+    )
+    parser.add_argument(
+        "--root", default="dist",
+        help="Directory to serve; uploads go to <root>/data (default: dist).",
+    )
+    parser.add_argument("--host", default="localhost", help="Bind address (default: localhost).")
+    parser.add_argument("--port", default=8011, type=int, help="Port (default: 8011).")
+    parser.add_argument(
+        "--store", default=None,
+        help="Event store directory (default: <root>/event_store).",
+    )
+    parser.add_argument(
+        "--no-store", action="store_true",
+        help="Only save uploads; do not ingest them.",
+    )
+    parser.add_argument(
+        "--batch-delay", default=DEFAULT_BATCH_DELAY, type=float, metavar="S",
+        help=f"Seconds to gather uploads into one ingest batch (default: {DEFAULT_BATCH_DELAY:g}).",
+    )
+    parser.add_argument(
+        "--batch-size", default=DEFAULT_BATCH_SIZE, type=int, metavar="N",
+        help=f"Largest ingest batch (default: {DEFAULT_BATCH_SIZE}).",
+    )
+    parser.add_argument(
+        "--completion-url", default=None,
+        help="redirect_url for complete_study.php (default: read from complete_study.php).",
+    )
+    args = parser.parse_args()
+
+    try:
+        root = Path(args.root)
+        if not root.is_dir():
+            raise ValueError(f"{root} is not a directory. Run 'npm run build' first?")
+        store = None if args.no_store else Path(args.store or root / "event_store")
+        server = IngestServer(
+            root, store, args.completion_url, args.batch_delay, args.batch_size
+        )
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+
+if __name__ == "__main__":
+    main()
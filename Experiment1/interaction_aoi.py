@@ -0,0 +1,405 @@
+#!/usr/bin/env python3
+"""Area-of-interest (AOI) hit analysis of interaction traces.
+
+AOIs are rectangles or polygons over the experiment screen, defined once
+per screenshot in a JSON file::
+
+    {
+      "reference": [3024, 1902],
+      "aois": [
+        {"name": "plot_area", "rect": [1051, 181, 2074, 824]},
+        {"name": "city_a", "polygon": [[1569, 575], [2074, 507], ...]},
+        {"name": "pi_band", "rect": [...], "conditions": ["condition_2_pi"]}
+      ]
+    }
+
+Coordinates are pixels of a ``reference`` image (typically the screenshot
+they were drawn on) or, without it, fractions of the screen.  Logged points
+are mapped the same way the overlays of recover_interaction_log.py are --
+``x / screen_width``, ``y / screen_height`` -- so one definition serves
+every participant's resolution.  An AOI with ``conditions`` only applies to
+sessions of those conditions.
+
+Every point is looked up in a uniform grid over the screen; only points in
+cells an AOI's bounding box touches are tested exactly, with vectorized
+point-in-polygon tests.  Per (participant, phase) session and AOI the
+result has:
+
+    hits                 points inside the AOI
+    entries              runs of consecutive points inside it
+    dwell_ms             gaps following those points, as dwell_ms in
+                         interaction_features.py (not after chart_leave)
+    first_entry_ms       timestamp of the first point inside it
+
+and, between AOIs, transition counts.  Overlapping AOIs each count their
+own hits; for transitions a point belongs to the first AOI that lists it.
+
+Usage:
+    python interaction_aoi.py data/ --aoi aoi_image10.json -o aoi_stats.csv
+    python interaction_aoi.py event_store/ --aoi aois.json --transitions aoi_transitions.csv
+"""
+
+import argparse
+import json
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from interaction_features import META_COLUMNS, SessionBatch, collect, features_frame
+from recover_interaction_log import expand_inputs
+
+DEFAULT_GRID = 64
+# Same fallback as the renderers when a row has no screen size.
+DEFAULT_RESOLUTION = (1920, 1080)
+
+
+# ---------------------------------------------------------------------------
+# AOI definitions
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class AOI:
+    """One area of interest in screen-fraction coordinates.
+
+    ``vertices`` is an ``(n, 2)`` array; rectangles are stored as their four
+    corners with ``is_rect`` set so they skip the polygon test.
+    ``conditions`` of None means every condition.
+    """
+
+    name: str
+    vertices: np.ndarray
+    is_rect: bool = False
+    conditions: Optional[Tuple[str, ...]] = None
+
+    @property
+    def bbox(self) -> Tuple[float, float, float, float]:
+        """``(left, top, right, bottom)``."""
+        (left, top), (right, bottom) = self.vertices.min(axis=0), self.vertices.max(axis=0)
+        return float(left), float(top), float(right), float(bottom)
+
+    def applies_to(self, condition_id: Optional[str]) -> bool:
+        return self.conditions is None or condition_id in self.conditions
+
+    def contains(self, u: np.ndarray, v: np.ndarray) -> np.ndarray:
+        """Boolean mask of the points ``(u, v)`` inside the AOI."""
+        left, top, right, bottom = self.bbox
+        inside = (u >= left) & (u <= right) & (v >= top) & (v <= bottom)
+        if self.is_rect:
+            return inside
+        # Crossing number, one vectorized pass per edge.
+        crossings = np.zeros(len(u), dtype=bool)
+        xs, ys = self.vertices[:, 0], self.vertices[:, 1]
+        for x0, y0, x1, y1 in zip(xs, ys, np.roll(xs, -1), np.roll(ys, -1)):
+            spans = (y0 > v) != (y1 > v)
+            if not spans.any():
+                continue
+            with np.errstate(divide="ignore", invalid="ignore"):
+                x_cross = x0 + (v - y0) * (x1 - x0) / (y1 - y0)
+            crossings ^= spans & (u < x_cross)
+        return inside & crossings
+
+
+def parse_aois(spec: Dict[str, Any]) -> List[AOI]:
+    """AOIs from a decoded definition (see the module docstring)."""
+    reference = spec.get("reference")
+    if reference is None:
+        ref_w = ref_h = 1.0
+    else:
+        ref_w, ref_h = (float(v) for v in reference)
+        if ref_w <= 0 or ref_h <= 0:
+            raise ValueError(f"Invalid reference size {reference!r}.")
+
+    aois: List[AOI] = []
+    for i, entry in enumerate(spec.get("aois", [])):
+        name = entry.get("name") or f"aoi_{i}"
+        if "rect" in entry:
+            left, top, right, bottom = (float(v) for v in entry["rect"])
+            if right < left or bottom < top:
+                raise ValueError(f"AOI '{name}': rect must be [left, top, right, bottom].")
+            corners = [(left, top), (right, top), (right, bottom), (left, bottom)]
+            is_rect = True
+        elif "polygon" in entry:
+            corners = [(float(x), float(y)) for x, y in entry["polygon"]]
+            if len(corners) < 3:
+                raise ValueError(f"AOI '{name}': a polygon needs at least 3 vertices.")
+            is_rect = False
+        else:
+            raise ValueError(f"AOI '{name}' needs a 'rect' or a 'polygon'.")
+        conditions = entry.get("conditions")
+        aois.append(AOI(
+            name=name,
+            vertices=np.array(corners, dtype=np.float64) / (ref_w, ref_h),
+            is_rect=is_rect,
+            conditions=None if conditions is None else tuple(str(c) for c in conditions),
+        ))
+    names = [a.name for a in aois]
+    if len(set(names)) != len(names):
+        raise ValueError("AOI names must be unique.")
+    if not aois:
+        raise ValueError("No AOIs defined.")
+    return aois
+
+
+def load_aois(path: Path) -> List[AOI]:
+    """Read an AOI definition file."""
+    with open(path, "r", encoding="utf-8") as f:
+        return parse_aois(json.load(f))
+
+
+# ---------------------------------------------------------------------------
+# Hit testing
+# ---------------------------------------------------------------------------
+
+def normalized_positions(batch: SessionBatch) -> Tuple[np.ndarray, np.ndarray]:
+    """Every point of ``batch`` as fractions of its session's screen size."""
+    _, x, y, _, offsets = batch.columns()
+    sizes = np.array([
+        (m["screen_width"], m["screen_height"])
+        if m["screen_width"] and m["screen_height"] else DEFAULT_RESOLUTION
+        for m in batch.meta
+    ], dtype=np.float64).reshape(-1, 2)
+    lengths = np.diff(offsets)
+    return x / np.repeat(sizes[:, 0], lengths), y / np.repeat(sizes[:, 1], lengths)
+
+
+class GridIndex:
+    """Points bucketed into a ``size`` x ``size`` grid over the unit square.
+
+    Points off the screen land in the border cells.  ``order`` lists point
+    indices grouped by cell; cell ``c`` holds ``order[starts[c]:starts[c + 1]]``.
+    """
+
+    def __init__(self, u: np.ndarray, v: np.ndarray, size: int = DEFAULT_GRID) -> None:
+        self.size = size
+        cells = self._cell(v) * size + self._cell(u)
+        self.order = np.argsort(cells, kind="stable")
+        self.starts = np.zeros(size * size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=size * size), out=self.starts[1:])
+
+    def _cell(self, values: np.ndarray) -> np.ndarray:
+        return np.clip(np.floor(values * self.size), 0, self.size - 1).astype(np.int64)
+
+    def query(self, bbox: Tuple[float, float, float, float]) -> np.ndarray:
+        """Indices of the points in every cell ``bbox`` touches."""
+        left, top, right, bottom = bbox
+        col0, col1 = self._cell(np.array([left, right]))
+        row0, row1 = self._cell(np.array([top, bottom]))
+        cells = (np.arange(row0, row1 + 1)[:, None] * self.size + np.arange(col0, col1 + 1)).ravel()
+        lo, hi = self.starts[cells], self.starts[cells + 1]
+        counts = hi - lo
+        if not counts.sum():
+            return np.zeros(0, dtype=np.int64)
+        # Concatenate the ranges [lo, hi) without a Python loop.
+        firsts = np.repeat(lo - np.cumsum(counts) + counts, counts)
+        return self.order[firsts + np.arange(counts.sum())]
+
+
+def assign_aois(
+    batch: SessionBatch,
+    aois: Sequence[AOI],
+    grid_size: int = DEFAULT_GRID,
+) -> np.ndarray:
+    """``(n_points, n_aois)`` boolean matrix of AOI membership.
+
+    Points of sessions whose condition an AOI does not apply to are never
+    inside it.
+    """
+    u, v = normalized_positions(batch)
+    _, _, _, _, offsets = batch.columns()
+    hits = np.zeros((len(u), len(aois)), dtype=bool)
+    if not len(u):
+        return hits
+    index = GridIndex(u, v, grid_size)
+    session = np.repeat(np.arange(len(batch)), np.diff(offsets))
+    for a, aoi in enumerate(aois):
+        candidates = index.query(aoi.bbox)
+        if aoi.conditions is not None:
+            applies = np.array([aoi.applies_to(m["condition_id"]) for m in batch.meta])
+            candidates = candidates[applies[session[candidates]]]
+        hits[candidates[aoi.contains(u[candidates], v[candidates])], a] = True
+    return hits
+
+
+# ---------------------------------------------------------------------------
+# Statistics
+# ---------------------------------------------------------------------------
+
+def aoi_stats(
+    batch: SessionBatch,
+    aois: Sequence[AOI],
+    hits: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Per (session, applicable AOI) hit, entry and dwell statistics, as columns."""
+    ts, _, _, codes, offsets = batch.columns()
+    n, n_aois = len(batch), len(aois)
+    session = np.repeat(np.arange(n), np.diff(offsets))
+    leave = codes == batch.type_names.index("chart_leave")
+
+    # Gap after each point, within its session and unless it left the chart.
+    gap = np.zeros(len(ts))
+    same = session[1:] == session[:-1]
+    gap[:-1] = np.where(same & ~leave[:-1], np.diff(ts), 0.0)
+    # A point starts a run unless the previous point was in the same AOI.
+    continues = np.zeros_like(hits)
+    continues[1:] = hits[:-1] & (same & ~leave[:-1])[:, None]
+    entry = hits & ~continues
+
+    point, aoi = np.nonzero(hits)
+    cell = session[point] * n_aois + aoi
+    hit_count = np.bincount(cell, minlength=n * n_aois)
+    dwell = np.bincount(cell, weights=gap[point], minlength=n * n_aois)
+    entry_point, entry_aoi = np.nonzero(entry)
+    entries = np.bincount(session[entry_point] * n_aois + entry_aoi, minlength=n * n_aois)
+    first = np.full(n * n_aois, np.nan)
+    np.fmin.at(first, session[entry_point] * n_aois + entry_aoi, ts[entry_point])
+
+    applies = np.array([
+        [a.applies_to(m["condition_id"]) for a in aois] for m in batch.meta
+    ], dtype=bool).reshape(n, n_aois).ravel()
+    rows = np.flatnonzero(applies)
+    stats: Dict[str, np.ndarray] = {
+        k: np.array([m[k] for m in batch.meta], dtype=object)[rows // n_aois]
+        for k in META_COLUMNS
+    }
+    stats.update({
+        "aoi": np.array([a.name for a in aois], dtype=object)[rows % n_aois],
+        "hits": hit_count[rows],
+        "entries": entries[rows],
+        "dwell_ms": dwell[rows],
+        "first_entry_ms": first[rows],
+    })
+    return stats
+
+
+def aoi_transitions(
+    batch: SessionBatch,
+    aois: Sequence[AOI],
+    hits: np.ndarray,
+) -> Dict[str, np.ndarray]:
+    """Counts of moves from one AOI to another per session, as columns.
+
+    Each point belongs to the first AOI containing it; points outside every
+    AOI are skipped, so leaving ``a`` and later landing in ``b`` counts as
+    one ``a -> b`` transition.
+    """
+    _, _, _, _, offsets = batch.columns()
+    n, n_aois = len(batch), len(aois)
+    session = np.repeat(np.arange(n), np.diff(offsets))
+    located = np.flatnonzero(hits.any(axis=1))
+    primary = hits[located].argmax(axis=1)
+    where = session[located]
+    moves = (where[1:] == where[:-1]) & (primary[1:] != primary[:-1])
+    key = (where[1:][moves] * n_aois + primary[:-1][moves]) * n_aois + primary[1:][moves]
+    keys, counts = np.unique(key, return_counts=True)
+
+    sess, pair = np.divmod(keys, n_aois * n_aois)
+    names = np.array([a.name for a in aois], dtype=object)
+    transitions: Dict[str, np.ndarray] = {
+        k: np.array([m[k] for m in batch.meta], dtype=object)[sess] for k in META_COLUMNS
+    }
+    transitions.update({
+        "from_aoi": names[pair // n_aois],
+        "to_aoi": names[pair % n_aois],
+        "count": counts,
+    })
+    return transitions
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _write_table(columns: Dict[str, np.ndarray], path: Path) -> int:
+    df = features_frame(columns)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if path.suffix.lower() == ".parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return len(df)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Per-session AOI dwell time, entries and transitions from "
+        "participant CSVs or an event store.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+",
+        help="CSV files, directories (all user_*.csv inside), quoted globs, or an "
+             "event store directory built by interaction_store.py.",
+    )
+    parser.add_argument(
+        "--aoi", required=True, metavar="JSON",
+        help="AOI definition file (see the module docstring).",
+    )
+    parser.add_argument(
+        "-o", "--output", default="aoi_stats.csv",
+        help="Per-session AOI table; .parquet is written as Parquet, anything else "
+             "as CSV (default: aoi_stats.csv).",
+    )
+    parser.add_argument(
+        "--transitions", default=None, metavar="PATH",
+        help="Also write AOI-to-AOI transition counts to this table.",
+    )
+    parser.add_argument(
+        "--grid", default=DEFAULT_GRID, type=int, metavar="N",
+        help=f"Cells per side of the spatial index (default: {DEFAULT_GRID}).",
+    )
+    parser.add_argument(
+        "-j", "--jobs", default=None, type=int, metavar="N",
+        help="Number of worker processes for CSV inputs (default: CPU count).",
+    )
+    args = parser.parse_args()
+
+    try:
+        started = time.perf_counter()
+        aois = load_aois(Path(args.aoi))
+        batch = SessionBatch()
+        errors: List[Tuple[Path, str]] = []
+        csvs: List[Path] = []
+        from interaction_store import EventStore, is_store
+
+        for pattern in args.inputs:
+            path = Path(pattern)
+            if is_store(path):
+                batch.add_store(EventStore(path))
+            elif path.is_file():
+                csvs.append(path)
+            else:
+                csvs.extend(expand_inputs(pattern))
+        if csvs:
+            loaded, errors = collect(csvs, args.jobs)
+            batch.merge(loaded)
+        for path, error in errors:
+            print(f"  FAILED {path.name}: {error}")
+        if not len(batch):
+            raise ValueError("No sessions found in the given inputs.")
+
+        loaded_at = time.perf_counter()
+        hits = assign_aois(batch, aois, args.grid)
+        rows = _write_table(aoi_stats(batch, aois, hits), Path(args.output))
+        print(
+            f"{len(batch)} session(s), {len(hits)} point(s), {len(aois)} AOI(s) -> "
+            f"{rows} row(s) in {args.output}"
+        )
+        if args.transitions:
+            rows = _write_table(aoi_transitions(batch, aois, hits), Path(args.transitions))
+            print(f"{rows} transition row(s) -> {args.transitions}")
+        print(
+            f"loaded in {loaded_at - started:.1f}s, "
+            f"analysed in {time.perf_counter() - loaded_at:.1f}s"
+        )
+        if errors:
+            sys.exit(1)
+
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""Per-session interaction features computed from the extracted points.
+
+Turns each prediction row's ``interaction_log`` -- one session per
+(participant_id, phase) -- into a handful of behavioural covariates:
+
+    n_events, n_hover, n_clicks, n_enter, n_leave
+    enter_leave_cycles      chart_leave events that close a chart_enter
+    duration_ms             first to last logged event
+    dwell_ms                time the pointer spent inside the chart
+    path_length_px          distance travelled by the pointer
+    mean_velocity_px_s      path length over moving (non-pause) time
+    peak_velocity_px_s      fastest moving step inside the chart
+    pause_count, pause_ms   gaps of at least ``pause_ms`` inside the chart
+    time_to_first_hover_ms  timestamp of the first chart_hover
+
+Timestamps are the tracker's, in ms since the trial started, and distances
+are in logged screen pixels.  Sessions are concatenated into flat arrays and
+every feature is computed in one vectorized pass over all of them, so
+thousands of sessions take seconds.  The result is a tidy DataFrame with one
+row per session, joinable on ``participant_id`` and ``phase``.
+
+Usage:
+    python interaction_features.py data/ -o interaction_features.csv
+    python interaction_features.py event_store/ -o features.csv --pause-ms 750
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from recover_interaction_log import (
+    EVENT_TYPES,
+    InteractionPoints,
+    expand_inputs,
+    extract_points,
+    iter_from_csv,
+)
+
+DEFAULT_PAUSE_MS = 500.0
+# Steps shorter than this are timestamp jitter; they are left out of the
+# peak velocity.
+MIN_STEP_MS = 4.0
+
+META_COLUMNS = (
+    "participant_id", "condition_id", "phase", "source", "screen_width", "screen_height",
+)
+
+
+# ---------------------------------------------------------------------------
+# Sessions
+# ---------------------------------------------------------------------------
+
+class SessionBatch:
+    """Many sessions' points concatenated into flat columns.
+
+    Session ``i`` occupies ``[offsets[i], offsets[i + 1])`` of ``ts``, ``x``,
+    ``y`` and ``codes``; codes index the batch-wide ``type_names`` (which
+    start with ``EVENT_TYPES``).  ``meta`` holds one dict per session with
+    the ``META_COLUMNS``.
+    """
+
+    def __init__(self) -> None:
+        self.type_names: List[str] = list(EVENT_TYPES)
+        self.meta: List[Dict[str, Any]] = []
+        self._ts: List[np.ndarray] = []
+        self._x: List[np.ndarray] = []
+        self._y: List[np.ndarray] = []
+        self._codes: List[np.ndarray] = []
+        self._columns: Optional[Tuple[np.ndarray, ...]] = None
+
+    def __len__(self) -> int:
+        return len(self.meta)
+
+    def _code(self, event_type: str) -> int:
+        if event_type not in self.type_names:
+            self.type_names.append(event_type)
+        return self.type_names.index(event_type)
+
+    def add_points(self, points: InteractionPoints, **meta: Any) -> None:
+        """Append one session; ``meta`` fills the ``META_COLUMNS``."""
+        lut = np.array([self._code(t) for t in points.type_names], dtype=np.int16)
+        self._ts.append(np.asarray(points.ts, dtype=np.float64))
+        self._x.append(np.asarray(points.x, dtype=np.float64))
+        self._y.append(np.asarray(points.y, dtype=np.float64))
+        self._codes.append(lut[points.codes] if len(lut) else np.zeros(0, dtype=np.int16))
+        self.meta.append({k: meta.get(k) for k in META_COLUMNS})
+        self._columns = None
+
+    def add_csv(self, csv_path: Path) -> int:
+        """Append every prediction row of one participant CSV; returns the count."""
+        csv_path = Path(csv_path)
+        added = 0
+        for row_info in iter_from_csv(csv_path, selective=True):
+            points = extract_points(row_info.pop("events"))
+            self.add_points(points, source=csv_path.stem, **row_info)
+            added += 1
+        return added
+
+    def add_store(self, store: Any, **filters: Any) -> int:
+        """Append the segments of an ``interaction_store.EventStore``."""
+        segments = store.segments(**filters)
+        for seg in segments:
+            self.add_points(store.points(seg), **seg)
+        return len(segments)
+
+    def merge(self, other: "SessionBatch") -> "SessionBatch":
+        """Append ``other``'s sessions (in place), remapping its type codes."""
+        lut = np.array([self._code(t) for t in other.type_names], dtype=np.int16)
+        ts, x, y, codes, offsets = other.columns()
+        for i in range(len(other)):
+            window = slice(offsets[i], offsets[i + 1])
+            self._ts.append(ts[window])
+            self._x.append(x[window])
+            self._y.append(y[window])
+            self._codes.append(lut[codes[window]])
+        self.meta.extend(other.meta)
+        self._columns = None
+        return self
+
+    def columns(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """``(ts, x, y, codes, offsets)`` over all sessions (cached)."""
+        if self._columns is None:
+            lengths = np.array([len(t) for t in self._ts], dtype=np.int64)
+            offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=offsets[1:])
+
+            def cat(parts: List[np.ndarray], dtype: Any) -> np.ndarray:
+                return np.concatenate(parts).astype(dtype, copy=False) if parts else np.zeros(0, dtype)
+
+            self._columns = (
+                cat(self._ts, np.float64), cat(self._x, np.float64),
+                cat(self._y, np.float64), cat(self._codes, np.int16), offsets,
+            )
+            # Keep one copy only: sessions become views of the flat columns.
+            ts, x, y, codes, _ = self._columns
+            self._ts = [ts[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+            self._x = [x[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+            self._y = [y[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+            self._codes = [codes[a:b] for a, b in zip(offsets[:-1], offsets[1:])]
+        return self._columns
+
+
+# ---------------------------------------------------------------------------
+# Features
+# ---------------------------------------------------------------------------
+
+def compute_features(
+    batch: SessionBatch,
+    pause_ms: float = DEFAULT_PAUSE_MS,
+) -> Dict[str, np.ndarray]:
+    """All features for every session of ``batch``, as equal-length columns.
+
+    The pointer counts as inside the chart after any event other than
+    ``chart_leave``; the gaps following such events make up ``dwell_ms``,
+    and those of at least ``pause_ms`` are pauses.  Path length covers the
+    inside gaps, and moving time and peak velocity the inside gaps minus
+    the pauses, so time off the chart and the jump from a leave to the next
+    enter never count as movement.  Velocities are per step between
+    consecutive events of a session.
+    """
+    ts, x, y, codes, offsets = batch.columns()
+    n = len(batch)
+    lengths = np.diff(offsets)
+    session = np.repeat(np.arange(n), lengths)
+
+    def count(mask: np.ndarray) -> np.ndarray:
+        return np.bincount(session[mask], minlength=n)
+
+    def total(weights: np.ndarray, where: np.ndarray) -> np.ndarray:
+        return np.bincount(step_session[where], weights=weights[where], minlength=n)
+
+    hover = codes == batch.type_names.index("chart_hover")
+    click = codes == batch.type_names.index("chart_click")
+    enter = codes == batch.type_names.index("chart_enter")
+    leave = codes == batch.type_names.index("chart_leave")
+
+    # Steps between consecutive events of the same session.
+    step_session = session[:-1]
+    same = session[1:] == session[:-1]
+    dt = np.diff(ts)
+    dist = np.hypot(np.diff(x), np.diff(y))
+    inside = same & ~leave[:-1]
+    pause = inside & (dt >= pause_ms)
+    moving = inside & (dt > 0) & ~pause
+
+    path_length = total(dist, inside)
+    moving_ms = total(dt, moving)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_velocity = np.where(moving_ms > 0, path_length / moving_ms * 1000.0, np.nan)
+        speed = dist / dt * 1000.0
+    peak_velocity = np.full(n, np.nan)
+    fast = moving & (dt >= MIN_STEP_MS)
+    if fast.any():
+        np.fmax.at(peak_velocity, step_session[fast], speed[fast])
+
+    # A leave closes a cycle when the previous enter/leave event of the same
+    # session was an enter.
+    boundary = np.flatnonzero(enter | leave)
+    closes = (
+        leave[boundary[1:]]
+        & enter[boundary[:-1]]
+        & (session[boundary[1:]] == session[boundary[:-1]])
+    )
+    cycles = np.bincount(session[boundary[1:]][closes], minlength=n)
+
+    first_hover = np.full(n, np.nan)
+    if hover.any():
+        np.fmin.at(first_hover, session[hover], ts[hover])
+
+    nonempty = lengths > 0
+    duration = np.zeros(n)
+    duration[nonempty] = ts[offsets[1:][nonempty] - 1] - ts[offsets[:-1][nonempty]]
+
+    features: Dict[str, np.ndarray] = {
+        k: np.array([m[k] for m in batch.meta], dtype=object) for k in META_COLUMNS
+    }
+    features.update({
+        "n_events": lengths,
+        "n_hover": count(hover),
+        "n_clicks": count(click),
+        "n_enter": count(enter),
+        "n_leave": count(leave),
+        "enter_leave_cycles": cycles,
+        "duration_ms": duration,
+        "dwell_ms": total(dt, inside),
+        "path_length_px": path_length,
+        "mean_velocity_px_s": mean_velocity,
+        "peak_velocity_px_s": peak_velocity,
+        "pause_count": np.bincount(step_session[pause], minlength=n),
+        "pause_ms": total(dt, pause),
+        "time_to_first_hover_ms": first_hover,
+    })
+    return features
+
+
+def features_frame(features: Dict[str, np.ndarray]) -> Any:
+    """Tidy ``pandas.DataFrame`` of :func:`compute_features` output."""
+    try:
+        import pandas as pd
+    except ImportError as exc:
+        raise RuntimeError(
+            "pandas is required. Install it with: pip install pandas"
+        ) from exc
+
+    df = pd.DataFrame(features)
+    df["phase"] = pd.array(
+        [None if p is None else int(p) for p in df["phase"]], dtype="Int64"
+    )
+    for col in ("screen_width", "screen_height"):
+        df[col] = pd.array([None if v is None else int(v) for v in df[col]], dtype="Int64")
+    for col in ("participant_id", "condition_id", "source"):
+        df[col] = df[col].astype("string")
+    return df
+
+
+# ---------------------------------------------------------------------------
+# Parallel loading
+# ---------------------------------------------------------------------------
+
+def _collect_files(paths: List[Path]) -> Tuple[SessionBatch, List[Tuple[Path, str]]]:
+    """Process-pool worker: load a chunk of CSVs, never raising."""
+    batch = SessionBatch()
+    errors: List[Tuple[Path, str]] = []
+    for path in paths:
+        try:
+            batch.add_csv(path)
+        except Exception as exc:
+            errors.append((path, f"{type(exc).__name__}: {exc}"))
+    return batch, errors
+
+
+def collect(
+    inputs: Iterable[Path],
+    jobs: Optional[int] = None,
+) -> Tuple[SessionBatch, List[Tuple[Path, str]]]:
+    """Load every CSV in ``inputs`` into one :class:`SessionBatch`.
+
+    Files are split into one contiguous chunk per worker and the partial
+    batches merged in input order, so sessions come back in input order
+    (the order of an event store built from the same files).  Returns the
+    batch and per-file errors.
+    """
+    todo = [Path(p) for p in inputs]
+    jobs = min(jobs or os.cpu_count() or 1, max(len(todo), 1))
+    size = -(-len(todo) // jobs)
+    chunks = [todo[i:i + size] for i in range(0, len(todo), size)] or [[]]
+
+    if jobs == 1:
+        partials = [_collect_files(todo)]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            partials = list(pool.map(_collect_files, chunks))
+    batch = SessionBatch()
+    errors: List[Tuple[Path, str]] = []
+    for partial, chunk_errors in partials:
+        batch.merge(partial)
+        errors.extend(chunk_errors)
+    return batch, errors
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compute per-session interaction features from participant CSVs "
+        "or an event store.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+",
+        help="CSV files, directories (all user_*.csv inside), quoted globs, or an "
+             "event store directory built by interaction_store.py.",
+    )
+    parser.add_argument(
+        "-o", "--output", default="interaction_features.csv",
+        help="Output table; .parquet is written as Parquet, anything else as CSV "
+             "(default: interaction_features.csv).",
+    )
+    parser.add_argument(
+        "--pause-ms", default=DEFAULT_PAUSE_MS, type=float, metavar="MS",
+        help=f"Minimum gap counted as a pause (default: {DEFAULT_PAUSE_MS:g}).",
+    )
+    parser.add_argument(
+        "-j", "--jobs", default=None, type=int, metavar="N",
+        help="Number of worker processes for CSV inputs (default: CPU count).",
+    )
+    args = parser.parse_args()
+
+    try:
+        started = time.perf_counter()
+        batch = SessionBatch()
+        errors: List[Tuple[Path, str]] = []
+        csvs: List[Path] = []
+        from interaction_store import EventStore, is_store
+
+        for pattern in args.inputs:
+            path = Path(pattern)
+            if is_store(path):
+                batch.add_store(EventStore(path))
+            elif path.is_file():
+                csvs.append(path)
+            else:
+                csvs.extend(expand_inputs(pattern))
+        if csvs:
+            loaded, errors = collect(csvs, args.jobs)
+            batch.merge(loaded)
+        for path, error in errors:
+            print(f"  FAILED {path.name}: {error}")
+        if not len(batch):
+            raise ValueError("No sessions found in the given inputs.")
+
+        df = features_frame(compute_features(batch, args.pause_ms))
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        if out.suffix.lower() == ".parquet":
+            df.to_parquet(out, index=False)
+        else:
+            df.to_csv(out, index=False)
+        print(
+            f"{len(df)} session(s), {int(df['n_events'].sum())} event(s) -> {out} "
+            f"in {time.perf_counter() - started:.1f}s"
+        )
+        if errors:
+            sys.exit(1)
+
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+"""Aggregate hover/click positions into per-condition density heatmaps.
+
+Builds on the recover_interaction_log pipeline (``iter_from_csv`` ->
+``extract_points``): every participant CSV is streamed row by row and its
+points are binned into fixed-size 2D histograms, one per
+(condition_id, phase, event type).  Coordinates are normalised by each row's
+``screen_width`` / ``screen_height`` so sessions recorded at different
+resolutions land on a common grid.
+
+Memory is O(grid) regardless of how many sessions are added.  Accumulators
+can be saved to ``.npz``, reloaded and extended with new files (already
+counted files, keyed by resolved path, are skipped), and merged, which is
+how parallel workers combine their partial results.  A file is only
+counted once all of its rows were binned, so a file that fails partway
+leaves the accumulator untouched.
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from recover_interaction_log import (
+    InteractionPoints,
+    NoInteractionRows,
+    expand_inputs,
+    extract_points,
+    iter_from_csv,
+    load_screenshot,
+)
+
+HeatmapKey = Tuple[str, int, str]   # (condition_id, phase, event type)
+
+DEFAULT_BINS: Tuple[int, int] = (192, 108)
+DEFAULT_RESOLUTION: Tuple[int, int] = (1920, 1080)
+
+
+def file_key(path: Path) -> str:
+    """Key under which a counted file is recorded: its resolved path."""
+    return str(Path(path).resolve())
+
+
+# ---------------------------------------------------------------------------
+# Accumulator
+# ---------------------------------------------------------------------------
+
+class HeatmapAccumulator:
+    """Fixed-size 2D count grids keyed by (condition_id, phase, event type).
+
+    Grids have shape ``(bins_y, bins_x)`` and cover the unit square of
+    normalised screen coordinates; points outside the recorded screen are
+    dropped.
+    """
+
+    def __init__(self, bins: Tuple[int, int] = DEFAULT_BINS) -> None:
+        self.bins = (int(bins[0]), int(bins[1]))
+        self.grids: Dict[HeatmapKey, np.ndarray] = {}
+        self.files: Set[str] = set()
+        self.sessions = 0
+
+    def counted(self, path: Path) -> bool:
+        """Whether ``path`` (by resolved path) was already added."""
+        return file_key(path) in self.files
+
+    def _grid(self, key: HeatmapKey) -> np.ndarray:
+        grid = self.grids.get(key)
+        if grid is None:
+            bins_x, bins_y = self.bins
+            grid = self.grids[key] = np.zeros((bins_y, bins_x), dtype=np.int64)
+        return grid
+
+    def add_points(
+        self,
+        condition_id: str,
+        phase: int,
+        points: InteractionPoints,
+        resolution: Optional[Tuple[int, int]] = None,
+    ) -> None:
+        """Bin one session's points into the grids for its condition/phase."""
+        if not len(points):
+            return
+        src_w, src_h = resolution or DEFAULT_RESOLUTION
+        bins_x, bins_y = self.bins
+
+        col = np.floor(points.x * (bins_x / src_w)).astype(np.int64)
+        row = np.floor(points.y * (bins_y / src_h)).astype(np.int64)
+        inside = (col >= 0) & (col < bins_x) & (row >= 0) & (row < bins_y)
+        flat = row[inside] * bins_x + col[inside]
+        codes = points.codes[inside]
+
+        for code in np.unique(codes):
+            key = (condition_id, phase, points.type_names[code])
+            grid = self._grid(key)
+            grid += np.bincount(flat[codes == code], minlength=grid.size).reshape(grid.shape)
+        self.sessions += 1
+
+    def add_csv(self, csv_path: Path) -> int:
+        """Stream one participant CSV into the accumulator.
+
+        Returns the number of rows added; a file already counted is skipped
+        and contributes 0, as does one without interaction rows (which is
+        still recorded as counted).  Rows are binned into a scratch
+        accumulator that is merged in only once the whole file was read.
+        """
+        csv_path = Path(csv_path)
+        if self.counted(csv_path):
+            return 0
+        scratch = HeatmapAccumulator(self.bins)
+        added = 0
+        try:
+            for row_info in iter_from_csv(csv_path, selective=True):
+                points = extract_points(row_info.pop("events"))
+                res = None
+                if row_info["screen_width"] and row_info["screen_height"]:
+                    res = (row_info["screen_width"], row_info["screen_height"])
+                scratch.add_points(
+                    row_info["condition_id"] or "unknown",
+                    row_info["phase"] or 0,
+                    points,
+                    res,
+                )
+                added += 1
+        except NoInteractionRows:
+            pass
+        scratch.files.add(file_key(csv_path))
+        self.merge(scratch)
+        return added
+
+    def merge(self, other: "HeatmapAccumulator") -> "HeatmapAccumulator":
+        """Add ``other``'s counts into this accumulator (in place)."""
+        if other.bins != self.bins:
+            raise ValueError(
+                f"Cannot merge heatmaps with different grids: {self.bins} vs {other.bins}"
+            )
+        overlap = self.files & other.files
+        if overlap:
+            raise ValueError(
+                f"Cannot merge heatmaps that both counted {len(overlap)} file(s), "
+                f"e.g. {sorted(overlap)[0]}"
+            )
+        for key, grid in other.grids.items():
+            self._grid(key)[...] += grid
+        self.files |= other.files
+        self.sessions += other.sessions
+        return self
+
+    def keys(self) -> List[HeatmapKey]:
+        return sorted(self.grids)
+
+    # -- persistence --------------------------------------------------------
+
+    def save(self, path: Path) -> None:
+        """Write the accumulator to a compressed ``.npz`` file."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        keys = self.keys()
+        np.savez_compressed(
+            path,
+            bins=np.array(self.bins),
+            conditions=np.array([k[0] for k in keys], dtype=str),
+            phases=np.array([k[1] for k in keys], dtype=np.int64),
+            types=np.array([k[2] for k in keys], dtype=str),
+            grids=(
+                np.stack([self.grids[k] for k in keys])
+                if keys else np.zeros((0, self.bins[1], self.bins[0]), dtype=np.int64)
+            ),
+            files=np.array(sorted(self.files), dtype=str),
+            sessions=np.array(self.sessions),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "HeatmapAccumulator":
+        with np.load(path) as data:
+            acc = cls(tuple(int(b) for b in data["bins"]))
+            for cond, phase, etype, grid in zip(
+                data["conditions"], data["phases"], data["types"], data["grids"]
+            ):
+                acc.grids[(str(cond), int(phase), str(etype))] = grid.astype(np.int64)
+            acc.files = {str(f) for f in data["files"]}
+            acc.sessions = int(data["sessions"])
+        return acc
+
+
+# ---------------------------------------------------------------------------
+# Parallel accumulation
+# ---------------------------------------------------------------------------
+
+def _accumulate_files(
+    paths: List[Path],
+    bins: Tuple[int, int],
+) -> Tuple[HeatmapAccumulator, List[Tuple[Path, str]]]:
+    """Process-pool worker: accumulate a chunk of files, never raising."""
+    acc = HeatmapAccumulator(bins)
+    errors: List[Tuple[Path, str]] = []
+    for path in paths:
+        try:
+            acc.add_csv(path)
+        except Exception as exc:
+            errors.append((path, f"{type(exc).__name__}: {exc}"))
+    return acc, errors
+
+
+def accumulate(
+    inputs: Iterable[Path],
+    acc: Optional[HeatmapAccumulator] = None,
+    bins: Tuple[int, int] = DEFAULT_BINS,
+    jobs: Optional[int] = None,
+) -> Tuple[HeatmapAccumulator, List[Tuple[Path, str]]]:
+    """Add every CSV in ``inputs`` to ``acc`` (a new accumulator if None).
+
+    Files are split into one chunk per worker; each worker returns a partial
+    accumulator that is merged into the result.  Files already counted in
+    ``acc`` are skipped.  Returns the accumulator and per-file errors.
+    """
+    acc = acc if acc is not None else HeatmapAccumulator(bins)
+    # One entry per file, even if it was given more than once.
+    unique = {file_key(p): Path(p) for p in inputs}
+    todo = [p for p in unique.values() if not acc.counted(p)]
+    jobs = min(jobs or os.cpu_count() or 1, max(len(todo), 1))
+    chunks = [todo[i::jobs] for i in range(jobs)]
+
+    errors: List[Tuple[Path, str]] = []
+    if jobs == 1:
+        partials = [_accumulate_files(todo, acc.bins)]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_accumulate_files, chunk, acc.bins) for chunk in chunks]
+            partials = [f.result() for f in as_completed(futures)]
+    for partial, chunk_errors in partials:
+        acc.merge(partial)
+        errors.extend(chunk_errors)
+    return acc, errors
+
+
+# ---------------------------------------------------------------------------
+# Plotting
+# ---------------------------------------------------------------------------
+
+def plot_heatmap(
+    grid: np.ndarray,
+    output_path: Path,
+    title: Optional[str] = None,
+    screenshot_path: Optional[Path] = None,
+) -> None:
+    """Render one accumulated grid, optionally over a screenshot."""
+    try:
+        import matplotlib.pyplot as plt
+    except ImportError as exc:
+        raise RuntimeError(
+            "matplotlib is required. Install it with: pip install matplotlib"
+        ) from exc
+
+    # Log scale keeps sparse areas visible next to dwell hot spots.
+    density = np.log1p(grid.astype(np.float64))
+    masked = np.ma.masked_where(grid == 0, density)
+
+    if screenshot_path is not None:
+        img = load_screenshot(screenshot_path)
+        img_h, img_w = img.shape[:2]
+        dpi = 100
+        fig, ax = plt.subplots(figsize=(img_w / dpi, img_h / dpi), dpi=dpi)
+        ax.imshow(img, extent=[0, img_w, img_h, 0], aspect="auto")
+        ax.imshow(masked, extent=[0, img_w, img_h, 0], aspect="auto",
+                  cmap="inferno", alpha=0.6, interpolation="bilinear")
+        ax.set_xlim(0, img_w)
+        ax.set_ylim(img_h, 0)
+        ax.axis("off")
+    else:
+        fig, ax = plt.subplots(figsize=(9, 6))
+        im = ax.imshow(masked, extent=[0, 1, 1, 0], aspect="auto",
+                       cmap="inferno", interpolation="nearest")
+        ax.set_xlabel("x / screen_width")
+        ax.set_ylabel("y / screen_height")
+        fig.colorbar(im, ax=ax, label="log(1 + count)")
+
+    fig.suptitle(title or "Interaction Heatmap", fontsize=10)
+    fig.tight_layout()
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    fig.savefig(output_path, dpi=100)
+    plt.close(fig)
+
+
+def _parse_bins(value: str) -> Tuple[int, int]:
+    parts = value.lower().split("x")
+    if len(parts) != 2:
+        raise ValueError(f"Invalid bins '{value}', expected WxH (e.g. 192x108)")
+    return (int(parts[0]), int(parts[1]))
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Aggregate interaction positions from many participant CSVs "
+        "into per-condition/phase heatmaps.",
+    )
+    parser.add_argument(
+        "inputs", nargs="*",
+        help="CSV files, directories (all user_*.csv inside) or quoted globs.",
+    )
+    parser.add_argument(
+        "-o", "--output-dir", default="heatmaps",
+        help="Directory for heatmap PNGs (default: heatmaps/).",
+    )
+    parser.add_argument(
+        "--bins", default=None, metavar="WxH",
+        help="Grid resolution (default: 192x108, or that of --state).",
+    )
+    parser.add_argument(
+        "--state", default=None, metavar="NPZ",
+        help="Accumulator file: loaded if it exists, new files are added to "
+             "it, and the result is written back.",
+    )
+    parser.add_argument(
+        "--merge", nargs="*", default=[], metavar="NPZ",
+        help="Additional saved accumulators to merge in.",
+    )
+    parser.add_argument(
+        "--types", default="chart_hover,chart_click",
+        help="Comma-separated event types to plot (default: chart_hover,chart_click).",
+    )
+    parser.add_argument(
+        "--screenshot", default=None,
+        help="Screenshot PNG to draw heatmaps over.",
+    )
+    parser.add_argument(
+        "-j", "--jobs", default=None, type=int, metavar="N",
+        help="Number of worker processes (default: CPU count).",
+    )
+    parser.add_argument(
+        "--no-plot", action="store_true",
+        help="Only update the accumulator; do not write PNGs.",
+    )
+    args = parser.parse_args()
+
+    try:
+        state = Path(args.state) if args.state else None
+        if state is not None and state.exists():
+            acc = HeatmapAccumulator.load(state)
+            if args.bins and _parse_bins(args.bins) != acc.bins:
+                raise ValueError(f"--bins {args.bins} does not match {state} ({acc.bins[0]}x{acc.bins[1]})")
+        else:
+            acc = HeatmapAccumulator(_parse_bins(args.bins) if args.bins else DEFAULT_BINS)
+        for extra in args.merge:
+            acc.merge(HeatmapAccumulator.load(Path(extra)))
+
+        inputs: List[Path] = []
+        for pattern in args.inputs:
+            path = Path(pattern)
+            inputs.extend([path] if path.is_file() else expand_inputs(pattern))
+        inputs = list({file_key(p): p for p in inputs}.values())
+        new = [p for p in inputs if not acc.counted(p)]
+        print(f"Accumulating {len(new)} new file(s) ({len(inputs) - len(new)} already counted)")
+
+        started = time.perf_counter()
+        acc, errors = accumulate(new, acc, jobs=args.jobs)
+        for path, error in errors:
+            print(f"  FAILED {path.name}: {error}")
+        print(
+            f"{len(acc.files)} file(s), {acc.sessions} session(s), "
+            f"{len(acc.grids)} grid(s) in {time.perf_counter() - started:.1f}s"
+        )
+
+        if state is not None:
+            acc.save(state)
+            print(f"Saved accumulator -> {state}")
+
+        if not args.no_plot:
+            wanted = {t.strip() for t in args.types.split(",") if t.strip()}
+            ss = Path(args.screenshot) if args.screenshot else None
+            out_dir = Path(args.output_dir)
+            for cond, phase, etype in acc.keys():
+                if etype not in wanted:
+                    continue
+                out = out_dir / f"{cond}_phase{phase}_{etype}.png"
+                grid = acc.grids[(cond, phase, etype)]
+                plot_heatmap(
+                    grid, out,
+                    f"{cond}  phase {phase}  {etype}  (n={int(grid.sum())})",
+                    ss,
+                )
+                print(f"  {out}")
+        if errors:
+            sys.exit(1)
+
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""Time-indexed view of one participant session for interactive drill-downs.
+
+A :class:`Session` wraps the timestamp-sorted points of one prediction row
+(one participant and phase) and answers questions such as "what happened
+between 10 s and 25 s of phase 2" without touching the rest of the log::
+
+    from interaction_session import load_session
+
+    s = load_session("data/user_123.csv", phase=2)
+    part = s.window(10_000, 25_000)          # binary search, no copy
+    part.of_type("chart_click").points()     # clicks in that window
+    for seg in s.segments():                 # chart_enter .. chart_leave
+        print(seg.start_ms, seg.duration_ms, len(seg))
+
+Windows and segments are slices of the session's columns, so they are views
+rather than copies and cost O(log n) to make.  Per-type position indexes are
+built on first use and shared by every window of the session.  Timestamps
+are the tracker's, in ms since the trial started.
+
+Usage:
+    python interaction_session.py data/user_123.csv --phase 2 --start 10000 --end 25000
+    python interaction_session.py event_store/ --participant P01 --phase 2 --segments
+"""
+
+import argparse
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from recover_interaction_log import InteractionPoints, extract_points, iter_from_csv
+
+SESSION_META = (
+    "participant_id", "condition_id", "phase", "screen_width", "screen_height", "source",
+)
+
+
+class _SessionData:
+    """Columns and lazily built per-type indexes shared by a session's views."""
+
+    def __init__(self, points: InteractionPoints) -> None:
+        self.points = points
+        self.type_positions: Dict[int, np.ndarray] = {}
+
+    def positions(self, code: int) -> np.ndarray:
+        """Sorted positions of the points with type ``code``."""
+        found = self.type_positions.get(code)
+        if found is None:
+            found = self.type_positions[code] = np.flatnonzero(self.points.codes == code)
+        return found
+
+
+class EventTypeView:
+    """Points of one event type within a session window.
+
+    Holds a slice of the session's position index for that type; the
+    coordinates are only gathered when asked for.
+    """
+
+    def __init__(self, session: "Session", event_type: str, positions: np.ndarray) -> None:
+        self.session = session
+        self.event_type = event_type
+        self.positions = positions
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __repr__(self) -> str:
+        return f"EventTypeView({self.event_type!r}, {len(self)} events)"
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self.session._data.points.ts[self.positions]
+
+    @property
+    def x(self) -> np.ndarray:
+        return self.session._data.points.x[self.positions]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self.session._data.points.y[self.positions]
+
+    def points(self) -> InteractionPoints:
+        """The selected points (a copy of just these rows)."""
+        return self.session._data.points.take(self.positions)
+
+    def window(self, start_ms: Optional[float] = None, end_ms: Optional[float] = None) -> "EventTypeView":
+        """Events of this type in ``[start_ms, end_ms)``."""
+        return self.session.window(start_ms, end_ms).of_type(self.event_type)
+
+
+class Session:
+    """Timestamp-sorted points of one session, sliceable by time.
+
+    ``points`` must be sorted by ``ts``, as :func:`extract_points` and the
+    event store return them.  Metadata (``participant_id``, ``phase``, ...)
+    is kept in ``meta`` and also readable as attributes.
+    """
+
+    def __init__(self, points: InteractionPoints, **meta: Any) -> None:
+        self._data = _SessionData(points)
+        self._lo, self._hi = 0, len(points)
+        self.meta = {k: meta.get(k) for k in SESSION_META}
+
+    @classmethod
+    def from_row(cls, row_info: Dict[str, Any], **meta: Any) -> "Session":
+        """Session of a row from ``iter_from_csv`` or ``EventStore.iter_rows``."""
+        points = row_info.get("points")
+        if points is None:
+            points = extract_points(row_info["events"], with_chart=True)
+        fields = {k: v for k, v in row_info.items() if k in SESSION_META}
+        fields.update(meta)
+        return cls(points, **fields)
+
+    def _view(self, lo: int, hi: int) -> "Session":
+        view = Session.__new__(Session)
+        view._data, view._lo, view._hi, view.meta = self._data, lo, hi, self.meta
+        return view
+
+    def __getattr__(self, name: str) -> Any:
+        meta = self.__dict__.get("meta", {})
+        if name in meta:
+            return meta[name]
+        raise AttributeError(name)
+
+    def __len__(self) -> int:
+        return self._hi - self._lo
+
+    def __repr__(self) -> str:
+        who = ", ".join(
+            f"{k}={self.meta[k]!r}" for k in ("participant_id", "phase") if self.meta[k] is not None
+        )
+        span = f"{self.start_ms:.0f}-{self.end_ms:.0f} ms" if len(self) else "empty"
+        return f"Session({who + ', ' if who else ''}{len(self)} events, {span})"
+
+    # -- columns -------------------------------------------------------------
+
+    @property
+    def ts(self) -> np.ndarray:
+        return self._data.points.ts[self._lo:self._hi]
+
+    @property
+    def x(self) -> np.ndarray:
+        return self._data.points.x[self._lo:self._hi]
+
+    @property
+    def y(self) -> np.ndarray:
+        return self._data.points.y[self._lo:self._hi]
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._data.points.codes[self._lo:self._hi]
+
+    @property
+    def type_names(self) -> Tuple[str, ...]:
+        return self._data.points.type_names
+
+    @property
+    def start_ms(self) -> float:
+        return float(self._data.points.ts[self._lo]) if len(self) else float("nan")
+
+    @property
+    def end_ms(self) -> float:
+        return float(self._data.points.ts[self._hi - 1]) if len(self) else float("nan")
+
+    @property
+    def duration_ms(self) -> float:
+        return self.end_ms - self.start_ms if len(self) else 0.0
+
+    def points(self) -> InteractionPoints:
+        """This window's points; the columns are views, not copies."""
+        pts = self._data.points
+        window = slice(self._lo, self._hi)
+        return InteractionPoints(
+            ts=pts.ts[window],
+            x=pts.x[window],
+            y=pts.y[window],
+            codes=pts.codes[window],
+            type_names=pts.type_names,
+            chart_x=None if pts.chart_x is None else pts.chart_x[window],
+            chart_y=None if pts.chart_y is None else pts.chart_y[window],
+        )
+
+    # -- queries -------------------------------------------------------------
+
+    def window(self, start_ms: Optional[float] = None, end_ms: Optional[float] = None) -> "Session":
+        """Events with ``start_ms <= ts < end_ms`` (open ends when None)."""
+        ts = self._data.points.ts
+        lo, hi = self._lo, self._hi
+        if start_ms is not None:
+            lo = max(lo, int(np.searchsorted(ts[:hi], start_ms, side="left")))
+        if end_ms is not None:
+            hi = min(hi, int(np.searchsorted(ts[:hi], end_ms, side="left")))
+        return self._view(lo, max(lo, hi))
+
+    def at(self, ms: float) -> int:
+        """Index (within this window) of the last event at or before ``ms``, or -1."""
+        return int(np.searchsorted(self.ts, ms, side="right")) - 1
+
+    def of_type(self, event_type: str) -> EventTypeView:
+        """Lazy view of this window's events of ``event_type``."""
+        code = self._data.points.code_of(event_type)
+        if code < 0:
+            return EventTypeView(self, event_type, np.zeros(0, dtype=np.int64))
+        positions = self._data.positions(code)
+        lo, hi = np.searchsorted(positions, (self._lo, self._hi))
+        return EventTypeView(self, event_type, positions[lo:hi])
+
+    def segments(self, include_open: bool = True) -> Iterator["Session"]:
+        """Windows from each ``chart_enter`` through the next ``chart_leave``.
+
+        A new ``chart_enter`` before any leave closes the previous segment
+        just before it.  Events before the first enter that end in a leave
+        form a leading segment, and a segment still open at the end of the
+        window runs to its last event; ``include_open=False`` drops both.
+        """
+        enter = self.of_type("chart_enter").positions
+        leave = self.of_type("chart_leave").positions
+        marks = np.concatenate([enter, leave])
+        entering = np.concatenate([np.ones(len(enter), bool), np.zeros(len(leave), bool)])
+        order = np.argsort(marks, kind="stable")
+        # start: first event of the current segment (None while outside);
+        # opened: whether that segment began with a chart_enter.
+        start: Optional[int] = self._lo
+        opened = False
+        for pos, is_enter in zip(marks[order].tolist(), entering[order].tolist()):
+            if is_enter:
+                if opened:
+                    yield self._view(start, pos)
+                start, opened = pos, True
+            elif start is not None:
+                if opened or include_open:
+                    yield self._view(start, pos + 1)
+                start, opened = None, False
+        if opened and include_open:
+            yield self._view(start, self._hi)
+
+    def to_frame(self) -> Any:
+        """This window as a ``pandas.DataFrame`` (one row per event)."""
+        try:
+            import pandas as pd
+        except ImportError as exc:
+            raise RuntimeError(
+                "pandas is required. Install it with: pip install pandas"
+            ) from exc
+
+        pts = self.points()
+        frame = {"timestamp": pts.ts, "type": pts.types, "x": pts.x, "y": pts.y}
+        if pts.chart_x is not None:
+            frame.update(chart_x=pts.chart_x, chart_y=pts.chart_y)
+        return pd.DataFrame(frame)
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def load_sessions(
+    source: Path,
+    participant_id: Optional[str] = None,
+    phase: Optional[int] = None,
+) -> List[Session]:
+    """Sessions of a participant CSV or an event store directory.
+
+    Event stores are filtered by ``participant_id`` and ``phase`` through
+    their index and return memory-mapped views; CSVs are parsed row by row,
+    or only the matching rows are read when the CSV has a fresh row index.
+    """
+    from interaction_store import EventStore, is_store
+
+    source = Path(source)
+    if is_store(source):
+        store = EventStore(source)
+        return [
+            Session(store.points(seg), **seg)
+            for seg in store.segments(participant_id=participant_id, phase=phase)
+        ]
+    sessions = []
+    rows = iter_from_csv(source, phase=phase, selective=True, participant_id=participant_id)
+    for row_info in rows:
+        sessions.append(Session.from_row(row_info, source=source.stem))
+    return sessions
+
+
+def load_session(
+    source: Path,
+    participant_id: Optional[str] = None,
+    phase: Optional[int] = None,
+) -> Session:
+    """The single session matching the filters; raises ValueError otherwise."""
+    sessions = load_sessions(source, participant_id, phase)
+    if len(sessions) != 1:
+        raise ValueError(
+            f"Expected one session in {Path(source).name}, found {len(sessions)}; "
+            "narrow it down with participant_id / phase."
+        )
+    return sessions[0]
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _describe(session: Session, indent: str = "") -> str:
+    counts = ", ".join(
+        f"{name} {len(session.of_type(name))}"
+        for name in session.type_names if len(session.of_type(name))
+    )
+    return f"{indent}{session!r}" + (f": {counts}" if counts else "")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Summarise a time window of participant sessions.",
+    )
+    parser.add_argument("input", help="Participant CSV or event store directory.")
+    parser.add_argument("--participant", default=None, help="participant_id to select.")
+    parser.add_argument("--phase", default=None, type=int, help="Phase to select.")
+    parser.add_argument("--start", default=None, type=float, metavar="MS",
+                        help="Window start in ms since the trial started.")
+    parser.add_argument("--end", default=None, type=float, metavar="MS",
+                        help="Window end (exclusive) in ms.")
+    parser.add_argument("--segments", action="store_true",
+                        help="Also list the chart enter/leave segments of the window.")
+    args = parser.parse_args()
+
+    try:
+        sessions = load_sessions(Path(args.input), args.participant, args.phase)
+        if not sessions:
+            raise ValueError("No matching sessions.")
+        for session in sessions:
+            part = session.window(args.start, args.end)
+            print(_describe(part))
+            if args.segments:
+                for seg in part.segments():
+                    print(_describe(seg, indent="  "))
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+
+if __name__ == "__main__":
+    main()
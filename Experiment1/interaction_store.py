@@ -0,0 +1,507 @@
+#!/usr/bin/env python3
+"""Columnar on-disk store of interaction events built from participant CSVs.
+
+Parsing ``interaction_log`` out of ``data/user_*.csv`` is by far the most
+expensive step of every analysis.  ``ingest`` does it once and writes each
+participant file as a shard of plain ``.npy`` columns::
+
+    <store>/index.json
+    <store>/shards/<shard>/timestamp.npy   float64
+                           x.npy, y.npy    float64
+                           chart_x.npy     float64 (NaN where not logged)
+                           chart_y.npy     float64
+                           type.npy        int16 codes into the shard's type_names
+                           trials.json     every CSV row minus interaction_log,
+                                           column by column, values as read
+
+A shard is named after its CSV's stem; a CSV of the same name in another
+directory gets the stem plus a hash of its path, since ``index.json`` keys
+sources by resolved path.  A CSV without interaction data still gets a
+shard, with empty event columns, so its trial rows are stored.
+
+Within a shard, events are grouped into segments -- one per prediction row
+-- and sorted by timestamp inside each segment.  ``index.json`` records
+every segment's participant_id, condition_id, phase, screen size and
+``[start, stop)`` event range, so lookups by participant/condition/phase
+never touch the columns.  Columns are memory-mapped on read, and points for
+a segment are zero-copy slices of them.
+
+Re-running ``ingest`` only re-parses CSVs whose size or mtime changed.
+``EventStore.trials`` gives the trial rows of many participants as one
+table without opening their CSVs.
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from recover_interaction_log import (
+    InteractionPoints,
+    NoInteractionRows,
+    expand_inputs,
+    extract_points,
+    iter_from_csv,
+)
+
+STORE_VERSION = 3
+INDEX_NAME = "index.json"
+
+
+def is_store(path: Path) -> bool:
+    """True if ``path`` is an event store directory."""
+    return (Path(path) / INDEX_NAME).is_file()
+
+
+# ---------------------------------------------------------------------------
+# Ingestion
+# ---------------------------------------------------------------------------
+
+def _source_stat(csv_path: Path) -> Dict[str, int]:
+    stat = csv_path.stat()
+    return {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+
+def read_trial_columns(csv_path: Path) -> Dict[str, List[str]]:
+    """Every row of a participant CSV except ``interaction_log``, by column."""
+    csv.field_size_limit(sys.maxsize)
+    with open(csv_path, newline="", encoding="utf-8") as fh:
+        reader = csv.reader(fh)
+        header = next(reader, [])
+        keep = [(i, name) for i, name in enumerate(header) if name != "interaction_log"]
+        columns: Dict[str, List[str]] = {name: [] for _, name in keep}
+        for row in reader:
+            for i, name in keep:
+                columns[name].append(row[i] if i < len(row) else "")
+    return columns
+
+
+def source_key(csv_path: Path) -> str:
+    """Key of a CSV in the index's ``sources``: its resolved path."""
+    return str(Path(csv_path).resolve())
+
+
+def _shard_name(csv_path: Path, taken: Iterable[str]) -> str:
+    """The CSV's stem, or stem plus a path hash if another source has it."""
+    name = Path(csv_path).stem
+    if name in taken:
+        digest = hashlib.sha1(source_key(csv_path).encode("utf-8")).hexdigest()[:8]
+        name = f"{name}-{digest}"
+    return name
+
+
+def ingest_csv(csv_path: Path, root: Path, shard_name: Optional[str] = None) -> Dict[str, Any]:
+    """Parse one participant CSV into a shard; return its index entry.
+
+    The shard is named ``shard_name`` (default: the CSV's stem).
+    """
+    csv_path = Path(csv_path)
+    shard_name = shard_name or csv_path.stem
+    segments: List[Dict[str, Any]] = []
+    parts: List[InteractionPoints] = []
+    type_names: Dict[str, int] = {}
+    start = 0
+
+    try:
+        for row_info in iter_from_csv(csv_path, selective=True):
+            points = extract_points(row_info.pop("events"), with_chart=True)
+            # Re-code onto one type table per shard.
+            for name in points.type_names:
+                type_names.setdefault(name, len(type_names))
+            parts.append(points)
+            segments.append({
+                "participant_id": row_info["participant_id"],
+                "condition_id": row_info["condition_id"],
+                "phase": row_info["phase"],
+                "screen_width": row_info["screen_width"],
+                "screen_height": row_info["screen_height"],
+                "start": start,
+                "stop": start + len(points),
+            })
+            start += len(points)
+    except NoInteractionRows:
+        pass  # stored with no segments, for its trial rows
+
+    def joined(values: List[np.ndarray], dtype: Any) -> np.ndarray:
+        return np.concatenate(values).astype(dtype, copy=False) if values else np.zeros(0, dtype)
+
+    names = tuple(type_names)
+    columns: Dict[str, np.ndarray] = {
+        "timestamp": joined([p.ts for p in parts], np.float64),
+        "x": joined([p.x for p in parts], np.float64),
+        "y": joined([p.y for p in parts], np.float64),
+        "chart_x": joined([p.chart_x for p in parts], np.float64),
+        "chart_y": joined([p.chart_y for p in parts], np.float64),
+        "type": joined([
+            np.array([type_names[n] for n in p.type_names], dtype=np.int16)[p.codes]
+            for p in parts
+        ], np.int16),
+    }
+    trials = read_trial_columns(csv_path)
+
+    # Write into a scratch directory and swap it in, so readers never see a
+    # half-written shard.  The old shard is moved aside rather than deleted
+    # before the swap, so a crash in between leaves it for
+    # _restore_shards() to put back.
+    shard = root / "shards" / shard_name
+    scratch = shard.with_name(f"{shard.name}.{os.getpid()}.tmp")
+    if scratch.exists():
+        shutil.rmtree(scratch)
+    scratch.mkdir(parents=True)
+    for name, values in columns.items():
+        np.save(scratch / f"{name}.npy", values)
+    with open(scratch / "trials.json", "w", encoding="utf-8") as fh:
+        json.dump(trials, fh, separators=(",", ":"))
+    retired = shard.with_name(f"{shard.name}.{os.getpid()}.old")
+    if retired.exists():
+        shutil.rmtree(retired)
+    if shard.exists():
+        os.replace(shard, retired)
+    os.replace(scratch, shard)
+    if retired.exists():
+        shutil.rmtree(retired)
+
+    return {
+        "file": csv_path.name,
+        "shard": shard_name,
+        **_source_stat(csv_path),
+        "events": start,
+        "trials": len(next(iter(trials.values()), [])),
+        "type_names": list(names),
+        "segments": segments,
+    }
+
+
+def _restore_shards(root: Path) -> None:
+    """Put back shards whose swap in :func:`ingest_csv` was interrupted."""
+    for retired in sorted((root / "shards").glob("*.old")):
+        shard = retired.with_name(retired.name.rsplit(".", 2)[0])
+        if not shard.exists():
+            os.replace(retired, shard)
+        else:
+            shutil.rmtree(retired, ignore_errors=True)
+
+
+def _ingest_worker(
+    csv_path: Path, root: Path, shard_name: str
+) -> Tuple[Path, Optional[Dict[str, Any]], Optional[str]]:
+    """Process-pool worker: ingest one CSV, never raising."""
+    try:
+        return csv_path, ingest_csv(csv_path, root, shard_name), None
+    except Exception as exc:
+        return csv_path, None, f"{type(exc).__name__}: {exc}"
+
+
+def _read_index(root: Path) -> Dict[str, Any]:
+    try:
+        with open(root / INDEX_NAME, encoding="utf-8") as fh:
+            index = json.load(fh)
+    except FileNotFoundError:
+        return {"version": STORE_VERSION, "sources": {}}
+    if index.get("version") != STORE_VERSION:
+        raise ValueError(
+            f"{root} was written by store version {index.get('version')}; "
+            f"expected {STORE_VERSION}. Rebuild it with --rebuild."
+        )
+    return index
+
+
+def _write_index(root: Path, index: Dict[str, Any]) -> None:
+    tmp = root / f"{INDEX_NAME}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, separators=(",", ":"))
+    os.replace(tmp, root / INDEX_NAME)
+
+
+def ingest(
+    inputs: Iterable[Path],
+    root: Path,
+    jobs: Optional[int] = None,
+    rebuild: bool = False,
+) -> Tuple[List[Path], List[Tuple[Path, str]]]:
+    """Add or refresh shards for ``inputs`` in the store at ``root``.
+
+    Sources are keyed by resolved path, so same-named CSVs from different
+    directories get separate shards.  CSVs whose size and mtime match the
+    index are skipped unless ``rebuild`` is set.  Returns the ingested paths and per-file errors; a
+    failing file never aborts the rest.
+    """
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+    _restore_shards(root)
+    index = {"version": STORE_VERSION, "sources": {}} if rebuild else _read_index(root)
+    sources = index["sources"]
+
+    taken = {entry["shard"] for entry in sources.values()}
+    todo: Dict[str, Tuple[Path, str]] = {}
+    for path in inputs:
+        path = Path(path)
+        key = source_key(path)
+        entry = sources.get(key)
+        if key in todo:
+            continue
+        if entry is None:
+            shard_name = _shard_name(path, taken)
+            taken.add(shard_name)
+            todo[key] = (path, shard_name)
+        elif rebuild or any(entry[k] != v for k, v in _source_stat(path).items()):
+            todo[key] = (path, entry["shard"])
+
+    done: List[Path] = []
+    errors: List[Tuple[Path, str]] = []
+    jobs = min(jobs or os.cpu_count() or 1, max(len(todo), 1))
+    if jobs == 1:
+        results = [_ingest_worker(p, root, name) for p, name in todo.values()]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(_ingest_worker, p, root, name) for p, name in todo.values()]
+            results = [f.result() for f in as_completed(futures)]
+
+    for path, entry, error in results:
+        if error is not None:
+            errors.append((path, error))
+            continue
+        sources[source_key(path)] = entry
+        done.append(path)
+
+    _write_index(root, index)
+    return done, errors
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+class EventStore:
+    """Read-only view of an event store directory.
+
+    Columns are memory-mapped lazily and kept open for the lifetime of the
+    object; ``points`` and ``iter_rows`` return slices of them, not copies.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = Path(root)
+        if not is_store(self.root):
+            raise ValueError(f"{self.root} is not an event store (no {INDEX_NAME}).")
+        self.index = _read_index(self.root)
+        self._shards: Dict[str, Dict[str, Any]] = {
+            entry["shard"]: entry for entry in self.index["sources"].values()
+        }
+        self._columns: Dict[Tuple[str, str], np.ndarray] = {}
+
+    @property
+    def sources(self) -> List[str]:
+        """Shard names (CSV stems, see the module docstring), sorted."""
+        return sorted(self._shards)
+
+    def segments(
+        self,
+        participant_id: Optional[str] = None,
+        condition_id: Optional[str] = None,
+        phase: Optional[int] = None,
+        source: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Index entries matching every given filter, each tagged with ``source``."""
+        found: List[Dict[str, Any]] = []
+        names = [source] if source is not None else self.sources
+        for name in names:
+            entry = self._shards.get(name)
+            if entry is None:
+                continue
+            for seg in entry["segments"]:
+                if participant_id is not None and seg["participant_id"] != participant_id:
+                    continue
+                if condition_id is not None and seg["condition_id"] != condition_id:
+                    continue
+                if phase is not None and seg["phase"] != phase:
+                    continue
+                found.append({"source": name, **seg})
+        return found
+
+    def column(self, source: str, name: str) -> np.ndarray:
+        """Memory-mapped column ``name`` of shard ``source``."""
+        key = (source, name)
+        col = self._columns.get(key)
+        if col is None:
+            col = self._columns[key] = np.load(
+                self.root / "shards" / source / f"{name}.npy", mmap_mode="r"
+            )
+        return col
+
+    def points(self, segment: Dict[str, Any]) -> InteractionPoints:
+        """Points of one segment, as views onto the mapped columns."""
+        src = segment["source"]
+        window = slice(segment["start"], segment["stop"])
+        return InteractionPoints(
+            ts=self.column(src, "timestamp")[window],
+            x=self.column(src, "x")[window],
+            y=self.column(src, "y")[window],
+            codes=self.column(src, "type")[window],
+            type_names=tuple(self._shards[src]["type_names"]),
+            chart_x=self.column(src, "chart_x")[window],
+            chart_y=self.column(src, "chart_y")[window],
+        )
+
+    def iter_rows(
+        self,
+        source: str,
+        phase: Optional[int] = None,
+        participant_id: Optional[str] = None,
+        condition_id: Optional[str] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Counterpart of ``iter_from_csv`` yielding ``points`` instead of ``events``."""
+        segments = self.segments(participant_id, condition_id, phase, source)
+        if not segments:
+            extra = f" for phase {phase}" if phase is not None else ""
+            raise ValueError(f"No rows for {source} in the event store{extra}.")
+        for seg in segments:
+            yield {
+                "points": self.points(seg),
+                "phase": seg["phase"],
+                "condition_id": seg["condition_id"],
+                "participant_id": seg["participant_id"],
+                "screen_width": seg["screen_width"],
+                "screen_height": seg["screen_height"],
+            }
+
+    def table(self, **filters: Any) -> Dict[str, np.ndarray]:
+        """One row per event for the matching segments, as a dict of columns.
+
+        Includes ``participant_id``, ``condition_id``, ``phase`` and the event
+        ``type`` name alongside the numeric columns; pass the result to
+        ``pandas.DataFrame`` for a tidy frame.
+        """
+        segments = self.segments(**filters)
+        pieces: Dict[str, List[np.ndarray]] = {
+            k: [] for k in ("participant_id", "condition_id", "phase", "type",
+                            "timestamp", "x", "y", "chart_x", "chart_y")
+        }
+        for seg in segments:
+            pts = self.points(seg)
+            n = len(pts)
+            pieces["participant_id"].append(np.full(n, seg["participant_id"], dtype=object))
+            pieces["condition_id"].append(np.full(n, seg["condition_id"], dtype=object))
+            pieces["phase"].append(np.full(n, seg["phase"] if seg["phase"] is not None else -1, dtype=np.int8))
+            pieces["type"].append(pts.types)
+            pieces["timestamp"].append(pts.ts)
+            pieces["x"].append(pts.x)
+            pieces["y"].append(pts.y)
+            pieces["chart_x"].append(pts.chart_x)
+            pieces["chart_y"].append(pts.chart_y)
+        return {
+            k: np.concatenate(v) if v else np.empty(0) for k, v in pieces.items()
+        }
+
+    def trials(
+        self,
+        participant_id: Optional[str] = None,
+        condition_id: Optional[str] = None,
+        phase: Optional[int] = None,
+        source: Optional[str] = None,
+    ) -> Dict[str, np.ndarray]:
+        """Trial rows of the matching shards as one dict of object columns.
+
+        Values are the CSV strings; columns missing from a shard are empty
+        strings there, and ``source`` names each row's shard.  Filters are
+        compared with the rows' own ``participant_id``, ``condition_id`` and
+        ``phase`` columns (rows outside the two phases have no phase).
+        """
+        wanted = {
+            "participant_id": participant_id,
+            "condition_id": condition_id,
+            "phase": None if phase is None else str(phase),
+        }
+        shards: List[Tuple[str, Dict[str, List[str]], np.ndarray]] = []
+        names: Dict[str, None] = {"source": None}
+        for name in [source] if source is not None else self.sources:
+            if name not in self._shards:
+                continue
+            with open(self.root / "shards" / name / "trials.json", encoding="utf-8") as fh:
+                columns = json.load(fh)
+            n = self._shards[name]["trials"]
+            keep = np.ones(n, dtype=bool)
+            for key, value in wanted.items():
+                if value is not None:
+                    keep &= np.array(columns.get(key, [""] * n), dtype=object) == value
+            shards.append((name, columns, keep))
+            names.update(dict.fromkeys(columns))
+
+        pieces: Dict[str, List[np.ndarray]] = {k: [] for k in names}
+        for name, columns, keep in shards:
+            n = int(keep.sum())
+            for key in names:
+                if key == "source":
+                    pieces[key].append(np.full(n, name, dtype=object))
+                elif key in columns:
+                    pieces[key].append(np.array(columns[key], dtype=object)[keep])
+                else:
+                    pieces[key].append(np.full(n, "", dtype=object))
+        return {
+            k: np.concatenate(v) if v else np.empty(0, dtype=object) for k, v in pieces.items()
+        }
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Ingest participant CSVs into a columnar interaction event store.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+",
+        help="CSV files, directories (all user_*.csv inside) or quoted globs.",
+    )
+    parser.add_argument(
+        "-s", "--store", default="event_store",
+        help="Store directory (default: event_store/).",
+    )
+    parser.add_argument(
+        "-j", "--jobs", default=None, type=int, metavar="N",
+        help="Number of worker processes (default: CPU count).",
+    )
+    parser.add_argument(
+        "--rebuild", action="store_true",
+        help="Re-ingest every input even if it is unchanged.",
+    )
+    args = parser.parse_args()
+
+    try:
+        inputs: List[Path] = []
+        for pattern in args.inputs:
+            path = Path(pattern)
+            inputs.extend([path] if path.is_file() else expand_inputs(pattern))
+        if not inputs:
+            raise ValueError("No CSV files found.")
+
+        started = time.perf_counter()
+        done, errors = ingest(inputs, Path(args.store), args.jobs, args.rebuild)
+        for path, error in errors:
+            print(f"  FAILED {path.name}: {error}")
+
+        store = EventStore(Path(args.store))
+        n_events = sum(e["events"] for e in store.index["sources"].values())
+        print(
+            f"Ingested {len(done)} file(s), {len(inputs) - len(done) - len(errors)} unchanged, "
+            f"{len(errors)} failed in {time.perf_counter() - started:.1f}s; "
+            f"store holds {len(store.sources)} source(s), {n_events} events"
+        )
+        if errors:
+            sys.exit(1)
+
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,54 +1,14 @@
-import json
-import numpy as np
+"""Map synthetic_stock_data.json prices into the AQI range.
 
-INPUT_FILE = "synthetic_stock_data.json"
-OUTPUT_FILE = "synthetic_stock_data_aqi.json"
-
-# adjust as needed to increase/decrease variability
-AMPLIFY_FACTOR = 4.0  
-
-MIN_AQI = 60
-MAX_AQI = 120
-
-def main():
-    with open(INPUT_FILE, "r") as f:
-        original = json.load(f)["data"]
-
-    # extract all prices
-    prices = np.array([d["price"] for d in original], dtype=float)
-
-    # 1. center around mean
-    mean = prices.mean()
-    centered = prices - mean
-
-    # 2. amplify variance
-    amplified = centered * AMPLIFY_FACTOR
+Kept for the old workflow; equivalent to
+``python transform_stimuli.py synthetic_stock_data.json
+synthetic_stock_data_aqi.json --preset aqi``.
+"""
 
-    # 3. shift back
-    amplified += mean
+from transform_stimuli import main
 
-    # 4. normalize to [MIN_AQI, MAX_AQI]
-    min_val = amplified.min()
-    max_val = amplified.max()
-
-    normalized = (amplified - min_val) / (max_val - min_val)
-    mapped = normalized * (MAX_AQI - MIN_AQI) + MIN_AQI
-
-    # 5. round to int for AQI
-    mapped_int = np.round(mapped).astype(int)
-
-    # 6. replace prices in original structure
-    new_data = []
-    for entry, aqi in zip(original, mapped_int):
-        e = entry.copy()
-        e["price"] = int(aqi)
-        new_data.append(e)
-
-    # write to output
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump({"data": new_data}, f, indent=2)
-
-    print(f"Done. Saved to {OUTPUT_FILE}")
+INPUT_FILE = "synthetic_stock_data.json"
+OUTPUT_FILE = "synthetic_stock_data_aqi.json"
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main([INPUT_FILE, OUTPUT_FILE, "--preset", "aqi"])
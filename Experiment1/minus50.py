@@ -1,21 +1,14 @@
-import json
+"""Shift AQI prices down by 50.
 
-input_file = "synthetic_stock_data_aqi.json"
-output_file = "synthetic_stock_data_aqi_norm.json"
+Kept for the old workflow; equivalent to
+``python transform_stimuli.py synthetic_stock_data_aqi.json
+synthetic_stock_data_aqi_norm.json --preset norm``.
+"""
 
-with open(input_file, "r") as f:
-    data = json.load(f)
+from transform_stimuli import main
 
-# Access the actual list
-items = data["data"]
+INPUT_FILE = "synthetic_stock_data_aqi.json"
+OUTPUT_FILE = "synthetic_stock_data_aqi_norm.json"
 
-# Subtract 50 from each price
-for item in items:
-    if "price" in item and isinstance(item["price"], (int, float)):
-        item["price"] = item["price"] - 50
-
-# Save new JSON
-with open(output_file, "w") as f:
-    json.dump(data, f, indent=2)
-
-print("Done! Saved to", output_file)
\ No newline at end of file
+if __name__ == "__main__":
+    main([INPUT_FILE, OUTPUT_FILE, "--preset", "norm"])
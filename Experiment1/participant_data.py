@@ -0,0 +1,415 @@
+"""Load the participant CSVs into one DataFrame for the analysis notebooks.
+
+Replaces the per-notebook ``load_participant_data`` loop::
+
+    from participant_data import load_participants, load_interaction_logs
+
+    combined_data = load_participants("data")            # cached, no interaction_log
+    logs = load_interaction_logs(combined_data[mask])     # only when needed
+
+Files are parsed in parallel with explicit dtypes.  ``trial_type``,
+``condition_id``, ``condition_name``, ``display_format`` and ``phase`` become
+categoricals, and the bulky ``interaction_log`` column is skipped unless asked
+for.  The combined frame is pickled next to the data; later calls read that
+instead, as long as the set of files and their sizes/mtimes (and the loader
+options) are unchanged.
+
+Each row carries ``source_file`` and ``source_row`` so the interaction log (or
+anything else) can be fetched later for just the rows that need it.
+
+Survey answers are stored as JSON objects in the ``response`` column;
+:func:`expand_responses` decodes them in bulk into typed columns::
+
+    from participant_data import expand_responses
+
+    surveys = expand_responses(combined_data[combined_data["trial_type"] == "trust-survey"])
+"""
+
+import hashlib
+import json
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Union
+
+import pandas as pd
+
+from recover_interaction_log import load_row_index
+
+CACHE_NAME = ".participants_cache.pkl"
+# Bump when the loader's output changes so stale caches are ignored.
+CACHE_VERSION = 1
+
+TEXT_COLUMNS = (
+    "participant_id", "condition", "condition_id", "condition_name",
+    "confidence_label", "display_format", "internal_node_id", "question_order",
+    "response", "responses", "stimulus", "travel_choice", "trial_type",
+    "view_history", "start_time", "end_time",
+)
+NUMERIC_COLUMNS = (
+    "city_a_estimate", "city_b_estimate", "click_events", "comprehension_ease",
+    "confidence_rating", "data_trust", "device_pixel_ratio", "hover_events",
+    "percent_score", "phase", "probability_estimate", "round", "rt", "rt_total",
+    "screen_height", "screen_width", "skeptical_rating", "time_elapsed",
+    "time_on_viz", "total_interactions", "total_questions", "total_score",
+    "trial_index", "trust_composite", "usability_composite",
+    "usability_difficulty", "visualization_literacy_score",
+)
+CATEGORICAL_COLUMNS = ("trial_type", "condition_id", "condition_name", "display_format", "phase")
+
+# Question keys of the Likert surveys, in the order of the experiment's
+# interactionQuestions / visualizationTrustQuestions / personalityQuestions.
+INTERACTION_QUESTIONS = (
+    "navigation_control", "content_control", "pace_control",
+    "company_communication", "interface_responsiveness",
+    "customer_communication", "personal_conversation",
+    "interface_interaction", "interface_sensitivity",
+)
+VISUALIZATION_TRUST_QUESTIONS = (
+    "skeptical_rating", "data_trust", "usability_difficulty", "comprehension_ease",
+)
+PERSONALITY_QUESTIONS = (
+    "respect_others", "good_word_everyone", "retreat_from_others", "avoid_contacts",
+)
+
+# Expected ``response`` keys and their dtypes for each survey trial_type.
+# Keys not listed become object columns; listed keys missing from a response
+# are NA.  "str" answers use pandas' nullable string dtype.
+SURVEY_SCHEMAS: Dict[str, Dict[str, str]] = {
+    "trust-survey": {q: "Int64" for q in INTERACTION_QUESTIONS + VISUALIZATION_TRUST_QUESTIONS},
+    "personality-survey": {q: "Int64" for q in PERSONALITY_QUESTIONS},
+    "survey-text": {"age": "Int64", "major_field": "str"},
+    "survey-multi-choice": {"education": "category", "viz_experience": "category"},
+    "interaction-feedback": {
+        "encounter_bug": "category", "bug_elaboration": "str",
+        "annoying_design": "category", "annoying_elaboration": "str",
+    },
+}
+
+PathsLike = Union[str, Path, Iterable[Union[str, Path]]]
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+def read_participant_csv(path: Path, interaction_log: bool = False) -> pd.DataFrame:
+    """Read and clean one participant CSV.
+
+    Known text and numeric columns get explicit dtypes; a numeric column
+    holding stray text is coerced (the text becomes NaN) rather than turning
+    the whole column into strings.  Identifiers such as ``participant_id``
+    are therefore always strings, even when every id in a file looks
+    numeric (pandas' own inference used to read those as numbers).  Mirrors
+    the notebooks' cleaning: a missing ``participant_id`` is taken from the
+    file name and a missing ``condition_id`` becomes ``"unknown"``.
+    """
+    path = Path(path)
+    header = pd.read_csv(path, nrows=0).columns
+    usecols = [c for c in header if interaction_log or c != "interaction_log"]
+    text = {c: str for c in TEXT_COLUMNS if c in usecols}
+    numeric = {c: "float64" for c in NUMERIC_COLUMNS if c in usecols}
+    try:
+        df = pd.read_csv(path, usecols=usecols, dtype={**text, **numeric}, low_memory=False)
+    except ValueError:
+        df = pd.read_csv(path, usecols=usecols, dtype=text, low_memory=False)
+        for col in numeric:
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    if "participant_id" not in df.columns or df["participant_id"].isna().all():
+        df["participant_id"] = path.stem.split("_")[1]
+    if "condition_id" in df.columns:
+        df["condition_id"] = df["condition_id"].fillna("unknown")
+    df["source_file"] = str(path)
+    df["source_row"] = range(len(df))
+    return df
+
+
+def _read_chunk(paths: List[Path], interaction_log: bool) -> List[Any]:
+    """Process-pool worker: read a chunk of files, never raising."""
+    out: List[Any] = []
+    for path in paths:
+        try:
+            out.append((path, read_participant_csv(path, interaction_log), None))
+        except Exception as exc:
+            out.append((path, None, f"{type(exc).__name__}: {exc}"))
+    return out
+
+
+def _categorize(df: pd.DataFrame) -> pd.DataFrame:
+    for col in CATEGORICAL_COLUMNS:
+        if col not in df.columns:
+            continue
+        if col == "phase":
+            df[col] = df[col].astype("Int64").astype("category")
+        else:
+            df[col] = df[col].astype("category")
+    df["source_file"] = df["source_file"].astype("category")
+    return df
+
+
+# ---------------------------------------------------------------------------
+# Cache
+# ---------------------------------------------------------------------------
+
+def _resolve_files(paths: PathsLike, pattern: str, recursive: bool) -> List[Path]:
+    if isinstance(paths, (str, Path)):
+        root = Path(paths)
+        if root.is_dir():
+            found = root.rglob(pattern) if recursive else root.glob(pattern)
+            return sorted(found)
+        return [root] if root.is_file() else []
+    return sorted(Path(p) for p in paths)
+
+
+def cache_key(files: Sequence[Path], **options: Any) -> str:
+    """Hash of the file set, each file's size and mtime, and ``options``."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(json.dumps({"version": CACHE_VERSION, **options}, sort_keys=True).encode())
+    for path in files:
+        st = path.stat()
+        h.update(f"{path.resolve()}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+    return h.hexdigest()
+
+
+def _default_cache_path(files: Sequence[Path]) -> Path:
+    common = Path(os.path.commonpath([str(p.resolve().parent) for p in files]))
+    return common / CACHE_NAME
+
+
+def _read_cache(path: Path, key: str) -> Optional[pd.DataFrame]:
+    try:
+        with open(path, "rb") as f:
+            cached = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        return None
+    return cached["frame"]
+
+
+def _write_cache(path: Path, key: str, df: pd.DataFrame) -> None:
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp, "wb") as f:
+        pickle.dump({"key": key, "frame": df}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def load_participants(
+    paths: PathsLike = "data",
+    pattern: str = "user_*.csv",
+    recursive: bool = False,
+    interaction_log: bool = False,
+    categorical: bool = True,
+    cache: Union[bool, str, Path] = True,
+    jobs: Optional[int] = None,
+    verbose: bool = True,
+) -> pd.DataFrame:
+    """Load every participant CSV into one DataFrame.
+
+    Parameters
+    ----------
+    paths : a data directory (searched for ``pattern``, recursively with
+        ``recursive``), or an explicit list of CSV files.
+    interaction_log : also load the ``interaction_log`` column.  Off by
+        default; use :func:`load_interaction_logs` for the rows that need it.
+    categorical : store ``CATEGORICAL_COLUMNS`` as pandas categoricals.
+        Group by them with ``observed=True`` to skip empty combinations.
+    cache : True for ``.participants_cache.pkl`` in the files' common
+        directory, a path for another location, or False to always re-read.
+    jobs : worker processes for parsing (default: CPU count; 1 reads
+        in-process).
+
+    Files that fail to parse are reported and skipped.
+    """
+    files = _resolve_files(paths, pattern, recursive)
+    if not files:
+        raise ValueError(f"No participant CSVs found in {paths}")
+
+    key = cache_key(files, interaction_log=interaction_log, categorical=categorical)
+    cache_path: Optional[Path] = None
+    if cache:
+        cache_path = _default_cache_path(files) if cache is True else Path(cache)
+        df = _read_cache(cache_path, key)
+        if df is not None:
+            if verbose:
+                print(f"Loaded {len(files)} file(s) from cache {cache_path}")
+            return df
+
+    jobs = min(jobs or os.cpu_count() or 1, len(files))
+    if jobs == 1:
+        results = _read_chunk(files, interaction_log)
+    else:
+        chunks = [files[i::jobs] for i in range(jobs)]
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            results = [
+                r for part in pool.map(_read_chunk, chunks, [interaction_log] * jobs)
+                for r in part
+            ]
+    results.sort(key=lambda r: str(r[0]))
+
+    frames: List[pd.DataFrame] = []
+    for path, frame, error in results:
+        if error is not None:
+            print(f"Error loading {path}: {error}")
+        else:
+            frames.append(frame)
+    if not frames:
+        raise ValueError("No participant CSVs could be loaded.")
+    df = pd.concat(frames, ignore_index=True)
+    if categorical:
+        df = _categorize(df)
+
+    if cache_path is not None:
+        _write_cache(cache_path, key, df)
+    if verbose:
+        print(f"Loaded {len(frames)} of {len(files)} file(s): {df.shape[0]} rows x {df.shape[1]} columns")
+    return df
+
+
+def load_interaction_logs(df: pd.DataFrame, column: str = "interaction_log") -> pd.Series:
+    """Fetch ``column`` for the rows of ``df`` from their source CSVs.
+
+    Only the files referenced by ``df`` are re-read, and only that column of
+    them.  Returns a Series aligned with ``df.index``.  Interaction logs are
+    read by seeking to just the requested rows through each file's sidecar
+    row index (built on first use, see ``recover_interaction_log.RowIndex``);
+    other columns, or files the index cannot handle, are parsed with pandas.
+    """
+    out = pd.Series(index=df.index, dtype=object, name=column)
+    for source, rows in df.groupby("source_file", observed=True)["source_row"]:
+        values = _indexed_logs(Path(source), rows.to_numpy()) if column == "interaction_log" else None
+        if values is None:
+            if column not in pd.read_csv(source, nrows=0).columns:
+                continue
+            values = pd.read_csv(source, usecols=[column], dtype={column: str})[column]
+            values = values.to_numpy()[rows.to_numpy()]
+        out.loc[rows.index] = values
+    return out
+
+
+def _indexed_logs(path: Path, positions: Sequence[int]) -> Optional[List[Any]]:
+    """Interaction logs of the given data rows of ``path`` via its row index.
+
+    None when the file has no usable index (or no interaction_log column).
+    Empty fields become NaN, as with ``pandas.read_csv``.
+    """
+    try:
+        index = load_row_index(path, build=True)
+    except (OSError, ValueError):
+        return None
+    if "interaction_log" not in index.columns:
+        return None
+    logs = dict(index.iter_logs(sorted(set(int(p) for p in positions))))
+    return [logs[int(p)] or float("nan") for p in positions]
+
+
+# ---------------------------------------------------------------------------
+# Survey responses
+# ---------------------------------------------------------------------------
+
+def _loads_object(text: str) -> Optional[dict]:
+    try:
+        value = json.loads(text)
+    except ValueError:
+        return None
+    return value if isinstance(value, dict) else None
+
+
+def decode_responses(texts: pd.Series) -> List[Optional[dict]]:
+    """Decode a Series of JSON-object strings, one dict (or None) per entry.
+
+    All entries are parsed by a single ``json.loads`` of one joined array;
+    only if that fails (a malformed or non-object entry) are they parsed one
+    at a time, with the bad entries becoming None.
+    """
+    values = [t if isinstance(t, str) else "" for t in texts]
+    if all(v.startswith("{") for v in values):
+        try:
+            decoded = json.loads("[" + ",".join(values) + "]")
+        except ValueError:
+            decoded = None
+        if (decoded is not None and len(decoded) == len(values)
+                and all(isinstance(d, dict) for d in decoded)):
+            return decoded
+    return [_loads_object(v) if v else None for v in values]
+
+
+def _coerce(values: pd.Series, dtype: str) -> pd.Series:
+    if dtype == "str":
+        # astype(str) would turn missing answers into "nan"/"None".
+        return values.astype("string")
+    if dtype in ("Int64", "Float64", "float64"):
+        values = pd.to_numeric(values, errors="coerce")
+        if dtype == "Int64" and not (values.dropna() % 1 == 0).all():
+            return values.astype("Float64")
+    return values.astype(dtype)
+
+
+def expand_responses(
+    df: pd.DataFrame,
+    schema: Optional[Mapping[str, str]] = None,
+    column: str = "response",
+    verbose: bool = True,
+) -> pd.DataFrame:
+    """Return a copy of ``df`` with the JSON ``response`` answers as columns.
+
+    Rows are decoded in bulk and each answer becomes a typed column.  The
+    columns come from ``SURVEY_SCHEMAS`` for each row's ``trial_type`` (a
+    row only gets the keys of its own trial type's schema; rows of other
+    trial types are left alone), or from ``schema`` -- ``{key: dtype}`` --
+    applied to every row instead.  Keys a response has beyond its schema
+    still become columns, left as plain objects, so no answer is dropped.
+
+    An answer column replaces a same-named column of ``df`` on the rows that
+    were expanded, as the notebooks' ``extract_survey_responses`` did.  Note
+    that the Likert answers are the raw 0-based choice indices; the top-level
+    ``skeptical_rating`` etc. columns the experiment stores are 1-based.
+    """
+    out = df.copy()
+    if schema is not None:
+        groups = {None: (pd.Series(True, index=df.index), dict(schema))}
+    else:
+        trial_type = df["trial_type"].astype(str)
+        groups = {
+            t: (trial_type == t, dict(s)) for t, s in SURVEY_SCHEMAS.items()
+            if (trial_type == t).any()
+        }
+    if not groups:
+        return out
+
+    rows = pd.concat([mask for mask, _ in groups.values()], axis=1).any(axis=1)
+    rows &= df[column].notna()
+    texts = df.loc[rows, column]
+    decoded = decode_responses(texts)
+    if verbose:
+        for idx, record in zip(texts.index, decoded):
+            if record is None:
+                print(f"Error parsing response for row {idx}: not a JSON object")
+
+    all_keys = list(dict.fromkeys(k for _, s in groups.values() for k in s))
+    records = [record or {} for record in decoded]
+    extra_keys = list(dict.fromkeys(k for r in records for k in r if k not in all_keys))
+    answers = pd.DataFrame.from_records(
+        records, columns=all_keys + extra_keys, index=texts.index
+    )
+
+    for key in all_keys + extra_keys:
+        if key in extra_keys:
+            dtype = "object"
+            owners = pd.Series([key in r for r in records], index=texts.index)
+        else:
+            dtype = next(s[key] for _, s in groups.values() if key in s)
+            owners = pd.concat(
+                [mask for mask, s in groups.values() if key in s], axis=1
+            ).any(axis=1).loc[texts.index]
+        values = _coerce(answers.loc[owners, key], dtype).reindex(out.index)
+        if key in out.columns:
+            values = values.where(values.index.isin(owners.index[owners]), out[key])
+        out[key] = values
+    return out
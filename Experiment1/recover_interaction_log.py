@@ -5,45 +5,371 @@ Accepts either:
   - A raw CSV file exported by the experiment (auto-detects the
     ``interaction_log`` column and ``phase`` column).
   - A plain JSON array of events (legacy format).
+  - A directory or glob of experiment CSVs (batch mode), rendered in
+    parallel across a process pool.
 
 For each interaction event with positional data this script reads
 ``data.x``, ``data.y``, and the event ``type``.
+
+The module can also be imported as a library (see ``__all__``), e.g. from
+the analysis notebooks::
+
+    from recover_interaction_log import iter_from_csv, extract_points, plot_points
+
+Importing it is cheap: NumPy, matplotlib, Pillow and the process pool are
+only loaded once something first needs them.
 """
 
-import argparse
+from __future__ import annotations
+
 import csv
+import glob
+import hashlib
+import importlib
 import json
+import mmap
+import os
+import re
 import sys
+import time
+import tracemalloc
+from array import array
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+__all__ = [
+    # Parsing
+    "JSON_BACKENDS", "set_json_backend", "strip_element_payloads",
+    "parse_events_json", "iter_from_csv", "load_from_csv", "NoInteractionRows",
+    "RowIndex", "build_row_index", "load_row_index", "row_index_path",
+    # Points
+    "EVENT_TYPES", "InteractionPoints", "extract_points", "decimate_points",
+    "EventLog", "parse_event_log",
+    # Rendering
+    "configure_screenshot_cache", "load_screenshot", "plot_points",
+    "render_points_raster", "composite_trace", "RENDERERS", "IMAGE_FORMATS",
+    "TYPE_COLORS", "DEFAULT_COLOR", "RASTER_STYLES", "hex_to_rgb", "raster_font",
+    "parse_resolution",
+    # Drivers
+    "ResultCache", "recover_csv", "recover_rows", "recover_batch",
+    "expand_inputs", "finish_result_cache",
+    # Profiling
+    "StageProfiler", "profiling", "profile_rows", "write_profile_report",
+    "main",
+]
+
+
+class _LazyModule:
+    """Stand-in for a heavy dependency, imported on first attribute access.
+
+    On first use the real module replaces the stand-in in this module's
+    globals, so later lookups cost nothing extra.
+    """
+
+    def __init__(self, name: str, alias: str, package: str) -> None:
+        self._name = name
+        self._alias = alias
+        self._package = package
+
+    def __getattr__(self, attr: str) -> Any:
+        try:
+            module = importlib.import_module(self._name)
+        except ImportError as exc:
+            raise RuntimeError(
+                f"{self._package} is required. Install it with: pip install {self._package}"
+            ) from exc
+        globals()[self._alias] = module
+        return getattr(module, attr)
+
+
+np: Any = _LazyModule("numpy", "np", "numpy")
+
+
+# ---------------------------------------------------------------------------
+# Profiling
+# ---------------------------------------------------------------------------
+
+class _StageTimer:
+    """A running stage measurement; :meth:`stop` records it."""
+
+    def __init__(self, profiler: "StageProfiler", name: str, fields: Dict[str, Any]) -> None:
+        self.profiler = profiler
+        self.name = name
+        self.fields = fields
+        self.mem_start = 0
+        if profiler.trace_memory:
+            tracemalloc.reset_peak()
+            self.mem_start = tracemalloc.get_traced_memory()[0]
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+
+    def stop(self, **fields: Any) -> None:
+        wall = time.perf_counter() - self.wall_start
+        cpu = time.process_time() - self.cpu_start
+        peak = None
+        if self.profiler.trace_memory:
+            peak = (tracemalloc.get_traced_memory()[1] - self.mem_start) / 2**20
+        self.fields.update(fields)
+        self.profiler.record(self.name, wall, cpu, peak, **self.fields)
+
+
+class _NullTimer:
+    def stop(self, **fields: Any) -> None:
+        pass
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class StageProfiler:
+    """Wall time, CPU time and traced peak memory per pipeline stage and row.
+
+    Records are attributed to ``source`` and ``phase``, which default to the
+    profiler's current values (the recovery drivers keep those up to date)
+    and can be overridden per stage.  Stages never nest, so each peak is the
+    memory a stage allocated on top of what was live when it started.
+    tracemalloc sees Python and NumPy allocations but not buffers allocated
+    natively by Pillow or matplotlib's Agg backend.  Activate with
+    :func:`profiling`.
+    """
+
+    def __init__(self, source: str = "", trace_memory: bool = True) -> None:
+        self.source = source
+        self.phase: Optional[int] = None
+        self.trace_memory = trace_memory
+        self.records: List[Dict[str, Any]] = []
+
+    def start(self, name: str, **fields: Any) -> _StageTimer:
+        return _StageTimer(self, name, fields)
+
+    @contextmanager
+    def stage(self, name: str, **fields: Any) -> Iterator[Dict[str, Any]]:
+        """Time the ``with`` body; counts added to the yielded dict (e.g.
+        ``events``, ``points``) are stored with the record."""
+        timer = self.start(name, **fields)
+        yield timer.fields
+        timer.stop()
+
+    def record(
+        self, name: str, wall: float, cpu: float, peak_mb: Optional[float], **fields: Any
+    ) -> None:
+        self.records.append({
+            "source": fields.pop("source", self.source),
+            "phase": fields.pop("phase", self.phase),
+            "stage": name,
+            "wall_s": wall,
+            "cpu_s": cpu,
+            "peak_mb": peak_mb,
+            **fields,
+        })
+
+
+# Active profiler of this process, if any; see profiling().
+_profiler: Optional[StageProfiler] = None
+
+
+@contextmanager
+def profiling(profiler: Optional[StageProfiler]) -> Iterator[Optional[StageProfiler]]:
+    """Make ``profiler`` the active one for the ``with`` body (no-op for None)."""
+    global _profiler
+    if profiler is None:
+        yield None
+        return
+    started_tracing = profiler.trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    previous, _profiler = _profiler, profiler
+    try:
+        yield profiler
+    finally:
+        _profiler = previous
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def _start_stage(name: str, **fields: Any) -> Any:
+    return _NULL_TIMER if _profiler is None else _profiler.start(name, **fields)
+
+
+def _stage(name: str, **fields: Any) -> Any:
+    return nullcontext({}) if _profiler is None else _profiler.stage(name, **fields)
+
+
+PROFILE_NAME = "recover_profile"
 
-# The interaction_log column can easily exceed the default 128 KB CSV field
-# size limit, so raise it before any CSV reading happens.
-csv.field_size_limit(sys.maxsize)
+
+def profile_rows(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Fold stage records into one summary per (source, phase) row.
+
+    Each summary has the row's total ``wall_s`` / ``cpu_s``, its largest
+    stage ``peak_mb``, the decoded ``events`` and extracted ``points``
+    counts, and per-stage totals under ``stages``.
+    """
+    rows: Dict[Tuple[str, Any], Dict[str, Any]] = {}
+    for r in records:
+        row = rows.get((r["source"], r["phase"]))
+        if row is None:
+            row = rows[(r["source"], r["phase"])] = {
+                "source": r["source"], "phase": r["phase"], "events": None,
+                "points": None, "wall_s": 0.0, "cpu_s": 0.0, "peak_mb": None,
+                "stages": {},
+            }
+        row["wall_s"] += r["wall_s"]
+        row["cpu_s"] += r["cpu_s"]
+        if r["peak_mb"] is not None:
+            row["peak_mb"] = max(row["peak_mb"] or 0.0, r["peak_mb"])
+        if "events" in r:
+            row["events"] = r["events"]
+        if r["stage"] == "extract":
+            row["points"] = r["points"]
+        stage = row["stages"].setdefault(r["stage"], {"wall_s": 0.0, "cpu_s": 0.0})
+        stage["wall_s"] += r["wall_s"]
+        stage["cpu_s"] += r["cpu_s"]
+    return list(rows.values())
+
+
+def profile_stages(records: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Total time, largest peak and call count per stage."""
+    stages: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        stage = stages.setdefault(
+            r["stage"], {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_mb": None}
+        )
+        stage["calls"] += 1
+        stage["wall_s"] += r["wall_s"]
+        stage["cpu_s"] += r["cpu_s"]
+        if r["peak_mb"] is not None:
+            stage["peak_mb"] = max(stage["peak_mb"] or 0.0, r["peak_mb"])
+    return stages
+
+
+def write_profile_report(records: List[Dict[str, Any]], output_dir: Path) -> List[Path]:
+    """Write ``recover_profile.json`` (rows, stage totals and raw records)
+    and ``recover_profile.csv`` (one line per record) into ``output_dir``."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+    json_path = output_dir / f"{PROFILE_NAME}.json"
+    csv_path = output_dir / f"{PROFILE_NAME}.csv"
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "rows": profile_rows(records),
+            "stages": profile_stages(records),
+            "records": records,
+        }, f, indent=2)
+    columns = ["source", "phase", "stage", "wall_s", "cpu_s", "peak_mb", "events", "points"]
+    with open(csv_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        writer.writerows(records)
+    return [json_path, csv_path]
 
 
 # ---------------------------------------------------------------------------
 # Parsing helpers
 # ---------------------------------------------------------------------------
 
-def parse_events_json(raw_text: str) -> List[dict[str, Any]]:
-    """Parse a raw JSON string (possibly CSV-escaped) into an event list."""
-    text = raw_text.strip()
-    if not text:
-        raise ValueError("Input is empty.")
+JSON_BACKENDS: Tuple[str, ...] = ("orjson", "ujson", "json")
+
+# Decoder used by parse_events_json; chosen by set_json_backend() below.
+JSON_BACKEND = "json"
+_json_loads: Callable[[str], Any] = json.loads
+
+
+def set_json_backend(name: str = "auto") -> str:
+    """Select the JSON decoder used for interaction logs and return its name.
+
+    ``"auto"`` picks the first installed library from ``JSON_BACKENDS``,
+    falling back to the stdlib ``json`` module.
+    """
+    global JSON_BACKEND, _json_loads
+    for candidate in (JSON_BACKENDS if name == "auto" else (name,)):
+        if candidate == "json":
+            loads = json.loads
+        else:
+            try:
+                loads = importlib.import_module(candidate).loads
+            except ImportError:
+                if name != "auto":
+                    raise ValueError(
+                        f"JSON backend '{name}' is not installed. "
+                        f"Install it with: pip install {name}"
+                    )
+                continue
+        JSON_BACKEND, _json_loads = candidate, loads
+        return candidate
+    raise ValueError(f"Unknown JSON backend '{name}'.")
+
+
+set_json_backend()
+
 
-    candidates = [text]
+# The experiment logs every event's DOM target under data.element (label,
+# tag, classes, path); it dominates the size of a log but is never needed to
+# recover positions.  JSON.stringify output always has it as
+# ``,"element":{...}`` with no nested objects inside.
+_ELEMENT_KEY = ',"element":{'
+_ELEMENT_RE = re.compile(r'\s*,\s*"element"\s*:\s*\{[^{}]*\}')
 
-    # Common when logs are exported from CSV as one quoted field.
+
+def strip_element_payloads(text: str) -> str:
+    """Remove every ``data.element`` object from a JSON event log string.
+
+    Returns ``text`` unchanged when it contains no element payloads or one of
+    them is not a flat object.
+    """
+    if _ELEMENT_KEY in text:
+        parts = text.split(_ELEMENT_KEY)
+        kept = [parts[0]]
+        for part in parts[1:]:
+            end = part.find("}")
+            if end < 0 or "{" in part[:end]:
+                return text
+            kept.append(part[end + 1:])
+        return "".join(kept)
+    if '"element"' in text:
+        # Pretty-printed logs such as input_log.json.
+        return _ELEMENT_RE.sub("", text)
+    return text
+
+
+def _decode_json(text: str, selective: bool) -> Any:
+    if selective:
+        stripped = strip_element_payloads(text)
+        if stripped is not text:
+            try:
+                return _json_loads(stripped)
+            except ValueError:
+                pass
+    return _json_loads(text)
+
+
+def _json_candidates(text: str) -> Iterator[str]:
+    yield text
+    # Common when logs are exported from CSV as one quoted field.  Only
+    # built if the text did not decode as-is.
     if text.startswith('"') and text.endswith('"') and '""' in text:
-        candidates.append(text[1:-1].replace('""', '"'))
+        yield text[1:-1].replace('""', '"')
+
+
+def parse_events_json(raw_text: str, selective: bool = False) -> List[dict[str, Any]]:
+    """Parse a raw JSON string (possibly CSV-escaped) into an event list.
+
+    With ``selective=True`` the ``data.element`` payload of each event is
+    dropped before decoding; the remaining fields (``type``, ``x``, ``y``,
+    ``timestamp``, ...) are all that extract_points reads.
+    """
+    text = raw_text.strip()
+    if not text:
+        raise ValueError("Input is empty.")
 
     last_error: Optional[Exception] = None
-    for candidate in candidates:
+    for candidate in _json_candidates(text):
         try:
-            parsed = json.loads(candidate)
+            parsed = _decode_json(candidate, selective)
             if isinstance(parsed, str):
-                parsed = json.loads(parsed)
+                parsed = _decode_json(parsed, selective)
             if not isinstance(parsed, list):
                 raise ValueError("Top-level JSON must be an array of events.")
             return parsed
@@ -53,23 +379,100 @@ def parse_events_json(raw_text: str) -> List[dict[str, Any]]:
     raise ValueError(f"Could not parse interaction log as JSON: {last_error}")
 
 
-def load_from_csv(
+def _row_info(events: Any, row_phase: Optional[int], fields: Dict[str, str]) -> Dict[str, Any]:
+    # Try to read screen resolution from the row (new data).
+    sw = (fields.get("screen_width") or "").strip()
+    sh = (fields.get("screen_height") or "").strip()
+    return {
+        "events": events,
+        "phase": row_phase,
+        "condition_id": fields.get("condition_id", ""),
+        "participant_id": fields.get("participant_id", ""),
+        "screen_width": int(float(sw)) if sw else None,
+        "screen_height": int(float(sh)) if sh else None,
+    }
+
+
+def _decode_log(log_raw: str, selective: bool, compact: bool) -> Any:
+    if compact:
+        return parse_event_log(log_raw)
+    return parse_events_json(log_raw, selective=selective)
+
+
+class NoInteractionRows(ValueError):
+    """Raised by :func:`iter_from_csv` when no row has interaction data."""
+
+
+def iter_from_csv(
     csv_path: Path,
     phase: Optional[int] = None,
-) -> List[Dict[str, Any]]:
-    """Read a CSV and return a list of dicts, one per matching prediction row.
+    selective: bool = False,
+    compact: bool = False,
+    row_index: Optional[bool] = None,
+    participant_id: Optional[str] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield one dict per matching prediction row of a CSV, parsing lazily.
 
     Each dict has keys: ``events`` (list), ``phase`` (int|None),
     ``condition_id``, ``participant_id``, ``screen_width``, ``screen_height``.
+    Only one row's ``interaction_log`` is held in memory at a time, so drop
+    the yielded dict before advancing to keep peak memory bounded by the
+    largest single row.  Raises :class:`NoInteractionRows` (a
+    ``ValueError``) once exhausted if no row matched.  ``selective`` is
+    passed on to :func:`parse_events_json`; with ``compact=True`` ``events``
+    is an :class:`EventLog` from :func:`parse_event_log` instead
+    (``selective`` is then ignored).  ``participant_id`` keeps only that
+    participant's rows.
+
+    With a fresh sidecar :class:`RowIndex` next to the CSV, only the
+    matching rows' ``interaction_log`` fields are read, by seeking straight
+    to them.  ``row_index=True`` builds (or refreshes) the sidecar first;
+    ``False`` always scans the whole file.
     """
-    results: List[Dict[str, Any]] = []
+    csv_path = Path(csv_path)
+    index = None if row_index is False else load_row_index(csv_path, build=bool(row_index))
+    if index is not None:
+        rows = _iter_indexed(csv_path, index, phase, selective, compact, participant_id)
+    else:
+        rows = _iter_scanned(csv_path, phase, selective, compact, participant_id)
+    found = False
+    for row_info in rows:
+        found = True
+        yield row_info
+        del row_info
+
+    if not found:
+        extra = f" for phase {phase}" if phase is not None else ""
+        if participant_id is not None:
+            extra += f" for participant {participant_id}"
+        raise NoInteractionRows(
+            f"No rows with interaction_log data found in {csv_path.name}{extra}."
+        )
+
+
+def _missing_log_column(csv_path: Path) -> ValueError:
+    return ValueError(
+        f"{csv_path.name} has no 'interaction_log' column. "
+        "Is this the right CSV?"
+    )
+
+
+def _iter_scanned(
+    csv_path: Path,
+    phase: Optional[int],
+    selective: bool,
+    compact: bool,
+    participant_id: Optional[str],
+) -> Iterator[Dict[str, Any]]:
+    # The interaction_log column can easily exceed the default 128 KB CSV
+    # field size limit.
+    csv.field_size_limit(sys.maxsize)
     with open(csv_path, newline="", encoding="utf-8") as fh:
         reader = csv.DictReader(fh)
         if "interaction_log" not in (reader.fieldnames or []):
-            raise ValueError(
-                f"{csv_path.name} has no 'interaction_log' column. "
-                "Is this the right CSV?"
-            )
+            raise _missing_log_column(csv_path)
+        # Reading time accumulates over skipped rows until a row is used.
+        read = _start_stage("csv_read", source=csv_path.name)
         for row in reader:
             log_raw = row.get("interaction_log", "").strip()
             if not log_raw:
@@ -81,40 +484,388 @@ def load_from_csv(
             # Filter by phase if requested.
             if phase is not None and row_phase != phase:
                 continue
+            if participant_id is not None and row.get("participant_id") != participant_id:
+                continue
 
+            read.stop(phase=row_phase)
             try:
-                events = parse_events_json(log_raw)
+                with _stage("decode", source=csv_path.name, phase=row_phase) as rec:
+                    events = _decode_log(log_raw, selective, compact)
+                    rec["events"] = len(events)
             except ValueError:
+                read = _start_stage("csv_read", source=csv_path.name)
                 continue
 
-            # Try to read screen resolution from the row (new data).
-            sw = row.get("screen_width", "").strip()
-            sh = row.get("screen_height", "").strip()
-
-            results.append({
-                "events": events,
-                "phase": row_phase,
-                "condition_id": row.get("condition_id", ""),
-                "participant_id": row.get("participant_id", ""),
-                "screen_width": int(float(sw)) if sw else None,
-                "screen_height": int(float(sh)) if sh else None,
-            })
+            row_info = _row_info(events, row_phase, row)
+            # Release the raw field before handing the parsed events out.
+            del row, log_raw, events
+            yield row_info
+            del row_info
+            read = _start_stage("csv_read", source=csv_path.name)
+
+
+def _iter_indexed(
+    csv_path: Path,
+    index: "RowIndex",
+    phase: Optional[int],
+    selective: bool,
+    compact: bool,
+    participant_id: Optional[str],
+) -> Iterator[Dict[str, Any]]:
+    if "interaction_log" not in index.columns:
+        raise _missing_log_column(csv_path)
+    filters = {} if participant_id is None else {"participant_id": participant_id}
+    wanted = index.select(phase=phase, **filters)
+    read = _start_stage("csv_read", source=csv_path.name)
+    for pos, log_raw in index.iter_logs(wanted):
+        log_raw = log_raw.strip()
+        if not log_raw:
+            continue
+        row_phase = index.phase(pos)
+        read.stop(phase=row_phase)
+        try:
+            with _stage("decode", source=csv_path.name, phase=row_phase) as rec:
+                events = _decode_log(log_raw, selective, compact)
+                rec["events"] = len(events)
+        except ValueError:
+            read = _start_stage("csv_read", source=csv_path.name)
+            continue
+        row_info = _row_info(events, row_phase, index.fields(pos))
+        del log_raw, events
+        yield row_info
+        del row_info
+        read = _start_stage("csv_read", source=csv_path.name)
+
+
+def load_from_csv(
+    csv_path: Path,
+    phase: Optional[int] = None,
+    selective: bool = False,
+    compact: bool = False,
+    row_index: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
+    """Read a CSV and return a list of dicts, one per matching prediction row.
+
+    Convenience wrapper around :func:`iter_from_csv` that keeps every row in
+    memory; prefer the iterator for long sessions, or ``compact=True`` to
+    keep whole studies in memory as :class:`EventLog` objects.
+    """
+    return list(iter_from_csv(
+        csv_path, phase=phase, selective=selective, compact=compact, row_index=row_index,
+    ))
+
+
+# ---------------------------------------------------------------------------
+# Row index
+# ---------------------------------------------------------------------------
+
+# A sidecar ``user_x.csv.rows.json`` records where every data row of a CSV
+# starts and ends, where its interaction_log field lies, and the few small
+# fields rows are selected by.  It is built with one vectorised pass over a
+# memory map of the file and is stale as soon as the CSV's size or mtime
+# changes.  The suffix keeps sidecars out of ``user_*.csv`` globs.
+ROW_INDEX_VERSION = 1
+ROW_INDEX_SUFFIX = ".rows.json"
+ROW_INDEX_FIELDS = (
+    "trial_type", "phase", "participant_id", "condition_id", "screen_width", "screen_height",
+)
+_SPAN_COLUMNS = ("offset", "length", "log_offset", "log_length")
+
+
+def row_index_path(csv_path: Path) -> Path:
+    """Path of the sidecar row index of ``csv_path``."""
+    csv_path = Path(csv_path)
+    return csv_path.with_name(csv_path.name + ROW_INDEX_SUFFIX)
+
+
+def _unquote_field(raw: bytes) -> str:
+    text = raw.decode("utf-8")
+    if len(text) >= 2 and text[0] == '"' and text[-1] == '"':
+        text = text[1:-1].replace('""', '"')
+    return text
+
+
+class RowIndex:
+    """Byte offsets of the data rows of one participant CSV.
+
+    ``rows`` holds one list per entry of ``_SPAN_COLUMNS`` and
+    ``ROW_INDEX_FIELDS``; position ``i`` in them is the ``i``-th non-blank
+    data row, matching the row order of ``pandas.read_csv``.  Offsets and
+    lengths are in bytes and cover the raw (still quoted) field or line,
+    without the line terminator.
+    """
+
+    def __init__(self, csv_path: Path, columns: List[str], rows: Dict[str, List[Any]]) -> None:
+        self.csv_path = Path(csv_path)
+        self.columns = columns
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows["offset"])
+
+    def __repr__(self) -> str:
+        return f"RowIndex({self.csv_path.name!r}, {len(self)} rows)"
+
+    def phase(self, pos: int) -> Optional[int]:
+        value = self.rows["phase"][pos].strip()
+        return int(value) if value else None
+
+    def fields(self, pos: int) -> Dict[str, str]:
+        """The ``ROW_INDEX_FIELDS`` of row ``pos`` as read from the CSV."""
+        return {key: self.rows[key][pos] for key in ROW_INDEX_FIELDS if key in self.columns}
+
+    def select(self, phase: Optional[int] = None, **filters: str) -> List[int]:
+        """Positions of the rows with an interaction log matching every filter.
+
+        ``filters`` compare ``ROW_INDEX_FIELDS`` such as ``trial_type`` or
+        ``participant_id`` against their text in the CSV.
+        """
+        for key in filters:
+            if key not in ROW_INDEX_FIELDS:
+                raise ValueError(f"Cannot select rows by '{key}'; use one of {ROW_INDEX_FIELDS}.")
+        lengths = self.rows["log_length"]
+        keep = []
+        for pos in range(len(self)):
+            if not lengths[pos]:
+                continue
+            if phase is not None and self.phase(pos) != phase:
+                continue
+            if any(self.rows[key][pos] != value for key, value in filters.items()):
+                continue
+            keep.append(pos)
+        return keep
+
+    def iter_logs(self, positions: Iterable[int]) -> Iterator[Tuple[int, str]]:
+        """Yield ``(pos, interaction_log)`` for each row, seeking to its field."""
+        offsets, lengths = self.rows["log_offset"], self.rows["log_length"]
+        with open(self.csv_path, "rb") as fh:
+            for pos in positions:
+                if not lengths[pos]:
+                    yield pos, ""
+                    continue
+                fh.seek(offsets[pos])
+                yield pos, _unquote_field(fh.read(lengths[pos]))
+
+
+_SCAN_CHUNK = 1 << 24     # bytes per vectorised step of _scan_fields
 
-    if not results:
-        extra = f" for phase {phase}" if phase is not None else ""
-        raise ValueError(
-            f"No rows with interaction_log data found in {csv_path.name}{extra}."
-        )
-    return results
+
+def _scan_fields(mm: mmap.mmap) -> Tuple[Any, Any, Any, bool]:
+    """Start and end of every CSV field, and the last field of every line.
+
+    A comma or newline separates fields unless an odd number of quotes
+    precedes it.  The file is scanned in chunks, carrying the quote parity
+    over, so memory stays bounded whatever its size.  Also reports whether
+    the quotes are balanced.
+    """
+    buf = np.frombuffer(mm, dtype=np.uint8)
+    try:
+        found, line_end_parts = [], []
+        parity = 0
+        for lo in range(0, len(buf), _SCAN_CHUNK):
+            chunk = buf[lo:lo + _SCAN_CHUNK]
+            quotes = np.flatnonzero(chunk == 34)
+            candidates = np.flatnonzero((chunk == 44) | (chunk == 10))
+            candidates = candidates[(np.searchsorted(quotes, candidates) + parity) % 2 == 0]
+            found.append(candidates + lo)
+            line_end_parts.append(chunk[candidates] == 10)
+            parity = (parity + len(quotes)) % 2
+        seps = np.concatenate(found)
+        is_line_end = np.concatenate(line_end_parts)
+        if not len(seps) or seps[-1] != len(buf) - 1 or not is_line_end[-1]:
+            # Last line without a trailing newline.
+            seps = np.append(seps, len(buf))
+            is_line_end = np.append(is_line_end, True)
+        starts = np.concatenate(([0], seps[:-1] + 1))
+        ends = seps
+        crlf = is_line_end & (ends > starts)
+        crlf[crlf] = buf[ends[crlf] - 1] == 13
+        ends[crlf] -= 1
+        return starts, ends, np.flatnonzero(is_line_end), parity == 0
+    finally:
+        # The mmap cannot be closed while NumPy still exports its buffer.
+        del buf
+
+
+def build_row_index(csv_path: Path, write: bool = True) -> RowIndex:
+    """Index the rows of ``csv_path`` and (with ``write``) save the sidecar.
+
+    Raises ``ValueError`` for an empty file, unbalanced quotes or a row with
+    a different number of fields than the header.  Failing to write the
+    sidecar (e.g. a read-only data directory) is not an error.
+    """
+    csv_path = Path(csv_path)
+    st = csv_path.stat()
+    if not st.st_size:
+        raise ValueError(f"{csv_path.name} is empty.")
+    with open(csv_path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        starts, ends, line_ends, balanced = _scan_fields(mm)
+        if not balanced:
+            raise ValueError(f"{csv_path.name} has an unterminated quoted field.")
+        first = np.concatenate(([0], line_ends[:-1] + 1))
+        counts = line_ends - first + 1
+        columns = [_unquote_field(mm[s:e]) for s, e in zip(starts[:counts[0]].tolist(),
+                                                           ends[:counts[0]].tolist())]
+        blank = (counts == 1) & (ends[line_ends] == starts[line_ends])
+        data = np.flatnonzero(~blank)
+        data = data[data > 0]
+        bad = data[counts[data] != len(columns)]
+        if len(bad):
+            raise ValueError(
+                f"{csv_path.name}: record {int(bad[0])} has {int(counts[bad[0]])} fields, "
+                f"expected {len(columns)}."
+            )
+        row_first = first[data]
+        rows: Dict[str, List[Any]] = {
+            "offset": starts[row_first].tolist(),
+            "length": (ends[row_first + len(columns) - 1] - starts[row_first]).tolist(),
+        }
+        if "interaction_log" in columns:
+            field = row_first + columns.index("interaction_log")
+            rows["log_offset"] = starts[field].tolist()
+            rows["log_length"] = (ends[field] - starts[field]).tolist()
+        else:
+            rows["log_offset"] = rows["log_length"] = [0] * len(data)
+        for key in ROW_INDEX_FIELDS:
+            if key in columns:
+                field = row_first + columns.index(key)
+                rows[key] = [
+                    _unquote_field(mm[s:e])
+                    for s, e in zip(starts[field].tolist(), ends[field].tolist())
+                ]
+            else:
+                rows[key] = [""] * len(data)
+    index = RowIndex(csv_path, columns, rows)
+    if write:
+        target = row_index_path(csv_path)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp, "w", encoding="utf-8") as out:
+                json.dump({
+                    "version": ROW_INDEX_VERSION,
+                    "size": st.st_size,
+                    "mtime_ns": st.st_mtime_ns,
+                    "columns": columns,
+                    "rows": rows,
+                }, out, separators=(",", ":"))
+            os.replace(tmp, target)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+    return index
+
+
+def load_row_index(csv_path: Path, build: bool = False) -> Optional[RowIndex]:
+    """The sidecar index of ``csv_path`` if it is fresh, else None.
+
+    With ``build=True`` a missing or stale sidecar is rebuilt instead.
+    """
+    csv_path = Path(csv_path)
+    try:
+        st = csv_path.stat()
+        with open(row_index_path(csv_path), "rb") as fh:
+            saved = _json_loads(fh.read())
+    except (OSError, ValueError):
+        saved = None
+    if (
+        isinstance(saved, dict)
+        and saved.get("version") == ROW_INDEX_VERSION
+        and saved.get("size") == st.st_size
+        and saved.get("mtime_ns") == st.st_mtime_ns
+    ):
+        return RowIndex(csv_path, saved["columns"], saved["rows"])
+    return build_row_index(csv_path) if build else None
 
 
 # ---------------------------------------------------------------------------
 # Point extraction
 # ---------------------------------------------------------------------------
 
-def extract_points(events: Iterable[dict[str, Any]]) -> List[Tuple[float, float, float, str]]:
-    """Extract (timestamp, x, y, event_type) from events that have positional data."""
-    points: List[Tuple[float, float, float, str]] = []
+# Event types get small integer codes in this order; anything else seen in a
+# log is appended after them by extract_points.
+EVENT_TYPES: Tuple[str, ...] = (
+    "chart_hover",
+    "chart_click",
+    "chart_enter",
+    "chart_leave",
+    "hover_enter",
+    "hover_leave",
+)
+
+
+@dataclass(frozen=True)
+class InteractionPoints:
+    """Struct-of-arrays container for extracted interaction points.
+
+    ``ts``, ``x`` and ``y`` are float64 arrays sorted by timestamp; ``codes``
+    holds each point's event type as an index into ``type_names``.
+    ``chart_x`` / ``chart_y`` (chart-relative coordinates, NaN where not
+    logged) are only filled when requested from extract_points.
+    """
+
+    ts: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    codes: np.ndarray
+    type_names: Tuple[str, ...] = EVENT_TYPES
+    chart_x: Optional[np.ndarray] = None
+    chart_y: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    def code_of(self, event_type: str) -> int:
+        """Integer code of ``event_type``, or -1 if it is not in this set."""
+        try:
+            return self.type_names.index(event_type)
+        except ValueError:
+            return -1
+
+    def mask(self, event_type: str) -> np.ndarray:
+        """Boolean mask selecting points of ``event_type``."""
+        return self.codes == self.code_of(event_type)
+
+    @property
+    def types(self) -> np.ndarray:
+        """Per-point event type names (object array; materialised on demand)."""
+        return np.asarray(self.type_names, dtype=object)[self.codes]
+
+    def types_present(self) -> List[str]:
+        """Event types that occur, in order of first appearance."""
+        present, first = np.unique(self.codes, return_index=True)
+        return [self.type_names[c] for c in present[np.argsort(first)]]
+
+    def take(self, index: np.ndarray) -> "InteractionPoints":
+        """Subset by boolean mask or integer index, keeping the type table."""
+        return InteractionPoints(
+            ts=self.ts[index],
+            x=self.x[index],
+            y=self.y[index],
+            codes=self.codes[index],
+            type_names=self.type_names,
+            chart_x=None if self.chart_x is None else self.chart_x[index],
+            chart_y=None if self.chart_y is None else self.chart_y[index],
+        )
+
+
+def extract_points(
+    events: Iterable[dict[str, Any]],
+    with_chart: bool = False,
+) -> InteractionPoints:
+    """Extract timestamp, x, y and event type from events that have positional data.
+
+    With ``with_chart=True`` the chart-relative ``chart_x`` / ``chart_y``
+    columns are extracted as well.  An :class:`EventLog` is read from its
+    columns without rebuilding event dicts.
+    """
+    if isinstance(events, EventLog):
+        return events.points(with_chart)
+    ts_col: List[float] = []
+    x_col: List[float] = []
+    y_col: List[float] = []
+    code_col: List[int] = []
+    chart_x_col: List[Any] = []
+    chart_y_col: List[Any] = []
+    type_codes: Dict[str, int] = {t: i for i, t in enumerate(EVENT_TYPES)}
 
     for event in events:
         if not isinstance(event, dict):
@@ -133,17 +884,501 @@ def extract_points(events: Iterable[dict[str, Any]]) -> List[Tuple[float, float,
         ts = data.get("timestamp", event.get("timestamp"))
 
         if isinstance(x, (int, float)) and isinstance(y, (int, float)) and isinstance(ts, (int, float)):
-            points.append((float(ts), float(x), float(y), str(event_type)))
+            event_type = str(event_type)
+            code = type_codes.get(event_type)
+            if code is None:
+                code = type_codes[event_type] = len(type_codes)
+            ts_col.append(ts)
+            x_col.append(x)
+            y_col.append(y)
+            code_col.append(code)
+            if with_chart:
+                cx = data.get("chart_x")
+                cy = data.get("chart_y")
+                chart_x_col.append(cx if isinstance(cx, (int, float)) else np.nan)
+                chart_y_col.append(cy if isinstance(cy, (int, float)) else np.nan)
+
+    ts_arr = np.asarray(ts_col, dtype=np.float64)
+    order = np.argsort(ts_arr, kind="stable")
+    chart_x = chart_y = None
+    if with_chart:
+        chart_x = np.asarray(chart_x_col, dtype=np.float64)[order]
+        chart_y = np.asarray(chart_y_col, dtype=np.float64)[order]
+    return InteractionPoints(
+        ts=ts_arr[order],
+        x=np.asarray(x_col, dtype=np.float64)[order],
+        y=np.asarray(y_col, dtype=np.float64)[order],
+        codes=np.asarray(code_col, dtype=np.int16)[order],
+        type_names=tuple(type_codes),
+        chart_x=chart_x,
+        chart_y=chart_y,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Compact event log
+# ---------------------------------------------------------------------------
 
-    points.sort(key=lambda p: p[0])
-    return points
+# Numeric fields stored as float64 columns (NaN where absent).  ``timestamp``
+# is the event's own; ``data_timestamp`` is ``data.timestamp``.
+_EVENT_COLUMNS: Tuple[str, ...] = (
+    "timestamp", "data_timestamp", "x", "y", "chart_x", "chart_y",
+)
+_DATA_NUMBERS: Tuple[Tuple[str, str], ...] = (
+    ("x", "x"), ("y", "y"), ("chart_x", "chart_x"), ("chart_y", "chart_y"),
+    ("timestamp", "data_timestamp"),
+)
+# Slot of each numeric data field in a builder row (see _EVENT_COLUMNS).
+_DATA_SLOTS: Dict[str, int] = {
+    field: _EVENT_COLUMNS.index(column) for field, column in _DATA_NUMBERS
+}
+# Exact types only: JSON numbers decode to int/float, and bools are kept as-is.
+_NUMBER_TYPES = frozenset((int, float))
+_NAN = float("nan")
+
+
+def _element_key(element: Dict[str, Any]) -> Any:
+    try:
+        return tuple(
+            (k, tuple(v) if type(v) is list else v) for k, v in element.items()
+        )
+    except TypeError:
+        return json.dumps(element, sort_keys=True)
+
+
+class EventLog:
+    """Array-backed interaction log with interned types, zones and elements.
+
+    Numeric fields live in float64 arrays (``timestamp``, ``data_timestamp``,
+    ``x``, ``y``, ``chart_x``, ``chart_y``; NaN where absent).  The event
+    ``type``, ``data.zone`` and ``data.element`` are stored as integer codes
+    into ``type_names``, ``zones`` and ``elements`` (-1 where absent), so an
+    element descriptor repeated on every hover event is kept only once.
+    Whatever does not fit these columns is kept per event in ``extras``
+    (``fields`` / ``data`` for leftover keys, ``event`` for non-object
+    entries).
+
+    An event costs about 60 bytes instead of the 1-2 KB of its parsed dicts.
+    Indexing and iterating rebuild plain event dicts (numbers come back as
+    floats), and :func:`extract_points` reads the columns directly.
+    """
+
+    __slots__ = _EVENT_COLUMNS + (
+        "type_codes", "zone_codes", "element_codes",
+        "type_names", "zones", "elements", "extras",
+    )
+
+    def __init__(
+        self,
+        columns: Dict[str, np.ndarray],
+        type_codes: np.ndarray,
+        zone_codes: np.ndarray,
+        element_codes: np.ndarray,
+        type_names: Tuple[str, ...],
+        zones: Tuple[str, ...],
+        elements: Tuple[Dict[str, Any], ...],
+        extras: Optional[Dict[int, Dict[str, Any]]] = None,
+    ) -> None:
+        for name in _EVENT_COLUMNS:
+            setattr(self, name, columns[name])
+        self.type_codes = type_codes
+        self.zone_codes = zone_codes
+        self.element_codes = element_codes
+        self.type_names = type_names
+        self.zones = zones
+        self.elements = elements
+        self.extras = extras or {}
+
+    @classmethod
+    def from_events(cls, events: Iterable[Any]) -> "EventLog":
+        """Build a log from already decoded event dicts."""
+        builder = _EventLogBuilder()
+        for event in events:
+            builder.append(event)
+        return builder.build()
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def __repr__(self) -> str:
+        return (
+            f"EventLog({len(self)} events, {len(self.type_names)} types, "
+            f"{len(self.zones)} zones, {len(self.elements)} elements)"
+        )
+
+    @property
+    def nbytes(self) -> int:
+        """Size of the per-event arrays in bytes (lookup tables excluded)."""
+        return sum(getattr(self, name).nbytes for name in _EVENT_COLUMNS) + (
+            self.type_codes.nbytes + self.zone_codes.nbytes + self.element_codes.nbytes
+        )
+
+    def event_types(self) -> np.ndarray:
+        """Per-event type names (object array; None where untyped)."""
+        table = np.asarray(self.type_names + (None,), dtype=object)
+        return table[self.type_codes]
+
+    def element(self, i: int) -> Optional[Dict[str, Any]]:
+        """The ``data.element`` descriptor of event ``i`` (shared, do not mutate)."""
+        code = int(self.element_codes[i])
+        return None if code < 0 else self.elements[code]
+
+    def __getitem__(self, i: int) -> Any:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError("event index out of range")
+        extra = self.extras.get(i, {})
+        if "event" in extra:
+            return extra["event"]
+        event: Dict[str, Any] = {}
+        code = int(self.type_codes[i])
+        if code >= 0:
+            event["type"] = self.type_names[code]
+        data: Dict[str, Any] = {}
+        for key, column in _DATA_NUMBERS:
+            value = getattr(self, column)[i]
+            if value == value:
+                data[key] = float(value)
+        code = int(self.zone_codes[i])
+        if code >= 0:
+            data["zone"] = self.zones[code]
+        code = int(self.element_codes[i])
+        if code >= 0:
+            data["element"] = dict(self.elements[code])
+        if data or "data" in extra:
+            data.update(extra.get("data", {}))
+            event["data"] = data
+        ts = self.timestamp[i]
+        if ts == ts:
+            event["timestamp"] = float(ts)
+        event.update(extra.get("fields", {}))
+        return event
+
+    def __iter__(self) -> Iterator[Any]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def points(self, with_chart: bool = False) -> InteractionPoints:
+        """Same result as ``extract_points(self, with_chart)``, vectorised."""
+        has_data_ts = ~np.isnan(self.data_timestamp)
+        ts = np.where(has_data_ts, self.data_timestamp, self.timestamp)
+        keep = (self.type_codes >= 0) & ~np.isnan(self.x) & ~np.isnan(self.y) & ~np.isnan(ts)
+        for i, extra in self.extras.items():
+            if "timestamp" in extra.get("data", {}):
+                # data.timestamp present but not a number: no fallback.
+                keep[i] = False
+        index = np.flatnonzero(keep)
+        index = index[np.argsort(ts[index], kind="stable")]
+
+        # Number types in the order extract_points would meet them.
+        codes = self.type_codes[index]
+        present, first = np.unique(codes, return_index=True)
+        type_codes = {t: i for i, t in enumerate(EVENT_TYPES)}
+        remap = np.zeros(len(self.type_names), dtype=np.int16)
+        for code in present[np.argsort(first)]:
+            name = self.type_names[code]
+            remap[code] = type_codes.setdefault(name, len(type_codes))
+        return InteractionPoints(
+            ts=ts[index],
+            x=self.x[index],
+            y=self.y[index],
+            codes=remap[codes],
+            type_names=tuple(type_codes),
+            chart_x=self.chart_x[index] if with_chart else None,
+            chart_y=self.chart_y[index] if with_chart else None,
+        )
+
+
+class _EventLogBuilder:
+    """Appends decoded events column by column; see EventLog."""
+
+    def __init__(self) -> None:
+        # One row per event: the _EVENT_COLUMNS values, then the type, zone
+        # and element codes.  Split into columns by build().
+        self.numbers = array("d")
+        self.codes = array("i")
+        self.type_index: Dict[str, int] = {t: i for i, t in enumerate(EVENT_TYPES)}
+        self.zone_index: Dict[str, int] = {}
+        self.element_index: Dict[Any, int] = {}
+        self.elements: List[Dict[str, Any]] = []
+        self.extras: Dict[int, Dict[str, Any]] = {}
+
+    def append(self, event: Any) -> None:
+        row = [_NAN] * len(_EVENT_COLUMNS)
+        type_code = zone_code = element_code = -1
+        extra: Dict[str, Any] = {}
+        if type(event) is not dict:
+            extra["event"] = event
+        else:
+            fields: Dict[str, Any] = {}
+            for key, value in event.items():
+                if key == "data" and type(value) is dict:
+                    leftover: Dict[str, Any] = {}
+                    for field, item in value.items():
+                        slot = _DATA_SLOTS.get(field)
+                        if slot is not None and type(item) in _NUMBER_TYPES:
+                            row[slot] = item
+                        elif field == "element" and type(item) is dict:
+                            element_code = self._intern_element(item)
+                        elif field == "zone" and type(item) is str:
+                            zone_code = self.zone_index.setdefault(item, len(self.zone_index))
+                        else:
+                            leftover[field] = item
+                    if leftover or not value:
+                        extra["data"] = leftover
+                elif key == "type" and type(value) is str and value:
+                    type_code = self.type_index.setdefault(value, len(self.type_index))
+                elif key == "timestamp" and type(value) in _NUMBER_TYPES:
+                    row[0] = value
+                else:
+                    fields[key] = value
+            if fields:
+                extra["fields"] = fields
+        if extra:
+            self.extras[len(self.codes) // 3] = extra
+        self.numbers.extend(row)
+        self.codes.extend((type_code, zone_code, element_code))
+
+    def _intern_element(self, element: Dict[str, Any]) -> int:
+        key = _element_key(element)
+        code = self.element_index.get(key)
+        if code is None:
+            code = self.element_index[key] = len(self.elements)
+            self.elements.append(element)
+        return code
+
+    def build(self) -> EventLog:
+        numbers = np.frombuffer(self.numbers, dtype=np.float64).reshape(-1, len(_EVENT_COLUMNS))
+        codes = np.frombuffer(self.codes, dtype=np.int32).reshape(-1, 3)
+        return EventLog(
+            columns={
+                name: np.ascontiguousarray(numbers[:, i])
+                for i, name in enumerate(_EVENT_COLUMNS)
+            },
+            type_codes=codes[:, 0].astype(np.int16),
+            zone_codes=np.ascontiguousarray(codes[:, 1]),
+            element_codes=np.ascontiguousarray(codes[:, 2]),
+            type_names=tuple(self.type_index),
+            zones=tuple(self.zone_index),
+            elements=tuple(self.elements),
+            extras=self.extras,
+        )
+
+
+def parse_event_log(raw_text: str) -> EventLog:
+    """Parse a raw JSON string (possibly CSV-escaped) straight into an EventLog.
+
+    Accepts the same inputs as :func:`parse_events_json`.  Decoded events
+    are released one by one as they are copied into the log's columns, so
+    only the compact form outlives the call.
+    """
+    events = parse_events_json(raw_text)
+    events.reverse()
+    builder = _EventLogBuilder()
+    while events:
+        builder.append(events.pop())
+    return builder.build()
+
+
+# ---------------------------------------------------------------------------
+# Trajectory simplification
+# ---------------------------------------------------------------------------
+
+# Only these dense mousemove streams are ever thinned; clicks, enter/leave
+# and any other event type are always kept.
+DECIMATED_TYPES: Tuple[str, ...] = ("chart_hover",)
+
+
+def _rdp_keep(xs: np.ndarray, ys: np.ndarray, epsilon: float) -> np.ndarray:
+    """Ramer-Douglas-Peucker: mask of vertices kept within ``epsilon`` px."""
+    n = len(xs)
+    keep = np.zeros(n, dtype=bool)
+    if n == 0:
+        return keep
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dx = xs[last] - xs[first]
+        dy = ys[last] - ys[first]
+        seg_x = xs[first + 1:last] - xs[first]
+        seg_y = ys[first + 1:last] - ys[first]
+        norm = np.hypot(dx, dy)
+        if norm == 0.0:
+            dist = np.hypot(seg_x, seg_y)
+        else:
+            dist = np.abs(seg_x * dy - seg_y * dx) / norm
+        i = int(np.argmax(dist))
+        if dist[i] > epsilon:
+            split = first + 1 + i
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+
+def decimate_points(
+    points: InteractionPoints,
+    resample_ms: Optional[float] = None,
+    min_distance: Optional[float] = None,
+    rdp_epsilon: Optional[float] = None,
+) -> InteractionPoints:
+    """Thin dense hover streams before plotting.
+
+    Applied in order to the ``DECIMATED_TYPES`` points only:
+
+    * ``resample_ms`` -- keep the first hover point in each time bucket of
+      that many milliseconds.
+    * ``min_distance`` -- collapse runs of consecutive hover points that
+      stay within the same ``min_distance``-px grid cell to their first.
+    * ``rdp_epsilon`` -- Ramer-Douglas-Peucker simplification of the hover
+      path with that tolerance in px.
+
+    Every other event is kept, and the result stays sorted by time.
+    """
+    hover_codes = [points.code_of(t) for t in DECIMATED_TYPES]
+    keep = ~np.isin(points.codes, hover_codes)
+    idx = np.flatnonzero(~keep)
+
+    if resample_ms and len(idx):
+        bucket = np.floor(points.ts[idx] / resample_ms)
+        _, first = np.unique(bucket, return_index=True)
+        idx = idx[first]
+    if min_distance and len(idx):
+        cell_x = np.floor(points.x[idx] / min_distance)
+        cell_y = np.floor(points.y[idx] / min_distance)
+        moved = np.ones(len(idx), dtype=bool)
+        moved[1:] = (cell_x[1:] != cell_x[:-1]) | (cell_y[1:] != cell_y[:-1])
+        idx = idx[moved]
+    if rdp_epsilon and len(idx):
+        idx = idx[_rdp_keep(points.x[idx], points.y[idx], rdp_epsilon)]
+
+    keep[idx] = True
+    return points.take(keep)
+
+
+# ---------------------------------------------------------------------------
+# Screenshot cache
+# ---------------------------------------------------------------------------
+
+class ScreenshotCache:
+    """Size-bounded LRU cache of decoded screenshots.
+
+    Entries are keyed by resolved path, mtime, file size and target scale,
+    so an edited screenshot is decoded afresh.  Cached arrays are marked
+    read-only and shared between renders; copy before modifying one.
+
+    When ``mmap_dir`` is set, each decoded image is also written there as a
+    ``.npy`` file and later loads memory-map it instead of decoding the PNG,
+    so process-pool workers on one machine decode a screenshot only once.
+    """
+
+    def __init__(self, max_bytes: int = 512 * 2**20, mmap_dir: Optional[Path] = None) -> None:
+        self.max_bytes = max_bytes
+        self.mmap_dir = mmap_dir
+        self._entries: "OrderedDict[Tuple[str, int, int, float], np.ndarray]" = OrderedDict()
+        self._nbytes = 0
+
+    def get(self, path: Path, scale: float = 1.0) -> np.ndarray:
+        """Return the decoded image at ``path``, resized by ``scale``."""
+        resolved = Path(path).resolve()
+        stat = resolved.stat()
+        key = (str(resolved), stat.st_mtime_ns, stat.st_size, float(scale))
+
+        img = self._entries.get(key)
+        if img is not None:
+            self._entries.move_to_end(key)
+            return img
+
+        img = self._load_mapped(key) if self.mmap_dir is not None else None
+        if img is None:
+            img = _decode_screenshot(resolved, scale)
+            if self.mmap_dir is not None:
+                self._store_mapped(key, img)
+        img.flags.writeable = False
+
+        # Memory-mapped pages belong to the OS page cache, not this process.
+        size = 0 if isinstance(img, np.memmap) else img.nbytes
+        if size <= self.max_bytes:
+            self._entries[key] = img
+            self._nbytes += size
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= 0 if isinstance(evicted, np.memmap) else evicted.nbytes
+        return img
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._nbytes = 0
+
+    def _mapped_path(self, key: Tuple[str, int, int, float]) -> Path:
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:16]
+        return self.mmap_dir / f"{Path(key[0]).stem}-{digest}.npy"
+
+    def _load_mapped(self, key: Tuple[str, int, int, float]) -> Optional[np.ndarray]:
+        try:
+            return np.load(self._mapped_path(key), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+
+    def _store_mapped(self, key: Tuple[str, int, int, float], img: np.ndarray) -> None:
+        target = self._mapped_path(key)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # Write under a unique name and rename so concurrent workers never
+        # map a half-written file.
+        tmp = target.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as fh:
+            np.save(fh, img)
+        os.replace(tmp, target)
+
+
+def _decode_screenshot(path: Path, scale: float) -> np.ndarray:
+    """Decode to an RGBA uint8 array (a quarter of matplotlib's float32)."""
+    try:
+        from PIL import Image
+    except ImportError as exc:
+        raise RuntimeError(
+            "Pillow is required. Install it with: pip install pillow"
+        ) from exc
+
+    with Image.open(path) as im:
+        im = im.convert("RGBA")
+        if scale != 1.0:
+            size = (max(1, round(im.width * scale)), max(1, round(im.height * scale)))
+            im = im.resize(size, Image.BILINEAR)
+        return np.asarray(im)
+
+
+_screenshot_cache = ScreenshotCache()
+
+
+def configure_screenshot_cache(
+    max_bytes: Optional[int] = None,
+    mmap_dir: Optional[Path] = None,
+) -> ScreenshotCache:
+    """Replace the process-wide screenshot cache and return the new one."""
+    global _screenshot_cache
+    _screenshot_cache = ScreenshotCache(
+        max_bytes if max_bytes is not None else _screenshot_cache.max_bytes,
+        mmap_dir,
+    )
+    return _screenshot_cache
+
+
+def load_screenshot(path: Path, scale: float = 1.0) -> np.ndarray:
+    """Decode a screenshot through the process-wide cache (read-only array)."""
+    return _screenshot_cache.get(path, scale)
 
 
 # ---------------------------------------------------------------------------
 # Plotting
 # ---------------------------------------------------------------------------
 
-_TYPE_COLORS: Dict[str, str] = {
+TYPE_COLORS: Dict[str, str] = {
     "chart_hover":  "#1f77b4",   # blue
     "chart_click":  "#d62728",   # red
     "chart_enter":  "#2ca02c",   # green
@@ -151,11 +1386,11 @@ _TYPE_COLORS: Dict[str, str] = {
     "hover_enter":  "#9467bd",   # purple
     "hover_leave":  "#8c564b",   # brown
 }
-_DEFAULT_COLOR = "#7f7f7f"       # grey for unknown types
+DEFAULT_COLOR = "#7f7f7f"        # grey for unknown types
 
 
 def plot_points(
-    points: List[Tuple[float, float, float, str]],
+    points: InteractionPoints,
     output_path: Path,
     title: Optional[str] = None,
     screenshot_path: Optional[Path] = None,
@@ -174,7 +1409,7 @@ def plot_points(
     try:
         import matplotlib.pyplot as plt
         import matplotlib.patches as mpatches
-        import matplotlib.image as mpimg
+        import matplotlib.colors as mcolors
     except ImportError as exc:
         raise RuntimeError(
             "matplotlib is required. Install it with: pip install matplotlib"
@@ -185,36 +1420,37 @@ def plot_points(
 
     src_w, src_h = source_resolution or (1920, 1080)
 
-    raw_xs = [x for _, x, _, _ in points]
-    raw_ys = [y for _, _, y, _ in points]
-    types  = [t for _, _, _, t in points]
+    raw_xs = points.x
+    raw_ys = points.y
 
-    # Map each point to its colour.
-    colors = [_TYPE_COLORS.get(t, _DEFAULT_COLOR) for t in types]
+    # Map each point to its colour: one RGBA row per event type, gathered
+    # by type code.
+    palette = mcolors.to_rgba_array(
+        [TYPE_COLORS.get(t, DEFAULT_COLOR) for t in points.type_names]
+    )
+    colors = palette[points.codes]
+    is_click = points.mask("chart_click")
 
     # Build legend handles for the types actually present.
-    seen_types: List[str] = []
-    for t in types:
-        if t not in seen_types:
-            seen_types.append(t)
-
     legend_handles = [
         mpatches.Patch(
-            color=_TYPE_COLORS.get(t, _DEFAULT_COLOR),
+            color=TYPE_COLORS.get(t, DEFAULT_COLOR),
             label=t,
         )
-        for t in seen_types
+        for t in points.types_present()
     ]
 
     if screenshot_path is not None:
         # --- Overlay mode: render trail on top of screenshot ---
-        img = mpimg.imread(str(screenshot_path))
+        with _stage("screenshot"):
+            img = load_screenshot(screenshot_path)
         img_h, img_w = img.shape[:2]
+        figure = _start_stage("figure")
 
         scale_x = img_w / src_w
         scale_y = img_h / src_h
-        xs = [x * scale_x for x in raw_xs]
-        ys = [y * scale_y for y in raw_ys]
+        xs = raw_xs * scale_x
+        ys = raw_ys * scale_y
 
         dpi = 100
         fig, ax = plt.subplots(
@@ -224,16 +1460,12 @@ def plot_points(
         ax.imshow(img, extent=[0, img_w, img_h, 0], aspect="auto")
 
         # Separate click events for larger, translucent markers
-        non_click = [(x, y, c) for x, y, c, t in zip(xs, ys, colors, types) if t != "chart_click"]
-        clicks = [(x, y, c) for x, y, c, t in zip(xs, ys, colors, types) if t == "chart_click"]
-
-        if non_click:
-            nc_xs, nc_ys, nc_cs = zip(*non_click)
-            ax.scatter(nc_xs, nc_ys, c=list(nc_cs), s=30, alpha=0.85,
+        non_click = ~is_click
+        if non_click.any():
+            ax.scatter(xs[non_click], ys[non_click], c=colors[non_click], s=30, alpha=0.85,
                        edgecolors="white", linewidths=0.5)
-        if clicks:
-            cl_xs, cl_ys, cl_cs = zip(*clicks)
-            ax.scatter(cl_xs, cl_ys, c=list(cl_cs), s=350, alpha=0.3,
+        if is_click.any():
+            ax.scatter(xs[is_click], ys[is_click], c=colors[is_click], s=350, alpha=0.3,
                        edgecolors="white", linewidths=1.0)
 
         ax.plot(xs, ys, linewidth=0.8, alpha=0.3, color="#ffffff")
@@ -253,29 +1485,28 @@ def plot_points(
             ncol=len(legend_handles), fontsize=8, frameon=False,
         )
         fig.tight_layout(rect=[0, 0.04, 1, 1])
+        figure.stop()
 
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        fig.savefig(output_path, dpi=dpi, bbox_inches="tight")
-        plt.close(fig)
+        with _stage("savefig"):
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            fig.savefig(output_path, dpi=dpi, bbox_inches="tight")
+            plt.close(fig)
 
     else:
         # --- Original mode: blank canvas with flipped Y ---
         xs = raw_xs
-        ys = [src_h - y for y in raw_ys]
+        ys = src_h - raw_ys
 
+        figure = _start_stage("figure")
         fig, ax = plt.subplots(figsize=(9, 7))
 
         # Separate click events for larger, translucent markers
-        non_click = [(x, y, c) for x, y, c, t in zip(xs, ys, colors, types) if t != "chart_click"]
-        clicks = [(x, y, c) for x, y, c, t in zip(xs, ys, colors, types) if t == "chart_click"]
-
-        if non_click:
-            nc_xs, nc_ys, nc_cs = zip(*non_click)
-            ax.scatter(nc_xs, nc_ys, c=list(nc_cs), s=20, alpha=0.9,
+        non_click = ~is_click
+        if non_click.any():
+            ax.scatter(xs[non_click], ys[non_click], c=colors[non_click], s=20, alpha=0.9,
                        edgecolors="none")
-        if clicks:
-            cl_xs, cl_ys, cl_cs = zip(*clicks)
-            ax.scatter(cl_xs, cl_ys, c=list(cl_cs), s=350, alpha=0.3,
+        if is_click.any():
+            ax.scatter(xs[is_click], ys[is_click], c=colors[is_click], s=350, alpha=0.3,
                        edgecolors="none")
 
         ax.plot(xs, ys, linewidth=0.8, alpha=0.25, color="#333333")
@@ -293,10 +1524,827 @@ def plot_points(
             ncol=len(legend_handles), fontsize=9, frameon=False,
         )
         fig.tight_layout(rect=[0, 0.04, 1, 1])
+        figure.stop()
+
+        with _stage("savefig"):
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            fig.savefig(output_path, dpi=180)
+            plt.close(fig)
+
+
+# ---------------------------------------------------------------------------
+# Raster rendering
+# ---------------------------------------------------------------------------
+
+# Marker geometry mirrors plot_points: scatter sizes are areas in pt^2, so a
+# marker of size s at 100 dpi is sqrt(s) * 100 / 72 px across.
+RASTER_STYLES: Dict[str, Dict[str, Any]] = {
+    "overlay": {
+        "dot_radius": 3.8, "dot_alpha": 0.85, "dot_edge": (255, 255, 255),
+        "click_radius": 13.0, "click_alpha": 0.3, "click_edge": (255, 255, 255),
+        "trail_color": (255, 255, 255), "trail_alpha": 0.3,
+    },
+    "standalone": {
+        "dot_radius": 3.1, "dot_alpha": 0.9, "dot_edge": None,
+        "click_radius": 13.0, "click_alpha": 0.3, "click_edge": None,
+        "trail_color": (51, 51, 51), "trail_alpha": 0.25,
+    },
+}
+_RASTER_BAND = 28        # px reserved above (title) and below (legend)
+
+# Encoder settings by output suffix.  PNG encoding of a full-size screenshot
+# costs several times the drawing itself; JPEG is ~10x cheaper still and is
+# meant for quick batch regeneration (--image-format jpg).
+IMAGE_FORMATS: Tuple[str, ...] = ("png", "jpg")
+_RASTER_ENCODERS: Dict[str, Tuple[str, Dict[str, Any]]] = {
+    ".jpg": ("JPEG", {"quality": 92}),
+    ".jpeg": ("JPEG", {"quality": 92}),
+}
+_PNG_ENCODER: Tuple[str, Dict[str, Any]] = ("PNG", {"compress_level": 1})
+
+
+def hex_to_rgb(color: str) -> Tuple[int, int, int]:
+    """Return the ``(r, g, b)`` of a ``#rrggbb`` colour."""
+    color = color.lstrip("#")
+    return (int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16))
+
+
+def raster_font(size: int) -> Any:
+    """Return Pillow's default font at ``size`` px (where Pillow supports it)."""
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single fixed-size bitmap font
+        return ImageFont.load_default()
+
+
+def _draw_markers(
+    layer: Any,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    rgb: np.ndarray,
+    radius: float,
+    alpha: float,
+    edge: Optional[Tuple[int, int, int]],
+) -> None:
+    from PIL import ImageDraw
+
+    draw = ImageDraw.Draw(layer)
+    a = round(alpha * 255)
+    boxes = np.column_stack([xs - radius, ys - radius, xs + radius, ys + radius]).tolist()
+    outline = None if edge is None else edge + (a,)
+    for box, (r, g, b) in zip(boxes, rgb.tolist()):
+        draw.ellipse(box, fill=(r, g, b, a), outline=outline)
+
+
+def composite_trace(
+    base: Any,
+    xs: np.ndarray,
+    ys: np.ndarray,
+    rgb: np.ndarray,
+    is_click: np.ndarray,
+    style: Dict[str, Any],
+    marker_scale: float = 1.0,
+) -> Any:
+    """Draw a trace over ``base`` (a PIL image) and return the RGBA result.
+
+    ``xs`` / ``ys`` are pixel positions in ``base``, ``rgb`` the per-point
+    colours and ``style`` one of ``RASTER_STYLES``; ``marker_scale``
+    shrinks the markers for thumbnails.
+    """
+    from PIL import Image, ImageDraw
+
+    size = base.size
+    non_click = ~is_click
+
+    # Each style layer is composited separately so its alpha matches the
+    # corresponding matplotlib artist; the trail is drawn last, on top.
+    layer = Image.new("RGBA", size, (0, 0, 0, 0))
+    _draw_markers(layer, xs[non_click], ys[non_click], rgb[non_click],
+                  style["dot_radius"] * marker_scale, style["dot_alpha"], style["dot_edge"])
+    if is_click.any():
+        clicks = Image.new("RGBA", size, (0, 0, 0, 0))
+        _draw_markers(clicks, xs[is_click], ys[is_click], rgb[is_click],
+                      style["click_radius"] * marker_scale, style["click_alpha"],
+                      style["click_edge"])
+        layer = Image.alpha_composite(layer, clicks)
+    if len(xs) > 1:
+        trail = Image.new("RGBA", size, (0, 0, 0, 0))
+        ImageDraw.Draw(trail).line(
+            np.column_stack([xs, ys]).ravel().tolist(),
+            fill=style["trail_color"] + (round(style["trail_alpha"] * 255),),
+            width=1,
+        )
+        layer = Image.alpha_composite(layer, trail)
+    return Image.alpha_composite(base.convert("RGBA"), layer)
+
+
+def render_points_raster(
+    points: InteractionPoints,
+    output_path: Path,
+    title: Optional[str] = None,
+    screenshot_path: Optional[Path] = None,
+    source_resolution: Optional[Tuple[int, int]] = None,
+) -> None:
+    """Fast alternative to :func:`plot_points` that skips matplotlib.
+
+    Draws the trail, hover dots and translucent click markers straight into
+    an RGBA buffer over the (cached) screenshot at its native resolution,
+    with the same colours, title and legend.  Without a screenshot the trace
+    is drawn on a white canvas the size of the source screen.  A ``.jpg``
+    ``output_path`` is written as JPEG, anything else as PNG.
+    """
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError as exc:
+        raise RuntimeError(
+            "Pillow is required. Install it with: pip install pillow"
+        ) from exc
+
+    if not points:
+        raise ValueError("No valid interaction points found.")
 
+    src_w, src_h = source_resolution or (1920, 1080)
+
+    if screenshot_path is not None:
+        with _stage("screenshot"):
+            base = Image.fromarray(load_screenshot(screenshot_path))
+        img_w, img_h = base.size
+        style = RASTER_STYLES["overlay"]
+    else:
+        img_w, img_h = src_w, src_h
+        base = Image.new("RGBA", (img_w, img_h), (255, 255, 255, 255))
+        style = RASTER_STYLES["standalone"]
+
+    draw_stage = _start_stage("draw")
+    scale_x = img_w / src_w
+    scale_y = img_h / src_h
+    xs = points.x * scale_x
+    ys = points.y * scale_y
+
+    palette = np.array(
+        [hex_to_rgb(TYPE_COLORS.get(t, DEFAULT_COLOR)) for t in points.type_names],
+        dtype=np.uint8,
+    )
+    rgb = palette[points.codes]
+    trace = composite_trace(base, xs, ys, rgb, points.mask("chart_click"), style)
+
+    # Title above, legend (and rescale note) below, as in plot_points.
+    canvas = Image.new("RGBA", (img_w, img_h + 2 * _RASTER_BAND), (255, 255, 255, 255))
+    canvas.paste(trace, (0, _RASTER_BAND))
+    draw = ImageDraw.Draw(canvas)
+    font = raster_font(14)
+    default_title = "Interaction Trace Overlay" if screenshot_path is not None else "Recovered Interaction Trace"
+    draw.text((img_w / 2, _RASTER_BAND / 2), title or default_title,
+              fill=(0, 0, 0), font=font, anchor="mm")
+
+    legend = [(t, hex_to_rgb(TYPE_COLORS.get(t, DEFAULT_COLOR))) for t in points.types_present()]
+    swatch, gap = 12, 24
+    widths = [swatch + 6 + draw.textlength(t, font=font) for t, _ in legend]
+    x = (img_w - (sum(widths) + gap * (len(widths) - 1))) / 2
+    y = img_h + _RASTER_BAND + _RASTER_BAND / 2
+    for (label, color), width in zip(legend, widths):
+        draw.rectangle([x, y - swatch / 2, x + swatch, y + swatch / 2], fill=color)
+        draw.text((x + swatch + 6, y), label, fill=(0, 0, 0), font=font, anchor="lm")
+        x += width + gap
+    if screenshot_path is not None and (scale_x != 1.0 or scale_y != 1.0):
+        subtitle = f"source {src_w}x{src_h} -> screenshot {img_w}x{img_h}"
+        draw.text((img_w - 6, y), subtitle, fill=(128, 128, 128),
+                  font=raster_font(10), anchor="rm")
+    draw_stage.stop()
+
+    with _stage("encode"):
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        fig.savefig(output_path, dpi=180)
-        plt.close(fig)
+        fmt, options = _RASTER_ENCODERS.get(output_path.suffix.lower(), _PNG_ENCODER)
+        canvas.convert("RGB").save(output_path, format=fmt, **options)
+
+
+RENDERERS: Dict[str, Callable[..., None]] = {
+    "matplotlib": plot_points,
+    "raster": render_points_raster,
+}
+
+
+# ---------------------------------------------------------------------------
+# Result cache
+# ---------------------------------------------------------------------------
+
+# Bump when rendering changes in a way that should invalidate cached PNGs.
+RENDER_VERSION = 1
+
+
+def points_digest(points: InteractionPoints) -> str:
+    """Content hash of the extracted points a render depends on."""
+    h = hashlib.blake2b(digest_size=16)
+    for column in (points.ts, points.x, points.y):
+        h.update(np.ascontiguousarray(column, dtype=np.float64).tobytes())
+    h.update(np.ascontiguousarray(points.codes, dtype=np.int16).tobytes())
+    h.update("\0".join(points.type_names).encode("utf-8"))
+    return h.hexdigest()
+
+
+_file_digests: Dict[Tuple[str, int, int], str] = {}
+
+
+def file_digest(path: Path) -> str:
+    """Content hash of a file, memoised per (path, mtime, size)."""
+    resolved = Path(path).resolve()
+    stat = resolved.stat()
+    key = (str(resolved), stat.st_mtime_ns, stat.st_size)
+    digest = _file_digests.get(key)
+    if digest is None:
+        h = hashlib.blake2b(digest_size=16)
+        with open(resolved, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        digest = _file_digests[key] = h.hexdigest()
+    return digest
+
+
+class ResultCache:
+    """Manifest of rendered PNGs and the content hash they were made from.
+
+    Lives as ``.recover_manifest.json`` in the output directory and maps each
+    output (relative to that directory) to its render key -- a hash of the
+    extracted points, the screenshot's content, the resolution, title and
+    renderer -- the source it came from and its slot.  An output whose key
+    is unchanged and whose file still exists is not rendered again.
+
+    A slot (see :meth:`slot`) names one way of rendering a source: its
+    output name, renderer and screenshot.  Rendering the same source under
+    another name or over another screenshot opens a new slot and leaves the
+    outputs of the old one alone.
+    """
+
+    NAME = ".recover_manifest.json"
+
+    def __init__(self, root: Path, entries: Optional[Dict[str, Dict[str, str]]] = None) -> None:
+        self.root = Path(root)
+        self.entries: Dict[str, Dict[str, str]] = dict(entries or {})
+
+    @classmethod
+    def load(cls, root: Path) -> "ResultCache":
+        """The manifest in ``root``; a missing or unreadable one starts empty."""
+        try:
+            with open(Path(root) / cls.NAME, encoding="utf-8") as fh:
+                saved = json.load(fh)
+        except (OSError, ValueError):
+            return cls(root)
+        outputs = saved.get("outputs") if isinstance(saved, dict) else None
+        if not isinstance(outputs, dict):
+            return cls(root)
+        return cls(root, {
+            name: entry for name, entry in outputs.items()
+            if isinstance(entry, dict) and "key" in entry and "source" in entry
+        })
+
+    def save(self) -> None:
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp = self.root / f"{self.NAME}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"version": RENDER_VERSION, "outputs": self.entries}, fh,
+                      indent=1, sort_keys=True)
+        os.replace(tmp, self.root / self.NAME)
+
+    @staticmethod
+    def key(
+        points: InteractionPoints,
+        title: Optional[str],
+        screenshot_path: Optional[Path],
+        resolution: Optional[Tuple[int, int]],
+        renderer: str,
+    ) -> str:
+        parts = [
+            str(RENDER_VERSION),
+            points_digest(points),
+            file_digest(screenshot_path) if screenshot_path is not None else "-",
+            f"{resolution[0]}x{resolution[1]}" if resolution else "-",
+            renderer,
+            title or "",
+        ]
+        return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=16).hexdigest()
+
+    @staticmethod
+    def slot(
+        default_output: Path, renderer: str, screenshot_path: Optional[Path],
+    ) -> str:
+        """Identity of one rendering configuration of a source."""
+        parts = [
+            str(Path(default_output).resolve()),
+            renderer,
+            str(Path(screenshot_path).resolve()) if screenshot_path is not None else "-",
+        ]
+        return hashlib.blake2b("|".join(parts).encode("utf-8"), digest_size=8).hexdigest()
+
+    def _name(self, output: Path) -> str:
+        return os.path.relpath(Path(output).resolve(), self.root.resolve())
+
+    def is_fresh(self, output: Path, key: str) -> bool:
+        entry = self.entries.get(self._name(output))
+        return entry is not None and entry["key"] == key and Path(output).exists()
+
+    def record(self, output: Path, key: str, source: str, slot: Optional[str] = None) -> None:
+        entry = {"key": key, "source": source}
+        if slot is not None:
+            entry["slot"] = slot
+        self.entries[self._name(output)] = entry
+
+    def orphans(self, produced: Dict[str, Dict[str, set]]) -> List[str]:
+        """Outputs whose source is gone, or whose slot was just re-rendered
+        without them.
+
+        ``produced`` maps each source processed in this run to its slots and
+        the output paths each of them yielded.  Outputs of other slots (or
+        recorded before slots existed) are only orphaned with their source.
+        """
+        current = {
+            source: {slot: {self._name(Path(o)) for o in outputs} for slot, outputs in slots.items()}
+            for source, slots in produced.items()
+        }
+        found = []
+        for name, entry in self.entries.items():
+            source, slot = entry["source"], entry.get("slot")
+            if slot is not None and slot in current.get(source, {}):
+                if name not in current[source][slot]:
+                    found.append(name)
+            elif not Path(source).exists():
+                found.append(name)
+        return sorted(found)
+
+    def remove(self, names: Iterable[str]) -> None:
+        """Delete orphaned PNGs and forget them."""
+        for name in names:
+            (self.root / name).unlink(missing_ok=True)
+            self.entries.pop(name, None)
+
+
+# ---------------------------------------------------------------------------
+# Recovery drivers
+# ---------------------------------------------------------------------------
+
+def recover_csv(
+    input_path: Path,
+    default_output: Path,
+    title: Optional[str] = None,
+    screenshot_path: Optional[Path] = None,
+    resolution: Optional[Tuple[int, int]] = None,
+    phase: Optional[int] = None,
+    renderer: str = "matplotlib",
+    cache: Optional[ResultCache] = None,
+    simplify: Optional[Dict[str, float]] = None,
+    row_index: Optional[bool] = None,
+) -> List[Dict[str, Any]]:
+    """Render every matching row of one experiment CSV.
+
+    ``renderer`` names an entry of ``RENDERERS``.  Returns one dict per row
+    with keys ``phase``, ``points`` (count plotted), ``raw_points`` (count
+    before simplification) and ``output`` (Path, or None when the row had
+    no interaction points), plus the render ``key`` and whether the output
+    was ``cached`` (see :func:`recover_rows`).  ``row_index`` is passed on to
+    :func:`iter_from_csv`.
+    """
+    rows = iter_from_csv(input_path, phase=phase, selective=True, row_index=row_index)
+    return recover_rows(
+        rows, input_path.stem, default_output, title, screenshot_path, resolution,
+        renderer, cache, simplify,
+    )
+
+
+def recover_rows(
+    rows: Iterable[Dict[str, Any]],
+    source_name: str,
+    default_output: Path,
+    title: Optional[str] = None,
+    screenshot_path: Optional[Path] = None,
+    resolution: Optional[Tuple[int, int]] = None,
+    renderer: str = "matplotlib",
+    cache: Optional[ResultCache] = None,
+    simplify: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """Render rows shaped like those of :func:`iter_from_csv`.
+
+    Each row carries either parsed ``events`` or already extracted
+    ``points`` (as yielded by the event store).  ``source_name`` stands in
+    for a missing participant_id in titles.  ``simplify`` holds keyword
+    arguments for :func:`decimate_points`, applied before rendering.
+    Outputs that ``cache`` reports fresh are not rendered again; the cache
+    itself is only read here, the caller records the returned keys and
+    ``slot`` (see :meth:`ResultCache.slot`).
+    """
+    render_fn = RENDERERS[renderer]
+    rendered: List[Dict[str, Any]] = []
+    slot = ResultCache.slot(default_output, renderer, screenshot_path)
+
+    # Rows are streamed, so whether the output needs a phase suffix (only
+    # when there are several rows) is unknown until the next row arrives.
+    # Hold back the previous row's extracted points -- never its events --
+    # and render it once that is settled.
+    pending: Optional[Dict[str, Any]] = None
+    n_rows = 0
+
+    def render(job: Dict[str, Any], multiple: bool) -> None:
+        if multiple:
+            out = default_output.with_stem(
+                f"{default_output.stem}_phase{job['phase']}"
+            )
+        else:
+            out = default_output
+        if _profiler is not None:
+            _profiler.phase = job["phase"]
+        key = None
+        if cache is not None:
+            with _stage("cache_key"):
+                key = ResultCache.key(
+                    job["points"], job["title"], screenshot_path, job["resolution"], renderer
+                )
+        cached = key is not None and cache.is_fresh(out, key)
+        if not cached:
+            render_fn(job["points"], out, job["title"], screenshot_path, job["resolution"])
+        rendered.append({
+            "phase": job["phase"], "points": len(job["points"]),
+            "raw_points": job["raw_points"], "output": out,
+            "key": key, "cached": cached, "slot": slot,
+        })
+
+    for row_info in rows:
+        n_rows += 1
+        if "points" in row_info:
+            points = row_info.pop("points")
+        else:
+            with _stage("extract", phase=row_info["phase"]) as rec:
+                points = extract_points(row_info.pop("events"))
+                rec["points"] = len(points)
+        if pending is not None:
+            render(pending, multiple=True)
+            pending = None
+        if not points:
+            rendered.append({
+                "phase": row_info["phase"], "points": 0, "raw_points": 0, "output": None,
+                "key": None, "cached": False, "slot": slot,
+            })
+            continue
+
+        # Use screen resolution from CSV if available and not overridden.
+        row_res = resolution
+        if row_res is None and row_info["screen_width"] and row_info["screen_height"]:
+            row_res = (row_info["screen_width"], row_info["screen_height"])
+
+        # Build title.
+        t = title
+        if t is None:
+            pid = row_info["participant_id"] or source_name
+            cond = row_info["condition_id"] or ""
+            t = f"{pid}  phase {row_info['phase']}"
+            if cond:
+                t += f"  ({cond})"
+
+        raw_points = len(points)
+        if simplify:
+            with _stage("simplify", phase=row_info["phase"]) as rec:
+                points = decimate_points(points, **simplify)
+                rec["points"] = len(points)
+        pending = {
+            "phase": row_info["phase"], "points": points, "raw_points": raw_points,
+            "title": t, "resolution": row_res,
+        }
+
+    if pending is not None:
+        render(pending, multiple=n_rows > 1)
+    return rendered
+
+
+def expand_inputs(pattern: str) -> List[Path]:
+    """Resolve a batch input (directory or glob) to a sorted list of CSVs."""
+    path = Path(pattern)
+    if path.is_dir():
+        return sorted(path.glob("user_*.csv"))
+    return sorted(Path(p) for p in glob.glob(pattern) if p.lower().endswith(".csv"))
+
+
+def _is_batch_input(pattern: str) -> bool:
+    return Path(pattern).is_dir() or glob.has_magic(pattern)
+
+
+def _recover_batch_file(
+    input_path: Path,
+    output_dir: Path,
+    screenshot_path: Optional[Path],
+    resolution: Optional[Tuple[int, int]],
+    phase: Optional[int],
+    renderer: str,
+    store_dir: Optional[Path] = None,
+    store_filters: Optional[Dict[str, str]] = None,
+    simplify: Optional[Dict[str, float]] = None,
+    profile: bool = False,
+    row_index: Optional[bool] = None,
+    image_format: str = "png",
+    cache: Optional[ResultCache] = None,
+) -> Dict[str, Any]:
+    """Process-pool worker: recover one CSV, never raising.
+
+    With ``store_dir`` set, ``input_path`` names a source in that event
+    store instead of a CSV on disk.  ``cache`` defaults to the one handed to
+    the pool initializer.  With ``profile`` the result carries the
+    :class:`StageProfiler` records of this file.
+    """
+    started = time.perf_counter()
+    cache = cache if cache is not None else _worker_result_cache
+    if store_dir is not None:
+        source = str((store_dir / "shards" / input_path.name).resolve())
+    else:
+        source = str(input_path.resolve())
+    profiler = StageProfiler(input_path.name) if profile else None
+    with profiling(profiler):
+        try:
+            default_output = output_dir / f"{input_path.stem}_recover.{image_format}"
+            if store_dir is not None:
+                rows = _open_store(store_dir).iter_rows(
+                    input_path.name, phase=phase, **(store_filters or {})
+                )
+                rendered = recover_rows(
+                    rows, input_path.name, default_output,
+                    screenshot_path=screenshot_path,
+                    resolution=resolution,
+                    renderer=renderer,
+                    cache=cache,
+                    simplify=simplify,
+                )
+            else:
+                rendered = recover_csv(
+                    input_path,
+                    default_output,
+                    screenshot_path=screenshot_path,
+                    resolution=resolution,
+                    phase=phase,
+                    renderer=renderer,
+                    cache=cache,
+                    simplify=simplify,
+                    row_index=row_index,
+                )
+            error = None
+        except Exception as exc:
+            rendered = []
+            error = f"{type(exc).__name__}: {exc}"
+    return {
+        "input": input_path,
+        "source": source,
+        "rendered": rendered,
+        "error": error,
+        "seconds": time.perf_counter() - started,
+        "profile": profiler.records if profiler is not None else None,
+    }
+
+
+_stores: Dict[Path, Any] = {}
+
+
+def _open_store(store_dir: Path) -> Any:
+    """Open (once per process) the event store built by interaction_store.py."""
+    store = _stores.get(store_dir)
+    if store is None:
+        from interaction_store import EventStore
+
+        store = _stores[store_dir] = EventStore(store_dir)
+    return store
+
+
+_worker_result_cache: Optional[ResultCache] = None
+
+
+def _init_batch_worker(
+    json_backend: str,
+    cache_max_bytes: int,
+    cache_mmap_dir: Optional[Path],
+    result_cache: Optional[ResultCache],
+) -> None:
+    """Carry the parent's decoder and cache settings into a pool worker."""
+    global _worker_result_cache
+    set_json_backend(json_backend)
+    configure_screenshot_cache(cache_max_bytes, cache_mmap_dir)
+    _worker_result_cache = result_cache
+
+
+def record_results(
+    cache: ResultCache, results: List[Dict[str, Any]],
+) -> Dict[str, Dict[str, set]]:
+    """Record rendered outputs in ``cache``; return outputs per processed
+    source and slot.
+
+    Sources that failed are left out, so their outputs are never mistaken
+    for orphans.
+    """
+    produced: Dict[str, Dict[str, set]] = {}
+    for result in results:
+        if result["error"] is not None:
+            continue
+        slots = produced.setdefault(result["source"], {})
+        for row in result["rendered"]:
+            slot = row.get("slot")
+            outputs = slots.setdefault(slot, set()) if slot is not None else set()
+            if row["output"] is None or row["key"] is None:
+                continue
+            cache.record(row["output"], row["key"], result["source"], slot)
+            outputs.add(str(row["output"]))
+    return produced
+
+
+def finish_result_cache(
+    cache: ResultCache,
+    results: List[Dict[str, Any]],
+    clean_orphans: bool = False,
+    complete: bool = True,
+) -> None:
+    """Record ``results``, report or delete orphaned outputs, save the manifest.
+
+    ``complete`` says the run rendered every row of its sources (no phase or
+    participant filter), so an older output of a processed source and slot
+    that was not produced again is stale.  Otherwise only outputs of
+    vanished sources count as orphans.
+    """
+    produced = record_results(cache, results)
+    orphans = cache.orphans(produced if complete else {})
+    if orphans and clean_orphans:
+        cache.remove(orphans)
+        print(f"Removed {len(orphans)} orphaned output(s)")
+    elif orphans:
+        print(
+            f"{len(orphans)} orphaned output(s) in {cache.root}/ "
+            "(rerun with --clean-orphans to delete them)"
+        )
+    cache.save()
+
+
+def recover_batch(
+    inputs: List[Path],
+    output_dir: Path,
+    screenshot_path: Optional[Path] = None,
+    resolution: Optional[Tuple[int, int]] = None,
+    phase: Optional[int] = None,
+    jobs: Optional[int] = None,
+    renderer: str = "matplotlib",
+    store_dir: Optional[Path] = None,
+    store_filters: Optional[Dict[str, str]] = None,
+    cache: Optional[ResultCache] = None,
+    simplify: Optional[Dict[str, float]] = None,
+    profile: bool = False,
+    row_index: Optional[bool] = None,
+    image_format: str = "png",
+) -> List[Dict[str, Any]]:
+    """Recover many CSVs, spreading files over a process pool.
+
+    A file that fails to load or render is reported and skipped; it never
+    aborts the rest of the batch.  ``jobs=1`` runs everything in-process.
+    With ``store_dir`` set, ``inputs`` are source names in that event store.
+    Outputs that are fresh in ``cache`` are skipped; record the results with
+    :func:`record_results` afterwards.  With ``profile`` every result
+    carries its stage records (see :class:`StageProfiler`).  ``row_index``
+    is passed on to :func:`iter_from_csv` for every CSV.  Outputs are
+    written as ``image_format`` (one of ``IMAGE_FORMATS``).
+    """
+    jobs = jobs or os.cpu_count() or 1
+    worker_args = [
+        (
+            p, output_dir, screenshot_path, resolution, phase, renderer,
+            store_dir, store_filters, simplify, profile, row_index, image_format,
+        )
+        for p in inputs
+    ]
+    results: List[Dict[str, Any]] = []
+
+    def report(result: Dict[str, Any]) -> None:
+        name = result["input"].name
+        if result["error"] is not None:
+            print(f"  FAILED {name}: {result['error']}")
+        else:
+            images = [r for r in result["rendered"] if r["output"] is not None]
+            n_points = sum(r["points"] for r in result["rendered"])
+            n_raw = sum(r["raw_points"] for r in result["rendered"])
+            n_cached = sum(1 for r in images if r["cached"])
+            cached_note = f", {n_cached} unchanged" if n_cached else ""
+            print(
+                f"  {name}: {len(images)} image(s){cached_note}, "
+                f"{_points_note(n_points, n_raw)} ({result['seconds']:.1f}s)"
+            )
+        results.append(result)
+
+    if jobs == 1 or len(inputs) <= 1:
+        for args in worker_args:
+            report(_recover_batch_file(*args, cache=cache))
+    else:
+        from concurrent.futures import ProcessPoolExecutor, as_completed
+
+        with ProcessPoolExecutor(
+            max_workers=min(jobs, len(inputs)),
+            initializer=_init_batch_worker,
+            initargs=(
+                JSON_BACKEND, _screenshot_cache.max_bytes, _screenshot_cache.mmap_dir, cache,
+            ),
+        ) as pool:
+            futures = [pool.submit(_recover_batch_file, *args) for args in worker_args]
+            for future in as_completed(futures):
+                report(future.result())
+    return results
+
+
+def profile_slowest_row(
+    rows: List[Dict[str, Any]],
+    inputs: Dict[str, Path],
+    dump_path: Path,
+    screenshot_path: Optional[Path] = None,
+    resolution: Optional[Tuple[int, int]] = None,
+    renderer: str = "matplotlib",
+    store_dir: Optional[Path] = None,
+    store_filters: Optional[Dict[str, str]] = None,
+    simplify: Optional[Dict[str, float]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Re-run the slowest of ``rows`` (see :func:`profile_rows`) under
+    cProfile and dump the stats to ``dump_path``.
+
+    ``inputs`` maps row sources back to the CSV (or event store source) they
+    came from.  The row is rendered into a scratch directory, bypassing the
+    result cache.  Returns the row profiled, or None if there was none.
+    """
+    import cProfile
+    import tempfile
+
+    candidates = [r for r in rows if r["source"] in inputs]
+    if not candidates:
+        return None
+    slowest = max(candidates, key=lambda r: r["wall_s"])
+    input_path = inputs[slowest["source"]]
+
+    with tempfile.TemporaryDirectory(prefix="recover_profile_") as tmp:
+        out = Path(tmp) / f"{input_path.stem}_recover.png"
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            if store_dir is not None:
+                store_rows = _open_store(store_dir).iter_rows(
+                    input_path.name, phase=slowest["phase"], **(store_filters or {})
+                )
+                recover_rows(
+                    store_rows, input_path.name, out, None, screenshot_path,
+                    resolution, renderer, None, simplify,
+                )
+            else:
+                recover_csv(
+                    input_path, out, None, screenshot_path, resolution,
+                    slowest["phase"], renderer, None, simplify,
+                )
+        finally:
+            profiler.disable()
+    profiler.dump_stats(str(dump_path))
+    return slowest
+
+
+def _report_profile(
+    records: List[Dict[str, Any]],
+    output_dir: Path,
+    cprofile: bool,
+    inputs: Dict[str, Path],
+    **rerun: Any,
+) -> None:
+    """Write the profile report and print per-stage totals (CLI helper)."""
+    paths = write_profile_report(records, output_dir)
+    stages = profile_stages(records)
+    print(f"Profile ({len(profile_rows(records))} row(s)):")
+    for name, st in sorted(stages.items(), key=lambda item: -item[1]["wall_s"]):
+        peak = f"{st['peak_mb']:8.1f} MB peak" if st["peak_mb"] is not None else ""
+        print(
+            f"  {name:<11} {st['wall_s']:8.3f}s wall {st['cpu_s']:8.3f}s cpu "
+            f"{peak}  ({st['calls']} call(s))"
+        )
+    print(f"Profile written to {', '.join(str(p) for p in paths)}")
+    if cprofile:
+        dump_path = output_dir / f"{PROFILE_NAME}_slowest.prof"
+        row = profile_slowest_row(profile_rows(records), inputs, dump_path, **rerun)
+        if row is not None:
+            print(
+                f"cProfile of slowest row ({row['source']} phase {row['phase']}, "
+                f"{row['wall_s']:.2f}s) written to {dump_path}"
+            )
+
+
+def _points_note(kept: int, raw: int) -> str:
+    """``"N points"``, plus the reduction when simplification dropped some."""
+    if kept == raw:
+        return f"{kept} points"
+    ratio = raw / kept if kept else float("inf")
+    return f"{kept}/{raw} points ({ratio:.1f}x reduction)"
+
+
+def parse_resolution(value: Optional[str]) -> Optional[Tuple[int, int]]:
+    """Parse a ``WxH`` string (e.g. ``"1920x1080"``); None for an empty value."""
+    if not value:
+        return None
+    parts = value.lower().split("x")
+    if len(parts) != 2:
+        raise ValueError(
+            f"Invalid resolution format '{value}', "
+            "expected WxH (e.g. 1920x1080)"
+        )
+    return (int(parts[0]), int(parts[1]))
 
 
 # ---------------------------------------------------------------------------
@@ -304,17 +2352,24 @@ def plot_points(
 # ---------------------------------------------------------------------------
 
 def main() -> None:
+    import argparse
+
     parser = argparse.ArgumentParser(
         description="Recover interaction log to PNG. "
-        "Accepts a raw experiment CSV or a plain JSON event array.",
+        "Accepts a raw experiment CSV, a plain JSON event array, or "
+        "(batch mode) a directory / glob of experiment CSVs.",
     )
     parser.add_argument(
         "input",
-        help="Path to input file (.csv with interaction_log column, or .json array).",
+        help="Path to input file (.csv with interaction_log column, or .json array). "
+             "A directory (all user_*.csv inside) or a quoted glob such as "
+             "'data/user_*.csv' switches to batch mode; so does an event store "
+             "directory built by interaction_store.py.",
     )
     parser.add_argument(
         "output", nargs="?", default=None,
-        help="Output PNG path (default: derived from screenshot or input name).",
+        help="Output PNG path (default: derived from screenshot or input name). "
+             "In batch mode this is the output directory (default: recovered/).",
     )
     parser.add_argument("--title", default=None, help="Optional plot title.")
     parser.add_argument(
@@ -332,77 +2387,233 @@ def main() -> None:
         help="Which phase to extract from a CSV (1 or 2). "
              "If omitted, all prediction-task rows with interaction data are used.",
     )
+    parser.add_argument(
+        "--participant", default=None,
+        help="Event store input only: render just this participant_id.",
+    )
+    parser.add_argument(
+        "--condition", default=None,
+        help="Event store input only: render just this condition_id.",
+    )
+    parser.add_argument(
+        "-j", "--jobs", default=None, type=int, metavar="N",
+        help="Batch mode: number of worker processes (default: CPU count).",
+    )
+    parser.add_argument(
+        "--renderer", default="matplotlib", choices=tuple(RENDERERS),
+        help="Rendering engine: 'matplotlib' (publication quality, default) "
+             "or 'raster' (draws straight into the screenshot buffer; much "
+             "faster for batch regeneration).",
+    )
+    parser.add_argument(
+        "--image-format", default="png", choices=IMAGE_FORMATS,
+        help="Format of derived output names (default: png).  'jpg' encodes "
+             "about 10x faster than PNG and suits quick batch regeneration "
+             "with --renderer raster.",
+    )
+    parser.add_argument(
+        "--json-backend", default="auto", choices=("auto",) + JSON_BACKENDS,
+        help="JSON decoder for interaction logs (default: fastest installed).",
+    )
+    parser.add_argument(
+        "--screenshot-cache", default=None, metavar="DIR",
+        help="Directory for memory-mapped decoded screenshots, shared by "
+             "batch workers so each screenshot is decoded once per machine.",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Re-render every output, even if its inputs are unchanged since "
+             "the last run (see .recover_manifest.json in the output directory).",
+    )
+    parser.add_argument(
+        "--clean-orphans", action="store_true",
+        help="Delete previously rendered PNGs whose source CSV or row is gone.",
+    )
+    parser.add_argument(
+        "--resample-ms", default=None, type=float, metavar="MS",
+        help="Simplify hover traces: keep at most one chart_hover point per "
+             "MS milliseconds.  Clicks and enter/leave events are always kept.",
+    )
+    parser.add_argument(
+        "--min-distance", default=None, type=float, metavar="PX",
+        help="Simplify hover traces: drop chart_hover points that stay within "
+             "the same PX-sized cell as the previous one.",
+    )
+    parser.add_argument(
+        "--rdp-epsilon", default=None, type=float, metavar="PX",
+        help="Simplify hover traces with Ramer-Douglas-Peucker at a tolerance "
+             "of PX (logged pixels).",
+    )
+    parser.add_argument(
+        "--profile", action="store_true",
+        help="Record wall/CPU time and peak memory per stage and row, and "
+             "write recover_profile.json / .csv next to the PNGs.  Memory "
+             "tracing slows the run down noticeably.",
+    )
+    parser.add_argument(
+        "--cprofile", action="store_true",
+        help="With --profile: re-run the slowest row under cProfile and save "
+             "recover_profile_slowest.prof (inspect with python -m pstats).",
+    )
+    parser.add_argument(
+        "--row-index", action="store_true", default=None,
+        help="Build (or refresh) a byte-offset index next to each CSV "
+             "(user_*.csv.rows.json) and seek straight to the matching rows "
+             "instead of parsing the whole file.  Fresh indexes are used "
+             "even without this flag.",
+    )
+    parser.add_argument(
+        "--screenshot-cache-mb", default=512, type=int, metavar="MB",
+        help="In-process decoded screenshot cache size (default: 512).",
+    )
     args = parser.parse_args()
 
     try:
-        input_path = Path(args.input)
+        set_json_backend(args.json_backend)
+        configure_screenshot_cache(
+            args.screenshot_cache_mb * 2**20,
+            Path(args.screenshot_cache) if args.screenshot_cache else None,
+        )
         ss = Path(args.screenshot) if args.screenshot else None
+        res = parse_resolution(args.resolution)
+        mode = "overlay" if ss else "standalone"
+        simplify = {
+            name: value
+            for name, value in (
+                ("resample_ms", args.resample_ms),
+                ("min_distance", args.min_distance),
+                ("rdp_epsilon", args.rdp_epsilon),
+            )
+            if value is not None
+        }
+        for name, value in simplify.items():
+            if value <= 0:
+                raise ValueError(f"--{name.replace('_', '-')} must be positive, got {value}")
+
+        # Imported here so importing this module stays cheap.
+        from interaction_store import is_store
+
+        store_input = is_store(Path(args.input))
+        if not store_input and (args.participant is not None or args.condition is not None):
+            raise ValueError("--participant and --condition only apply to event store input.")
+
+        if _is_batch_input(args.input):
+            store_dir: Optional[Path] = None
+            store_filters: Dict[str, str] = {}
+            if store_input:
+                # Event store: one batch item per source with matching rows.
+                store_dir = Path(args.input)
+                if args.participant is not None:
+                    store_filters["participant_id"] = args.participant
+                if args.condition is not None:
+                    store_filters["condition_id"] = args.condition
+                segments = _open_store(store_dir).segments(phase=args.phase, **store_filters)
+                inputs = [Path(name) for name in sorted({s["source"] for s in segments})]
+                if not inputs:
+                    raise ValueError(f"No matching rows in event store '{args.input}'.")
+            else:
+                inputs = expand_inputs(args.input)
+                if not inputs:
+                    raise ValueError(f"No CSV files match '{args.input}'.")
+            output_dir = Path(args.output or "recovered")
+            print(f"Recovering {len(inputs)} file(s) -> {output_dir}/ ({mode})")
+
+            cache = ResultCache(output_dir) if args.force else ResultCache.load(output_dir)
+            started = time.perf_counter()
+            results = recover_batch(
+                inputs, output_dir, ss, res, args.phase, args.jobs, args.renderer,
+                store_dir, store_filters, cache, simplify, args.profile, args.row_index,
+                args.image_format,
+            )
+            elapsed = time.perf_counter() - started
+            if args.force:
+                # Keep entries for sources outside this run.
+                cache.entries = ResultCache.load(output_dir).entries
+            complete = args.phase is None and not store_filters
+            finish_result_cache(cache, results, args.clean_orphans, complete)
+
+            failed = [r for r in results if r["error"] is not None]
+            images = [
+                row for r in results for row in r["rendered"] if row["output"] is not None
+            ]
+            n_cached = sum(1 for row in images if row["cached"])
+            n_points = sum(row["points"] for r in results for row in r["rendered"])
+            n_raw = sum(row["raw_points"] for r in results for row in r["rendered"])
+            print(
+                f"Done: {len(results) - len(failed)} file(s) ok, {len(failed)} failed, "
+                f"{len(images)} image(s) ({n_cached} unchanged), "
+                f"{_points_note(n_points, n_raw)} in {elapsed:.1f}s"
+            )
+            if args.profile:
+                _report_profile(
+                    [rec for r in results for rec in (r["profile"] or [])],
+                    output_dir, args.cprofile,
+                    {r["input"].name: r["input"] for r in results if r["error"] is None},
+                    screenshot_path=ss, resolution=res, renderer=args.renderer,
+                    store_dir=store_dir, store_filters=store_filters, simplify=simplify,
+                )
+            if failed:
+                sys.exit(1)
+            return
+
+        input_path = Path(args.input)
 
         # Derive default output base from screenshot name (or input name).
         if args.output is not None:
             default_output = args.output
         elif ss is not None:
-            default_output = f"{ss.stem}_recover.png"
+            default_output = f"{ss.stem}_recover.{args.image_format}"
         else:
-            default_output = f"{input_path.stem}_recover.png"
-
-        res = None
-        if args.resolution:
-            parts = args.resolution.lower().split("x")
-            if len(parts) != 2:
-                raise ValueError(
-                    f"Invalid resolution format '{args.resolution}', "
-                    "expected WxH (e.g. 1920x1080)"
-                )
-            res = (int(parts[0]), int(parts[1]))
+            default_output = f"{input_path.stem}_recover.{args.image_format}"
 
         # --- Detect input format ---
         if input_path.suffix.lower() == ".csv":
-            rows = load_from_csv(input_path, phase=args.phase)
-            for row_info in rows:
-                events = row_info["events"]
-                points = extract_points(events)
-                if not points:
-                    print(f"  Skipping phase {row_info['phase']}: no interaction points")
+            output_dir = Path(default_output).parent
+            cache = ResultCache(output_dir) if args.force else ResultCache.load(output_dir)
+            profiler = StageProfiler(input_path.name) if args.profile else None
+            with profiling(profiler):
+                rendered = recover_csv(
+                    input_path, Path(default_output), args.title, ss, res, args.phase,
+                    args.renderer, cache, simplify, args.row_index,
+                )
+            if args.force:
+                cache.entries = ResultCache.load(output_dir).entries
+            finish_result_cache(
+                cache,
+                [{"source": str(input_path.resolve()), "rendered": rendered, "error": None}],
+                args.clean_orphans,
+                complete=args.phase is None,
+            )
+            for row in rendered:
+                if row["output"] is None:
+                    print(f"  Skipping phase {row['phase']}: no interaction points")
                     continue
-
-                # Use screen resolution from CSV if available and not overridden.
-                row_res = res
-                if row_res is None and row_info["screen_width"] and row_info["screen_height"]:
-                    row_res = (row_info["screen_width"], row_info["screen_height"])
-
-                # Build output path: insert phase number if multiple rows.
-                if len(rows) == 1:
-                    out = Path(default_output)
-                else:
-                    base = Path(default_output)
-                    out = base.with_stem(
-                        f"{base.stem}_phase{row_info['phase']}"
-                    )
-
-                # Build title.
-                t = args.title
-                if t is None:
-                    pid = row_info["participant_id"] or input_path.stem
-                    cond = row_info["condition_id"] or ""
-                    t = f"{pid}  phase {row_info['phase']}"
-                    if cond:
-                        t += f"  ({cond})"
-
-                plot_points(points, out, t, ss, row_res)
-                mode = "overlay" if ss else "standalone"
+                status = "unchanged" if row["cached"] else mode
                 print(
-                    f"Phase {row_info['phase']}: "
-                    f"{len(points)} points -> {out} ({mode})"
+                    f"Phase {row['phase']}: "
+                    f"{_points_note(row['points'], row['raw_points'])} "
+                    f"-> {row['output']} ({status})"
+                )
+            if profiler is not None:
+                _report_profile(
+                    profiler.records, output_dir, args.cprofile,
+                    {input_path.name: input_path},
+                    screenshot_path=ss, resolution=res, renderer=args.renderer,
+                    simplify=simplify,
                 )
         else:
             # Legacy: plain JSON array input.
             raw_text = input_path.read_text(encoding="utf-8")
-            events = parse_events_json(raw_text)
+            events = parse_events_json(raw_text, selective=True)
             points = extract_points(events)
-            plot_points(points, Path(default_output), args.title, ss, res)
-            mode = "overlay" if ss else "standalone"
-            print(f"Saved {len(points)} points to {default_output} ({mode})")
+            raw_points = len(points)
+            if simplify:
+                points = decimate_points(points, **simplify)
+            RENDERERS[args.renderer](points, Path(default_output), args.title, ss, res)
+            print(
+                f"Saved {_points_note(len(points), raw_points)} "
+                f"to {default_output} ({mode})"
+            )
 
     except Exception as exc:
         raise SystemExit(f"Error: {exc}")
@@ -0,0 +1,615 @@
+#!/usr/bin/env python3
+"""
+Export an animated replay of a recovered interaction trace.
+
+Where recover_interaction_log.py draws the whole session into one PNG, this
+plays it back in time order over the screenshot, as an animated GIF, an
+MP4, or a directory of numbered PNG frames.
+
+Rendering is incremental.  The background is decoded and scaled once, each
+frame draws only the points logged since the previous one, and only the
+rectangle that changed (new points, the moving cursor marker, the clock --
+and with ``--trail`` the fading part of the path) is recomposed.  The GIF
+writer streams just that rectangle of each frame to disk, so neither time
+nor memory grows with the full frame size times the frame count.  Frames in
+which nothing changes are merged into one longer frame, and ``--max-gap``
+shortens long idle stretches.
+
+Usage:
+    python replay_interaction_log.py data/user_..._.csv replay.gif \\
+        --screenshot image10.png --phase 2 --speed 4 --trail 3
+    python replay_interaction_log.py input_log.json frames/ --fps 30
+"""
+
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from recover_interaction_log import (
+    DEFAULT_COLOR,
+    RASTER_STYLES,
+    TYPE_COLORS,
+    InteractionPoints,
+    extract_points,
+    hex_to_rgb,
+    iter_from_csv,
+    load_screenshot,
+    parse_events_json,
+    parse_resolution,
+    raster_font,
+)
+
+FORMATS = (".gif", ".mp4")
+DEFAULT_RESOLUTION: Tuple[int, int] = (1920, 1080)
+
+Box = Tuple[int, int, int, int]                # (left, top, right, bottom)
+Frame = Tuple[Any, float, Optional[Box]]       # (image, duration ms, changed box)
+
+
+# ---------------------------------------------------------------------------
+# Timeline
+# ---------------------------------------------------------------------------
+
+def playback_clock(ts: np.ndarray, max_gap_ms: Optional[float] = None) -> np.ndarray:
+    """Session time of each point in ms from the first, gaps capped at ``max_gap_ms``."""
+    if not len(ts):
+        return np.zeros(0)
+    gaps = np.diff(ts)
+    if max_gap_ms is not None:
+        gaps = np.minimum(gaps, max_gap_ms)
+    return np.concatenate([[0.0], np.cumsum(gaps)])
+
+
+def frame_schedule(clock: np.ndarray, fps: float, speed: float) -> np.ndarray:
+    """Number of points visible in each frame.
+
+    Frame ``k`` shows every point whose playback clock is at most
+    ``k * speed * 1000 / fps``; the last frame shows them all.
+    """
+    step = speed * 1000.0 / fps
+    n_frames = int(clock[-1] // step) + 1 if len(clock) else 1
+    ends = np.searchsorted(clock, np.arange(n_frames) * step, side="right")
+    ends[-1] = len(clock)
+    return ends
+
+
+def _format_clock(ms: float) -> str:
+    seconds = int(ms // 1000)
+    return f"{seconds // 60}:{seconds % 60:02d}"
+
+
+def _union(a: Optional[Box], b: Optional[Box]) -> Optional[Box]:
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3]))
+
+
+def _overlaps(a: Box, b: Box) -> bool:
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+
+# ---------------------------------------------------------------------------
+# Incremental rendering
+# ---------------------------------------------------------------------------
+
+class _TraceLayer:
+    """The part of the trace drawn so far, updated in place.
+
+    Without fading, points are blended straight into an RGB copy of the
+    background.  With fading they go onto a transparent layer whose alpha
+    is scaled down every frame (flooring, so faint pixels reach zero) and
+    which is composited over the background only where it is visible.
+    """
+
+    def __init__(self, background: Any, style: Dict[str, Any], scale: float,
+                 decay: Optional[float]) -> None:
+        from PIL import Image
+
+        self.background = background
+        self.style = style
+        self.dot_radius = max(style["dot_radius"] * scale, 1.5)
+        self.click_radius = max(style["click_radius"] * scale, 4.0)
+        self.size = background.size
+        self.bbox: Optional[Box] = None      # visible part of the fading layer
+        if decay is None:
+            self.canvas = background.convert("RGB")
+            self.layer = None
+            self.decay_lut = None
+        else:
+            self.canvas = None
+            self.layer = Image.new("RGBA", background.size, (0, 0, 0, 0))
+            self.decay_lut = [int(a * decay) for a in range(256)]
+
+    def clip(self, box: Tuple[float, float, float, float]) -> Optional[Box]:
+        """``box`` rounded outwards and clipped to the image; None if empty."""
+        w, h = self.size
+        left, top = min(max(int(box[0]), 0), w), min(max(int(box[1]), 0), h)
+        right = min(max(int(np.ceil(box[2])) + 1, 0), w)
+        bottom = min(max(int(np.ceil(box[3])) + 1, 0), h)
+        if left >= right or top >= bottom:
+            return None
+        return (left, top, right, bottom)
+
+    def fade(self) -> Optional[Box]:
+        """Fade the layer by one frame; returns the area that changed, if any."""
+        if self.layer is None or self.bbox is None:
+            return None
+        changed = self.bbox
+        region = self.layer.crop(changed)
+        alpha = region.getchannel("A").point(self.decay_lut)
+        region.putalpha(alpha)
+        self.layer.paste(region, changed[:2])
+        inner = alpha.getbbox()
+        self.bbox = None if inner is None else (
+            changed[0] + inner[0], changed[1] + inner[1],
+            changed[0] + inner[2], changed[1] + inner[3],
+        )
+        return changed
+
+    def add(self, xs: np.ndarray, ys: np.ndarray, rgb: np.ndarray,
+            is_click: np.ndarray, joined: Optional[Tuple[float, float]]) -> Optional[Box]:
+        """Draw new points; ``joined`` is the last point drawn before them.
+
+        Returns the area that changed, None if it is all off-image.
+        """
+        from PIL import ImageDraw
+
+        style = self.style
+        if self.layer is not None:
+            draw = ImageDraw.Draw(self.layer)
+        else:
+            draw = ImageDraw.Draw(self.canvas, "RGBA")
+
+        line = np.column_stack([xs, ys]).ravel().tolist()
+        if joined is not None:
+            line = list(joined) + line
+        if len(line) >= 4:
+            draw.line(line, fill=style["trail_color"] + (round(style["trail_alpha"] * 255),),
+                      width=1)
+
+        for click, radius, alpha, edge in (
+            (False, self.dot_radius, style["dot_alpha"], style["dot_edge"]),
+            (True, self.click_radius, style["click_alpha"], style["click_edge"]),
+        ):
+            sel = is_click == click
+            if not sel.any():
+                continue
+            a = round(alpha * 255)
+            outline = None if edge is None else edge + (a,)
+            boxes = np.column_stack([
+                xs[sel] - radius, ys[sel] - radius, xs[sel] + radius, ys[sel] + radius,
+            ]).tolist()
+            for box, (r, g, b) in zip(boxes, rgb[sel].tolist()):
+                draw.ellipse(box, fill=(r, g, b, a), outline=outline)
+
+        pad = (self.click_radius if is_click.any() else self.dot_radius) + 2
+        changed = self.clip((min(line[0::2]) - pad, min(line[1::2]) - pad,
+                             max(line[0::2]) + pad, max(line[1::2]) + pad))
+        if self.layer is not None:
+            self.bbox = _union(self.bbox, changed)
+        return changed
+
+    def region(self, box: Box) -> Any:
+        """The trace over the background within ``box``, as an RGB image."""
+        from PIL import Image
+
+        if self.layer is None:
+            return self.canvas.crop(box)
+        return Image.alpha_composite(
+            self.background.crop(box), self.layer.crop(box)
+        ).convert("RGB")
+
+
+def iter_replay_frames(
+    points: InteractionPoints,
+    screenshot_path: Optional[Path] = None,
+    source_resolution: Optional[Tuple[int, int]] = None,
+    fps: float = 15.0,
+    speed: float = 4.0,
+    trail_s: Optional[float] = None,
+    max_gap_ms: Optional[float] = None,
+    scale: float = 1.0,
+    label: Optional[str] = None,
+    hold_s: float = 2.0,
+) -> Iterator[Frame]:
+    """Yield ``(image, duration_ms, changed)`` frames replaying ``points``.
+
+    ``image`` is one RGB image updated in place from frame to frame (copy
+    it to keep a frame); ``changed`` is the box that differs from the
+    previous frame, or None when nothing does.  The first frame's box is
+    the whole image.
+
+    Parameters
+    ----------
+    fps : frame rate of the replay.
+    speed : session milliseconds per playback millisecond (4 plays a
+        5-minute session in 75 s).
+    trail_s : fade points out over about this many seconds of session
+        time; None keeps the whole path.
+    max_gap_ms : shorten pauses between consecutive points to this long.
+    scale : output size relative to the screenshot (or source screen).
+    label : text shown next to the session clock in the top-left corner.
+    hold_s : how long the final frame stays up.
+    """
+    try:
+        from PIL import Image, ImageDraw
+    except ImportError as exc:
+        raise RuntimeError(
+            "Pillow is required. Install it with: pip install pillow"
+        ) from exc
+
+    if not points:
+        raise ValueError("No valid interaction points found.")
+    if fps <= 0 or speed <= 0 or scale <= 0:
+        raise ValueError("fps, speed and scale must be positive.")
+
+    src_w, src_h = source_resolution or DEFAULT_RESOLUTION
+    if screenshot_path is not None:
+        background = Image.fromarray(load_screenshot(screenshot_path))
+        style = RASTER_STYLES["overlay"]
+    else:
+        background = Image.new("RGBA", (src_w, src_h), (255, 255, 255, 255))
+        style = RASTER_STYLES["standalone"]
+    img_w, img_h = background.size
+    out_w, out_h = max(round(img_w * scale), 1), max(round(img_h * scale), 1)
+    if (out_w, out_h) != (img_w, img_h):
+        background = background.resize((out_w, out_h), Image.Resampling.BILINEAR)
+    background = background.convert("RGBA")
+
+    xs = points.x * (out_w / src_w)
+    ys = points.y * (out_h / src_h)
+    palette = np.array(
+        [hex_to_rgb(TYPE_COLORS.get(t, DEFAULT_COLOR)) for t in points.type_names],
+        dtype=np.uint8,
+    )
+    rgb = palette[points.codes]
+    is_click = points.mask("chart_click")
+
+    clock = playback_clock(points.ts, max_gap_ms)
+    ends = frame_schedule(clock, fps, speed)
+    frame_ms = 1000.0 / fps
+    session_ms = points.ts - points.ts[0]
+    total = _format_clock(session_ms[-1])
+
+    decay = None
+    if trail_s:
+        # Alpha falls from 255 to below 1 over trail_s of session time.
+        per_frame = speed * frame_ms / (trail_s * 1000.0)
+        decay = float((1.0 / 255.0) ** per_frame)
+    trace = _TraceLayer(background, style, scale, decay)
+    screen = trace.region((0, 0, out_w, out_h))
+    draw = ImageDraw.Draw(screen, "RGBA")
+    font = raster_font(max(round(14 * max(scale, 0.5)), 8))
+    head_r = trace.dot_radius + 3
+
+    head_box: Optional[Box] = None
+    caption_box: Optional[Box] = None
+    caption = None
+    shown = 0
+    for k, end in enumerate(ends.tolist()):
+        changed = trace.fade()
+        if end > shown:
+            joined = (xs[shown - 1], ys[shown - 1]) if shown else None
+            sl = slice(shown, end)
+            changed = _union(changed, trace.add(xs[sl], ys[sl], rgb[sl], is_click[sl], joined))
+            shown = end
+
+        text = f"{_format_clock(session_ms[shown - 1]) if shown else '0:00'} / {total}"
+        if label:
+            text = f"{label}   {text}"
+        if text != caption:
+            caption = text
+            left, top, right, bottom = draw.textbbox((8, 8), caption, font=font)
+            new_box = trace.clip((left - 4, top - 3, right + 4, bottom + 3))
+            changed = _union(_union(changed, caption_box), new_box)
+            caption_box = new_box
+
+        if changed is not None and shown:
+            # Redraw the cursor marker over whatever changed beneath it.
+            hx, hy = xs[shown - 1], ys[shown - 1]
+            new_head = trace.clip((hx - head_r - 2, hy - head_r - 2,
+                                   hx + head_r + 2, hy + head_r + 2))
+            changed = _union(_union(changed, head_box), new_head)
+            head_box = new_head
+        if k == 0:
+            changed = (0, 0, out_w, out_h)
+
+        if changed is not None:
+            if caption_box is not None and _overlaps(changed, caption_box):
+                changed = _union(changed, caption_box)
+            screen.paste(trace.region(changed), changed[:2])
+            if shown:
+                draw.ellipse([hx - head_r, hy - head_r, hx + head_r, hy + head_r],
+                             outline=(0, 0, 0, 255), width=2)
+            if caption_box is not None and _overlaps(changed, caption_box):
+                left, top, right, bottom = caption_box
+                draw.rectangle((left, top, right - 1, bottom - 1), fill=(0, 0, 0, 150))
+                draw.text((8, 8), caption, fill=(255, 255, 255, 255), font=font)
+
+        duration = frame_ms + (hold_s * 1000.0 if k == len(ends) - 1 else 0.0)
+        yield screen, duration, changed
+
+
+# ---------------------------------------------------------------------------
+# Writers
+# ---------------------------------------------------------------------------
+
+def _gif_palette(image: Any) -> Any:
+    """A fixed 256-colour palette: the image's colours plus the trace's."""
+    from PIL import Image
+
+    extra = [hex_to_rgb(c) for c in TYPE_COLORS.values()]
+    extra += [hex_to_rgb(DEFAULT_COLOR), (255, 255, 255), (0, 0, 0), (51, 51, 51)]
+    base = image.quantize(colors=256 - len(extra), method=Image.Quantize.MEDIANCUT)
+    colors = base.getpalette()[: 3 * (256 - len(extra))]
+    colors += [c for rgb in extra for c in rgb]
+    colors += [0] * (768 - len(colors))
+    pal = Image.new("P", (1, 1))
+    pal.putpalette(colors)
+    return pal
+
+
+def write_gif(frames: Iterable[Frame], output_path: Path) -> int:
+    """Stream frames to an animated GIF; returns the number of frames written.
+
+    Every frame is mapped onto one palette built from the first frame, and
+    only its changed box is quantized and stored (each GIF frame is drawn
+    over the previous one).  A frame is written once the next changed frame
+    arrives, so unchanged frames just add to its duration.
+    """
+    from PIL import GifImagePlugin, Image
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    palette = None
+    pending: Optional[Tuple[Any, Tuple[int, int]]] = None
+    pending_ms = 0.0
+    written = 0
+
+    with open(output_path, "wb") as fp:
+        for image, ms, changed in frames:
+            if changed is None and pending is not None:
+                pending_ms += ms
+                continue
+            if palette is None:
+                palette = _gif_palette(image)
+                full = image.quantize(palette=palette, dither=Image.Dither.NONE)
+                header, _ = GifImagePlugin.getheader(full, info={"loop": 0})
+                fp.write(b"".join(header))
+            if pending is not None:
+                fp.write(_gif_frame(*pending, pending_ms))
+                written += 1
+            box = changed or (0, 0, 1, 1)
+            crop = image.crop(box).quantize(palette=palette, dither=Image.Dither.NONE)
+            pending, pending_ms = (crop, box[:2]), ms
+        if pending is None:
+            raise ValueError("No frames to write.")
+        fp.write(_gif_frame(*pending, pending_ms))
+        fp.write(b";")
+    return written + 1
+
+
+def _gif_frame(image: Any, offset: Tuple[int, int], ms: float) -> bytes:
+    from PIL import GifImagePlugin
+
+    # GIF delays are in 1/100 s, and viewers slow anything below 2 down.
+    delay = max(round(ms / 10), 2) * 10
+    return b"".join(GifImagePlugin.getdata(image, offset, duration=delay, disposal=1))
+
+
+def write_video(frames: Iterable[Frame], output_path: Path, fps: float) -> int:
+    """Encode frames to MP4 at a constant ``fps``; returns the frames encoded."""
+    try:
+        import imageio.v2 as imageio
+    except ImportError as exc:
+        raise RuntimeError(
+            "imageio is required for MP4 export. "
+            "Install it with: pip install imageio imageio-ffmpeg"
+        ) from exc
+
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    frame_ms = 1000.0 / fps
+    written = 0
+    owed = 0.0
+    array = None
+    with imageio.get_writer(output_path, fps=fps, codec="libx264",
+                            macro_block_size=2) as writer:
+        for image, ms, changed in frames:
+            if changed is not None or array is None:
+                array = np.asarray(image)
+            owed += ms
+            while owed >= frame_ms / 2:
+                writer.append_data(array)
+                owed -= frame_ms
+                written += 1
+    return written
+
+
+def write_frames(frames: Iterable[Frame], output_dir: Path) -> int:
+    """Write numbered PNG frames plus an ffmpeg concat list with their durations.
+
+    Unchanged frames are not written again; the previous frame's duration
+    grows instead.  ``ffmpeg -f concat -i frames.ffconcat -vsync vfr
+    replay.mp4`` turns the directory into a video.
+    """
+    output_dir.mkdir(parents=True, exist_ok=True)
+    names: List[str] = []
+    durations: List[float] = []
+    for image, ms, changed in frames:
+        if changed is None and names:
+            durations[-1] += ms
+            continue
+        name = f"frame_{len(names):05d}.png"
+        image.save(output_dir / name, compress_level=1)
+        names.append(name)
+        durations.append(ms)
+
+    lines = ["ffconcat version 1.0"]
+    for name, ms in zip(names, durations):
+        lines += [f"file {name}", f"duration {ms / 1000:.4f}"]
+    if names:
+        # The concat demuxer ignores the last entry's duration unless the
+        # file is listed once more.
+        lines.append(f"file {names[-1]}")
+    (output_dir / "frames.ffconcat").write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return len(names)
+
+
+def export_replay(
+    points: InteractionPoints,
+    output_path: Path,
+    screenshot_path: Optional[Path] = None,
+    source_resolution: Optional[Tuple[int, int]] = None,
+    fps: float = 15.0,
+    **options: Any,
+) -> int:
+    """Render a replay of ``points`` to ``output_path``; returns the frames written.
+
+    The format follows the suffix: ``.gif``, ``.mp4`` (needs imageio with
+    imageio-ffmpeg), or none for a directory of PNG frames.  ``options`` are
+    passed to :func:`iter_replay_frames`.
+    """
+    suffix = output_path.suffix.lower()
+    if suffix and suffix not in FORMATS:
+        raise ValueError(
+            f"Unsupported replay format {suffix!r}; use {' or '.join(FORMATS)}, "
+            "or a directory for PNG frames."
+        )
+    frames = iter_replay_frames(points, screenshot_path, source_resolution, fps=fps, **options)
+    if suffix == ".gif":
+        return write_gif(frames, output_path)
+    if suffix == ".mp4":
+        return write_video(frames, output_path, fps)
+    return write_frames(frames, output_path)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _load_sessions(input_path: Path, phase: Optional[int]) -> List[Dict[str, Any]]:
+    """Extracted points and row metadata for each session in the input."""
+    if input_path.suffix.lower() == ".csv":
+        sessions = []
+        for row in iter_from_csv(input_path, phase=phase, selective=True):
+            row["points"] = extract_points(row.pop("events"))
+            sessions.append(row)
+        return sessions
+    with open(input_path, "r", encoding="utf-8") as f:
+        events = parse_events_json(f.read(), selective=True)
+    return [{
+        "points": extract_points(events), "phase": phase, "participant_id": "",
+        "condition_id": "", "screen_width": None, "screen_height": None,
+    }]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Export an animated replay of an interaction log.",
+    )
+    parser.add_argument(
+        "input",
+        help="Experiment CSV with an interaction_log column, or a JSON event array.",
+    )
+    parser.add_argument(
+        "output", nargs="?", default=None,
+        help="Output .gif or .mp4, or a directory for PNG frames "
+             "(default: <input>_replay.gif).  With several phases a _phaseN "
+             "suffix is added.",
+    )
+    parser.add_argument(
+        "--screenshot", default=None,
+        help="Screenshot PNG to replay the trace over.",
+    )
+    parser.add_argument(
+        "--resolution", default=None, metavar="WxH",
+        help="Source screen resolution (default: from the CSV, else 1920x1080).",
+    )
+    parser.add_argument(
+        "--phase", default=None, type=int, choices=[1, 2],
+        help="Which phase to replay (default: every phase with interaction data).",
+    )
+    parser.add_argument(
+        "--fps", default=15.0, type=float,
+        help="Frames per second of the replay (default: 15).",
+    )
+    parser.add_argument(
+        "--speed", default=4.0, type=float,
+        help="Playback speed relative to real time (default: 4).",
+    )
+    parser.add_argument(
+        "--trail", default=None, type=float, metavar="SECONDS",
+        help="Fade points out over this many seconds of session time "
+             "(default: keep the whole path).",
+    )
+    parser.add_argument(
+        "--max-gap", default=None, type=float, metavar="MS",
+        help="Shorten pauses between events to at most MS milliseconds.",
+    )
+    parser.add_argument(
+        "--scale", default=1.0, type=float,
+        help="Output size relative to the screenshot (default: 1.0).",
+    )
+    parser.add_argument(
+        "--hold", default=2.0, type=float, metavar="SECONDS",
+        help="How long the final frame is shown (default: 2).",
+    )
+    args = parser.parse_args()
+
+    try:
+        input_path = Path(args.input)
+        if not input_path.is_file():
+            raise ValueError(f"Input not found: {input_path}")
+        for name in ("fps", "speed", "scale"):
+            if getattr(args, name) <= 0:
+                raise ValueError(f"--{name} must be positive.")
+        if args.trail is not None and args.trail <= 0:
+            raise ValueError("--trail must be positive.")
+        if args.max_gap is not None and args.max_gap <= 0:
+            raise ValueError("--max-gap must be positive.")
+        if args.hold < 0:
+            raise ValueError("--hold must not be negative.")
+        resolution = parse_resolution(args.resolution)
+        screenshot = Path(args.screenshot) if args.screenshot else None
+        output = Path(args.output) if args.output else input_path.with_name(
+            f"{input_path.stem}_replay.gif"
+        )
+        sessions = _load_sessions(input_path, args.phase)
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+    for session in sessions:
+        points = session["points"]
+        out = output
+        if len(sessions) > 1:
+            out = output.with_name(f"{output.stem}_phase{session['phase']}{output.suffix}")
+        if not points:
+            print(f"Phase {session['phase']}: no interaction points, skipped.")
+            continue
+        row_res = resolution
+        if row_res is None and session["screen_width"] and session["screen_height"]:
+            row_res = (session["screen_width"], session["screen_height"])
+        label = session["participant_id"] or input_path.stem
+        if session["phase"] is not None:
+            label += f"  phase {session['phase']}"
+
+        started = time.perf_counter()
+        try:
+            n_frames = export_replay(
+                points, out, screenshot, row_res, fps=args.fps, speed=args.speed,
+                trail_s=args.trail, max_gap_ms=args.max_gap, scale=args.scale,
+                label=label, hold_s=args.hold,
+            )
+        except Exception as exc:
+            raise SystemExit(f"Error: {exc}")
+        session_s = (points.ts[-1] - points.ts[0]) / 1000.0
+        print(f"Saved {out}: {len(points)} points, {session_s:.0f}s session, "
+              f"{n_frames} frame(s) in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -12,3 +12,8 @@ SCREENSHOT="image10.png"
 python3 recover_interaction_log.py \
     "$CSV" \
     --screenshot "$SCREENSHOT"
+
+# Batch mode: every user_*.csv in a directory (or a quoted glob), rendered
+# across a process pool into recovered/.
+# python3 recover_interaction_log.py dist/data recovered \
+#     --screenshot "$SCREENSHOT" --jobs 8
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Generate synthetic interaction logs shaped like the experiment's output.
+
+Produces either plain JSON event arrays (like ``input_log.json``) or full
+experiment CSVs whose ``prediction-task`` rows carry an ``interaction_log``
+column, so every stage of recover_interaction_log.py can be exercised at
+sizes the pilot data never reaches (1k to 1M+ events per row).
+
+The cursor performs a smoothed random walk over the screen; the chart is
+entered and left periodically and clicks land on the current position.
+Element payloads copy the descriptors the tracker records, including d3
+attribute selectors with embedded double quotes, so CSV quote escaping is
+exercised as well.
+
+Usage:
+    python synth_interaction_log.py synthetic.json --events 100000
+    python synth_interaction_log.py synth_data/ --format csv --files 20 \\
+        --events 50000 --mix hover=0.9,click=0.02,enter=0.04,leave=0.04
+"""
+
+import argparse
+import csv
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+DEFAULT_MIX: Dict[str, float] = {
+    "chart_hover": 0.96,
+    "chart_click": 0.01,
+    "chart_enter": 0.015,
+    "chart_leave": 0.015,
+}
+
+PAYLOADS = ("full", "minimal", "none")
+
+# Offset of the chart container within the page, as recorded in the pilot.
+CHART_OFFSET: Tuple[int, int] = (188, 60)
+
+_ELEMENTS: List[Dict[str, Any]] = [
+    {
+        "label": "svg#jspsych-chart-svg.chart-svg",
+        "tag": "svg",
+        "id": "jspsych-chart-svg",
+        "classes": ["chart-svg"],
+        "path": "div#air-quality-chart.chart-container > svg#jspsych-chart-svg.chart-svg",
+    },
+    {
+        "label": 'path.line[data-series="historical"]',
+        "tag": "path",
+        "classes": ["line"],
+        "path": 'div#air-quality-chart.chart-container > svg#jspsych-chart-svg.chart-svg'
+                ' > g.plot > path.line[data-series="historical"]',
+    },
+    {
+        "label": "div.visualization-content",
+        "tag": "div",
+        "classes": ["visualization-content"],
+        "path": "div.visualization-content",
+    },
+]
+
+CSV_COLUMNS = [
+    "trial_type", "trial_index", "time_elapsed", "rt", "internal_node_id",
+    "participant_id", "condition_id", "condition_name", "phase", "round",
+    "screen_width", "screen_height", "device_pixel_ratio", "total_interactions",
+    "responses", "response", "interaction_log",
+]
+
+
+# ---------------------------------------------------------------------------
+# Events
+# ---------------------------------------------------------------------------
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """Parse ``hover=0.9,click=0.02,...`` into normalised type weights."""
+    mix: Dict[str, float] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if not name:
+            continue
+        if not name.startswith("chart_"):
+            name = f"chart_{name}"
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid mix entry '{part}', expected type=weight")
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError(f"Invalid mix '{value}': weights must sum to more than 0")
+    return {k: v / total for k, v in mix.items()}
+
+
+def generate_events(
+    n_events: int,
+    mix: Optional[Dict[str, float]] = None,
+    payload: str = "full",
+    resolution: Tuple[int, int] = (1920, 1080),
+    seed: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """Return ``n_events`` tracker events in time order.
+
+    ``mix`` maps event types to relative frequencies (default
+    ``DEFAULT_MIX``).  Enter and leave draws are made to alternate, starting
+    with an enter.  ``payload`` selects the element descriptor attached to
+    each event: ``"full"`` (as recorded), ``"minimal"`` (tag only) or
+    ``"none"``.
+    """
+    if payload not in PAYLOADS:
+        raise ValueError(f"Unknown payload '{payload}', expected one of: {', '.join(PAYLOADS)}")
+    rng = np.random.default_rng(seed)
+    mix = mix or DEFAULT_MIX
+    names = list(mix)
+    types = rng.choice(len(names), size=n_events, p=[mix[n] for n in names])
+    type_names = [names[t] for t in types]
+
+    boundary = [i for i, t in enumerate(type_names) if t in ("chart_enter", "chart_leave")]
+    for k, i in enumerate(boundary):
+        type_names[i] = "chart_enter" if k % 2 == 0 else "chart_leave"
+
+    # Smoothed random walk, reflected back into the screen.
+    w, h = resolution
+    kernel = np.exp(-np.arange(60) / 15.0)
+    kernel /= kernel.sum()
+    noise = rng.normal(0.0, 12.0, size=(n_events, 2))
+    velocity = np.column_stack([
+        np.convolve(noise[:, 0], kernel)[:n_events],
+        np.convolve(noise[:, 1], kernel)[:n_events],
+    ])
+    pos = np.cumsum(velocity, axis=0) + (w / 2, h / 2)
+    pos = np.abs(np.mod(pos + (w, h), (2 * w, 2 * h)) - (w, h))
+    pos = np.minimum(pos, (w - 1, h - 1))
+    xs = np.round(pos[:, 0]).astype(int).tolist()
+    ys = np.round(pos[:, 1]).astype(int).tolist()
+    # ~120 Hz mousemove sampling with jitter and occasional pauses.
+    gaps = rng.exponential(8.3, n_events) + (rng.random(n_events) < 0.002) * 1500
+    inner_ts = (250.0 + np.cumsum(gaps)).tolist()
+    outer_ts = (np.array(inner_ts) + rng.random(n_events) * 0.3).tolist()
+    elements = rng.integers(0, len(_ELEMENTS), n_events).tolist()
+
+    ox, oy = CHART_OFFSET
+    events: List[Dict[str, Any]] = []
+    for i in range(n_events):
+        x, y = xs[i], ys[i]
+        data: Dict[str, Any] = {
+            "x": x,
+            "y": y,
+            "chart_x": x - ox + 0.5,
+            "chart_y": y - oy + 0.1802062988281,
+        }
+        if type_names[i] != "chart_hover":
+            data["zone"] = "controls"
+        if payload == "full":
+            data["element"] = _ELEMENTS[elements[i]]
+        elif payload == "minimal":
+            data["element"] = {"tag": _ELEMENTS[elements[i]]["tag"]}
+        data["timestamp"] = inner_ts[i]
+        events.append({"type": type_names[i], "data": data, "timestamp": outer_ts[i]})
+    return events
+
+
+# ---------------------------------------------------------------------------
+# Files
+# ---------------------------------------------------------------------------
+
+def write_json(path: Path, events: List[Dict[str, Any]], indent: Optional[int] = 2) -> None:
+    """Write ``events`` as a JSON array (indented like ``input_log.json``)."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(events, f, indent=indent)
+
+
+def write_csv(
+    path: Path,
+    rows: Sequence[List[Dict[str, Any]]],
+    participant_id: str = "synthetic",
+    condition_id: str = "condition_1_pi_plot",
+    resolution: Tuple[int, int] = (1920, 1080),
+) -> None:
+    """Write an experiment CSV with one ``prediction-task`` row per entry of
+    ``rows`` (phases 1, 2, 1, ...) surrounded by typical survey rows."""
+    def survey(index: int, responses: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "trial_type": "survey-text", "trial_index": index,
+            "participant_id": participant_id, "responses": json.dumps(responses),
+        }
+
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_COLUMNS)
+        writer.writeheader()
+        writer.writerow({"trial_type": "preload", "trial_index": 0})
+        writer.writerow(survey(1, {"participant_id": participant_id, "note": 'a "quoted" answer'}))
+        for i, events in enumerate(rows):
+            writer.writerow({
+                "trial_type": "prediction-task",
+                "trial_index": i + 2,
+                "time_elapsed": int(events[-1]["timestamp"]) if events else 0,
+                "rt": events[-1]["timestamp"] if events else 0,
+                "internal_node_id": f"0.0-{i + 8}.0",
+                "participant_id": participant_id,
+                "condition_id": condition_id,
+                "condition_name": "Synthetic",
+                "phase": i % 2 + 1,
+                "round": i // 2 + 1,
+                "screen_width": resolution[0],
+                "screen_height": resolution[1],
+                "device_pixel_ratio": 1,
+                "total_interactions": len(events),
+                "interaction_log": json.dumps(events, separators=(",", ":")),
+            })
+        writer.writerow(survey(len(rows) + 2, {"feedback": "none"}))
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Generate synthetic interaction logs (JSON arrays or experiment CSVs).",
+    )
+    parser.add_argument(
+        "output",
+        help="Output .json file, a .csv file, or a directory (with --files).",
+    )
+    parser.add_argument(
+        "--format", default=None, choices=("json", "csv"),
+        help="Output format (default: from the output suffix, csv for directories).",
+    )
+    parser.add_argument(
+        "--events", default=10_000, type=int, metavar="N",
+        help="Events per interaction log (default: 10000).",
+    )
+    parser.add_argument(
+        "--rows", default=2, type=int, metavar="N",
+        help="CSV only: prediction-task rows per file (default: 2).",
+    )
+    parser.add_argument(
+        "--files", default=1, type=int, metavar="N",
+        help="Number of files to write into the output directory (default: 1).",
+    )
+    parser.add_argument(
+        "--mix", default=None,
+        help="Event type weights, e.g. hover=0.9,click=0.02,enter=0.04,leave=0.04.",
+    )
+    parser.add_argument(
+        "--payload", default="full", choices=PAYLOADS,
+        help="Element descriptor attached to each event (default: full).",
+    )
+    parser.add_argument(
+        "--resolution", default="1920x1080", metavar="WxH",
+        help="Screen resolution of the synthetic sessions (default: 1920x1080).",
+    )
+    parser.add_argument("--seed", default=0, type=int, help="Random seed (default: 0).")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix) if args.mix else None
+        w, _, h = args.resolution.lower().partition("x")
+        resolution = (int(w), int(h))
+        out = Path(args.output)
+        fmt = args.format or ("json" if out.suffix.lower() == ".json" else "csv")
+
+        if args.files > 1 or out.suffix == "":
+            out.mkdir(parents=True, exist_ok=True)
+            paths = [out / f"user_synthetic{i:04d}.{fmt}" for i in range(args.files)]
+        else:
+            paths = [out]
+
+        total = 0
+        for i, path in enumerate(paths):
+            seed = args.seed * 100_003 + i
+            if fmt == "json":
+                events = generate_events(args.events, mix, args.payload, resolution, seed)
+                write_json(path, events)
+                total += len(events)
+            else:
+                rows = [
+                    generate_events(args.events, mix, args.payload, resolution, seed * 31 + r)
+                    for r in range(args.rows)
+                ]
+                write_csv(path, rows, participant_id=f"synthetic{i:04d}", resolution=resolution)
+                total += sum(len(r) for r in rows)
+            print(f"  {path}")
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+    print(f"Done. Wrote {total} event(s) to {len(paths)} file(s).")
+
+
+if __name__ == "__main__":
+    main()
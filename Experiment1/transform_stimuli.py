@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Transform the numeric field of a stimulus file through a chain of operations.
+
+Replaces the map.py -> minus50.py round trip: the file is read once, every
+operation runs vectorized over the whole column (optionally per group of
+``stock`` / ``series`` / ``scenario``), and the result is written once as
+compact JSON.
+
+Usage:
+    python transform_stimuli.py synthetic_stock_data.json out.json \\
+        --op amplify=4 --op minmax=60:120 --op round --op shift=-50
+    python transform_stimuli.py in.json out.json --preset aqi --group-by stock
+
+Operations (applied in the order given):
+    center           subtract the group mean
+    amplify=F        scale deviations from the group mean by F
+    minmax=LO:HI     linearly map the group's range onto [LO, HI]
+    shift=D          add D
+    round[=N]        round to N decimals (default 0, which writes integers)
+
+Entries whose field is missing or not a number are passed through untouched
+and do not contribute to group statistics.
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+GROUP_KEYS = ("stock", "series", "scenario")
+
+# Named operation chains reproducing the original one-off scripts.
+PRESETS: Dict[str, List[str]] = {
+    # map.py: amplify variability 4x, map into the AQI range 60..120.
+    "aqi": ["amplify=4", "minmax=60:120", "round"],
+    # minus50.py: shift AQI values down by 50.
+    "norm": ["shift=-50"],
+    # Both in one pass.
+    "aqi-norm": ["amplify=4", "minmax=60:120", "round", "shift=-50"],
+}
+
+
+# ---------------------------------------------------------------------------
+# Operations
+# ---------------------------------------------------------------------------
+
+Op = Tuple[str, Tuple[float, ...]]
+
+
+def parse_op(spec: str) -> Op:
+    """Parse ``name`` or ``name=arg[:arg]`` into ``(name, args)``."""
+    name, _, arg = spec.partition("=")
+    name = name.strip().lower()
+    try:
+        args = tuple(float(a) for a in arg.split(":")) if arg else ()
+    except ValueError:
+        raise ValueError(f"Invalid operation '{spec}': arguments must be numbers")
+
+    arity = {"center": (0,), "amplify": (1,), "minmax": (2,), "shift": (1,), "round": (0, 1)}
+    if name not in arity:
+        raise ValueError(
+            f"Unknown operation '{name}', expected one of: {', '.join(arity)}"
+        )
+    if len(args) not in arity[name]:
+        raise ValueError(f"Invalid operation '{spec}': wrong number of arguments")
+    if name == "minmax" and args[0] >= args[1]:
+        raise ValueError(f"Invalid operation '{spec}': LO must be below HI")
+    if name == "round" and args and not args[0].is_integer():
+        raise ValueError(f"Invalid operation '{spec}': decimals must be a whole number")
+    return name, args
+
+
+def _group_mean(values: np.ndarray, groups: np.ndarray, n_groups: int) -> np.ndarray:
+    sums = np.bincount(groups, weights=values, minlength=n_groups)
+    counts = np.bincount(groups, minlength=n_groups)
+    return (sums / counts)[groups]
+
+
+def apply_ops(
+    values: np.ndarray,
+    ops: Sequence[Op],
+    groups: Optional[np.ndarray] = None,
+    integral: bool = False,
+) -> Tuple[np.ndarray, bool]:
+    """Run ``ops`` over ``values`` in one vectorized pass.
+
+    ``groups`` holds a dense group index per value (all zeros when omitted);
+    ``center``, ``amplify`` and ``minmax`` use per-group statistics.
+    ``integral`` says whether the input values are integers.  Returns the
+    transformed values and whether they are still integers.
+    """
+    out = values.astype(float)
+    if groups is None:
+        groups = np.zeros(len(out), dtype=np.intp)
+    n_groups = int(groups.max()) + 1 if len(groups) else 0
+
+    for name, args in ops:
+        if name == "center":
+            out = out - _group_mean(out, groups, n_groups)
+            integral = False
+        elif name == "amplify":
+            mean = _group_mean(out, groups, n_groups)
+            out = (out - mean) * args[0] + mean
+            integral = False
+        elif name == "minmax":
+            lo, hi = args
+            mins = np.full(n_groups, np.inf)
+            maxs = np.full(n_groups, -np.inf)
+            np.minimum.at(mins, groups, out)
+            np.maximum.at(maxs, groups, out)
+            span = (maxs - mins)[groups]
+            # A constant group has no range to stretch; pin it to LO.
+            scaled = np.divide(
+                out - mins[groups], span, out=np.zeros_like(out), where=span > 0
+            )
+            out = scaled * (hi - lo) + lo
+            integral = False
+        elif name == "shift":
+            out = out + args[0]
+            integral = integral and args[0].is_integer()
+        elif name == "round":
+            decimals = int(args[0]) if args else 0
+            out = np.round(out, decimals)
+            integral = decimals <= 0
+    return out, integral
+
+
+# ---------------------------------------------------------------------------
+# Stimulus files
+# ---------------------------------------------------------------------------
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def group_index(entries: List[Dict[str, Any]], keys: Sequence[str]) -> np.ndarray:
+    """Dense group number per entry, from the tuple of its ``keys`` values."""
+    if not keys:
+        return np.zeros(len(entries), dtype=np.intp)
+    labels: Dict[Tuple[Any, ...], int] = {}
+    return np.fromiter(
+        (labels.setdefault(tuple(e.get(k) for k in keys), len(labels)) for e in entries),
+        dtype=np.intp,
+        count=len(entries),
+    )
+
+
+def transform_entries(
+    entries: List[Dict[str, Any]],
+    ops: Sequence[Op],
+    field: str = "price",
+    group_by: Sequence[str] = (),
+) -> int:
+    """Transform ``field`` of ``entries`` in place; return how many changed."""
+    idx = [i for i, e in enumerate(entries) if _is_number(e.get(field))]
+    if not idx:
+        return 0
+    selected = [entries[i] for i in idx]
+    raw = [e[field] for e in selected]
+    integral = all(isinstance(v, int) for v in raw)
+
+    values, integral = apply_ops(
+        np.asarray(raw, dtype=float), ops, group_index(selected, group_by), integral
+    )
+    for entry, value in zip(selected, values.astype(int) if integral else values):
+        entry[field] = value.item()
+    return len(selected)
+
+
+def transform_file(
+    input_path: Path,
+    output_path: Path,
+    ops: Sequence[Op],
+    field: str = "price",
+    group_by: Sequence[str] = (),
+    indent: Optional[int] = None,
+) -> int:
+    """Read a ``{"data": [...]}`` (or bare list) stimulus file, transform it
+    and write it back out.  Returns the number of values transformed."""
+    with open(input_path, "r", encoding="utf-8") as f:
+        document = json.load(f)
+    entries = document["data"] if isinstance(document, dict) else document
+    if not isinstance(entries, list):
+        raise ValueError(f"{input_path} has no list of entries under 'data'")
+
+    n = transform_entries(entries, ops, field, group_by)
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        if indent is None:
+            json.dump(document, f, separators=(",", ":"))
+        else:
+            json.dump(document, f, indent=indent)
+    return n
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        description="Transform a stimulus file's values in one vectorized pass.",
+    )
+    parser.add_argument("input", help="Stimulus JSON ({\"data\": [...]} or a list).")
+    parser.add_argument("output", help="Output JSON path.")
+    parser.add_argument(
+        "--op", action="append", default=[], metavar="OP",
+        help="Operation to apply, repeatable and applied in order: center, "
+             "amplify=F, minmax=LO:HI, shift=D, round[=N].",
+    )
+    parser.add_argument(
+        "--preset", default=None, choices=tuple(PRESETS),
+        help="Named operation chain, run before any --op ("
+             + "; ".join(f"{k}: {' '.join(v)}" for k, v in PRESETS.items()) + ").",
+    )
+    parser.add_argument(
+        "--group-by", default="",
+        help=f"Comma-separated keys whose values form groups for center, "
+             f"amplify and minmax (any of: {', '.join(GROUP_KEYS)}). "
+             "Default: the whole file is one group.",
+    )
+    parser.add_argument(
+        "--field", default="price", help="Numeric field to transform (default: price).",
+    )
+    parser.add_argument(
+        "--indent", default=None, type=int, metavar="N",
+        help="Indent the output JSON (default: compact).",
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        specs = (PRESETS[args.preset] if args.preset else []) + args.op
+        if not specs:
+            raise ValueError("No operations given; use --op and/or --preset.")
+        ops = [parse_op(s) for s in specs]
+        group_by = [k.strip() for k in args.group_by.split(",") if k.strip()]
+        unknown = [k for k in group_by if k not in GROUP_KEYS]
+        if unknown:
+            raise ValueError(
+                f"Unknown group key(s) {', '.join(unknown)}, "
+                f"expected any of: {', '.join(GROUP_KEYS)}"
+            )
+        n = transform_file(
+            Path(args.input), Path(args.output), ops, args.field, group_by, args.indent
+        )
+    except Exception as exc:
+        raise SystemExit(f"Error: {exc}")
+
+    print(f"Done. Transformed {n} value(s) ({' -> '.join(specs)}). Saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()